@@ -1,276 +1,129 @@
 #!/usr/bin/env python3.11
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Blueprint, render_template, request, jsonify, send_file, Response, g, make_response
+import io
 import os
-import json
 import utils
+import atexit
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from crewai import Crew, Task
 import tempfile
 from dotenv import load_dotenv
 
-#pdf download imports
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.colors import HexColor
+import importlib.util
 import re
+from typing import Optional
 
-REPORTLAB_AVAILABLE = True  # Since the imports worked, ReportLab is available
+# ReportLab is only imported when a PDF is requested; it adds noticeably to startup time
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
 
 # Set OpenAI API key as environment variable
 load_dotenv()
 
-# Import crew components
-from src.agents.agent import spacenews_agent, companynews_agent, contract_agent, globalnewswire_agent, serpapi_agent, teardown_agent
-from src.tools.newTeardownCompilerTool import compile_teardown_rag
+from src.utils.answer_store import AnswerStore
 
 # Import simplified infrastructure
 from database import Database
+from search_index import SearchIndex, SCOPES
+from tracing import load_trace, summarize_trace
+from metrics import REGISTRY, API_REQUEST_DURATION
+from llm_governor import get_governor
+from template_registry import get_templates
 from models import TeardownJob, Teardown, JobStatus
+from job_runner import JobRunner
 from utils import (
     generate_job_id, generate_unique_id,
-    create_job_folders, get_teardown_path, ensure_directories_exist, sanitize_filename 
+    create_job_folders, ensure_directories_exist, sanitize_filename 
 )
 
-app = Flask(__name__)
+# "inline" runs jobs on a thread pool inside this process (development, single process).
+# "queue" only records them as PENDING for the separate job runner (gunicorn / production).
+JOB_EXECUTION = os.environ.get("TEARDOWN_JOB_EXECUTION", "inline")
+
+# Multi-get job status: at most this many IDs per request, long-polls capped at this many seconds
+MAX_STATUS_IDS = 200
+# Held status requests occupy a gunicorn thread each, so waits are short and only a few may be held at once
+MAX_STATUS_WAIT_SECONDS = float(os.environ.get("TEARDOWN_MAX_STATUS_WAIT", "5"))
+MAX_STATUS_WAITERS = int(os.environ.get("TEARDOWN_MAX_STATUS_WAITERS", "2"))
+# Sent to clients whose wait was refused because every waiter slot was taken
+STATUS_RETRY_AFTER_SECONDS = 2
+_status_waiters = threading.BoundedSemaphore(MAX_STATUS_WAITERS)
+
+# Contract prefetches run one at a time on a single worker; names already queued or running are skipped
+_prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="contract-prefetch")
+atexit.register(_prefetch_pool.shutdown, cancel_futures=True)
+_prefetching = set()
+_prefetching_lock = threading.Lock()
+
+bp = Blueprint('teardown', __name__)
 
 # Initialize database and ensure directories exist
 db = Database()
+search_index = SearchIndex(db.db_path)
 ensure_directories_exist()
 
-# Store active jobs (for thread management)
-active_jobs = {}
+# In-process job runner, created on first use in inline mode. It claims each job before running it,
+# so a `python -m worker` polling the same database never runs it as well.
+_runner = None
+_runner_lock = threading.Lock()
 
-def run_single_teardown(job: TeardownJob):
-    try:
-        # Update job status to running
-        job.status = JobStatus.RUNNING
-        job.started_at = datetime.now()
-        db.update_job(job)
-        
-        # Create job-specific folders (KEEP THIS AS IS)
-        output_folder = create_job_folders(job.id)
-        job.output_folder = output_folder
-        db.update_job(job)
+def get_runner() -> JobRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner(db)
+            atexit.register(_runner.executor.shutdown)
+        return _runner
 
-        print(f"Company Name: {job.company_name}")
-        print(f"Output Folder: {output_folder}")  # Should be something like "output/job_20250807_115103_121af0e2"
-        
-        # ===== THE KEY CHANGE: Pass output_folder to ALL tasks =====
-        
-        # Create dynamic tasks with job-specific output folder
-        dynamic_companynews_task = Task(
-            description=f"Scrape {job.company_name}'s website ({job.company_url}) and extract all useful text-based content. Save files to {output_folder}.",
-            expected_output="A .txt file with structured information scraped from the company's homepage and subpages.",
-            agent=companynews_agent,
-            # ADD THIS - pass the job-specific folder to the agent
-            inputs={
-                "company_name": job.company_name,
-                "company_url": job.company_url,
-                "output_folder": output_folder  # <-- This ensures data goes to job-specific folder
-            }
-        )
-        
-        dynamic_spacenews_task = Task(
-            description=f"Find the most interesting recent developments about {job.company_name} in the space sector and compile them in a txt file. Save files to {output_folder}.",
-            expected_output="A .txt file with recent space industry news related to the company.",
-            agent=spacenews_agent,
-            inputs={
-                "company_name": job.company_name,
-                "output_folder": output_folder  # <-- Job-specific folder
-            }
-        )
-        
-        dynamic_government_contract_task = Task(
-            description=f"Use the USAspending API to find government contracts awarded to {job.company_name} and save them to a text file. Save files to {output_folder}.",
-            expected_output="A .txt file with recent contract/award news.",
-            agent=contract_agent,
-            inputs={
-                "company_name": job.company_name,
-                "output_folder": output_folder  # <-- Job-specific folder
-            }
-        )
-        
-        # Import globalnewswire task and modify it to use job-specific folder
-        from tasks.globalnewswire_task import globalnewswire_task
-        
-        # You might need to create a dynamic globalnewswire task too:
-        dynamic_globalnewswire_task = Task(
-            description=f"Find the most interesting recent developments about {job.company_name} in the deep tech sector and compile them in a txt file. Save files to {output_folder}.",
-            expected_output="A .txt file with recent deep tech industry news related to the company.",
-            agent=globalnewswire_agent,
-            inputs={
-                "company_name": job.company_name,
-                "output_folder": output_folder  # <-- Job-specific folder
-            }
-        )
+def submit_job(job: TeardownJob):
+    """Hand a freshly created job to whatever executes jobs in this deployment"""
+    if JOB_EXECUTION == "inline" and not get_runner().submit(job.id):
+        print(f"⚠️ Job {job.id} was not started here (already claimed or shutting down)")
 
-        from tasks.serpapi_task import serpapi_task
+# Queue depth is read from the jobs table at scrape time
+JOBS_BY_STATUS = REGISTRY.gauge("teardown_jobs", "Jobs currently in each status", ("status",))
+JOBS_BY_STATUS.set_function(lambda: {
+    (status.value,): db.count_jobs_by_status().get(status.value, 0) for status in JobStatus
+})
 
-        dynamic_serpapi_task = Task(
-            description=f"Find the most interesting recent developments about {job.company_name} on the internet and compile them in a txt file. Save files to {output_folder}.",
-            expected_output="A .txt file with recent news related to the company.",
-            agent=serpapi_agent,
-            inputs={
-                "company_name": job.company_name,
-                "output_folder": output_folder  # <-- Job-specific folder
-            }
-        )
-        
-        # Create teardown tasks with job-specific folder
-        print(f"DEBUG: Loading questions from template/question.json")
-        with open("template/question.json", "r") as f:
-            questions = json.load(f)
-
-        print(f"DEBUG: Loaded {len(questions)} questions")
-
-        teardown_tasks_individual = []
-
-        for i, q in enumerate(questions):
-            print(f"DEBUG: Creating task {i+1} for question: {q.get('id', 'NO_ID')}")
-            task = Task(
-                description=f"Use the compile_teardown_rag tool to answer this specific question about {job.company_name}: {q['title']}. Question ID: {q['id']}. Instruction: {q['instruction']}",
-                expected_output=f"A comprehensive answer to question '{q['title']}' saved to the teardown file.",
-                agent=teardown_agent,
-                inputs={
-                    "company_name": job.company_name,
-                    "output_folder": output_folder,  # <-- Job-specific folder
-                    "question_id": q["id"]
-                }
-            )
-            teardown_tasks_individual.append(task)
-
-        print(f"DEBUG: Created {len(teardown_tasks_individual)} teardown tasks")
-        
-        # Create and run crew with job-specific tasks
-        all_tasks = [
-            dynamic_companynews_task, 
-            dynamic_spacenews_task, 
-            dynamic_government_contract_task,
-            dynamic_globalnewswire_task,
-            dynamic_serpapi_task  # Use the dynamic version
-        ] + teardown_tasks_individual
-        
-        crew = Crew(
-            agents=[companynews_agent, spacenews_agent, contract_agent, globalnewswire_agent, serpapi_agent, teardown_agent],
-            tasks=all_tasks,
-            verbose=True
-        )
-        
-        # Run crew with job-specific inputs
-        inputs = {
-            "company_name": job.company_name,
-            "company_url": job.company_url,
-            "output_folder": output_folder,  # <-- Pass job-specific folder to all tasks
-        }
-        
-        print(f"🚀 Starting crew with {len(all_tasks)} tasks")
-        print(f"📁 All tasks will use folder: {output_folder}")
-        result = crew.kickoff(inputs=inputs)
-        
-        # === ADD DEBUGGING HERE ===
-        print("=" * 50)
-        print("DEBUG: CREW RESULT")
-        print("=" * 50)
-        print(f"Crew result type: {type(result)}")
-        print(f"Crew result: {result}")
-        print("=" * 50)
-        
-        # Check what files are in the output folder
-        print(f"Files in output folder {output_folder}:")
-        if os.path.exists(output_folder):
-            for file in os.listdir(output_folder):
-                file_path = os.path.join(output_folder, file)
-                file_size = os.path.getsize(file_path) if os.path.isfile(file_path) else 0
-                print(f"  - {file} ({file_size} bytes)")
-                
-                # If it's the teardown file, show its content
-                if file.endswith("_teardown.md"):
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        print(f"    Content preview: {content[:200]}...")
-        else:
-            print("  Output folder doesn't exist!")
-        
-        print("=" * 50)
-        
-        # Read the complete teardown file
-        safe_name = sanitize_filename(job.company_name)
-        teardown_path = os.path.join(output_folder, f"{safe_name}_teardown.md")
-        
-        if os.path.exists(teardown_path):
-            with open(teardown_path, 'r', encoding='utf-8') as f:
-                teardown_content = f.read()
-                print(f"DEBUG: Teardown file exists, content length: {len(teardown_content)}")
-                print(f"DEBUG: First 500 characters:\n{teardown_content[:500]}")
-        else:
-            teardown_content = f"# Company Teardown: {job.company_name}\n\nTeardown file not generated properly."
-            print(f"DEBUG: Teardown file does not exist at {teardown_path}")
-        
-        print(f"✅ Teardown completed. File size: {len(teardown_content)} characters")
-        
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-        # Read the complete teardown file
-        safe_name = sanitize_filename(job.company_name)
-        teardown_path = os.path.join(output_folder, f"{safe_name}_teardown.md")
-        
-        if os.path.exists(teardown_path):
-            with open(teardown_path, 'r', encoding='utf-8') as f:
-                teardown_content = f.read()
-        else:
-            teardown_content = f"# Company Teardown: {job.company_name}\n\nTeardown file not generated properly."
-        
-        print(f"✅ Teardown completed. File size: {len(teardown_content)} characters")
-        
-        # Create teardown record
-        teardown = Teardown(
-            id=generate_unique_id(),
-            job_id=job.id,
-            company_name=job.company_name,
-            company_url=job.company_url,
-            content=teardown_content,
-            created_at=datetime.now(),
-            file_path=teardown_path
+def record_request_metrics(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        API_REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            endpoint=request.endpoint or 'unknown',
+            method=request.method,
+            status=str(response.status_code)
         )
-        
-        db.create_teardown(teardown)
-        
-        # Update job status to completed
-        job.status = JobStatus.COMPLETED
-        job.completed_at = datetime.now()
-        db.update_job(job)
-        
-        print(f"✅ Teardown completed for {job.company_name}")
-            
-    except Exception as e:
-        # Update job status to failed
-        job.status = JobStatus.FAILED
-        job.completed_at = datetime.now()
-        job.error_message = str(e)
-        db.update_job(job)
-        
-        print(f"❌ Teardown failed for {job.company_name}: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    finally:
-        # Clean up from active jobs
-        if job.id in active_jobs:
-            del active_jobs[job.id]
+    return response
+
+def metrics():
+    """Prometheus text-format metrics"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def create_app() -> Flask:
+    """Application factory used by `python app.py` and by wsgi.py under gunicorn"""
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    app.before_request(start_request_timer)
+    app.after_request(record_request_metrics)
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return app
 
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/teardowns')
+@bp.route('/teardowns')
 def teardowns_page():
     teardowns = db.get_all_teardowns()
     return render_template('teardowns.html', teardowns=teardowns)
 
-@app.route('/api/start_teardown', methods=['POST'])
+@bp.route('/api/start_teardown', methods=['POST'])
 def start_teardown():
     data = request.json
     # Check if the data is properly parsed as a dictionary
@@ -301,13 +154,7 @@ def start_teardown():
     
     db.create_job(job)
     
-    # Start background thread
-    thread = threading.Thread(target=run_single_teardown, args=(job,))
-    thread.daemon = True
-    thread.start()
-    
-    # Store active job reference
-    active_jobs[job.id] = thread
+    submit_job(job)
     
     return jsonify({
         'job_id': job.id,
@@ -315,7 +162,121 @@ def start_teardown():
         'message': f'Teardown analysis started for {company_name}'
     })
 
-@app.route('/api/job_status/<job_id>')
+@bp.route('/api/contracts/prefetch', methods=['POST'])
+def prefetch_contracts():
+    """Warm the USAspending cache for a batch of companies, a few concurrent searches at a time"""
+    data = request.json
+    if not isinstance(data, dict) or not isinstance(data.get('companies'), list):
+        return jsonify({'error': 'Expected a JSON object with a companies list'}), 400
+    
+    names = list(dict.fromkeys(str(name).strip() for name in data['companies'] if str(name).strip()))
+    if not names:
+        return jsonify({'error': 'No company names given'}), 400
+    
+    with _prefetching_lock:
+        queued = [name for name in names if name not in _prefetching]
+        _prefetching.update(queued)
+    
+    def prefetch():
+        from usaspending_client import get_usaspending_client
+        try:
+            found = get_usaspending_client().fetch_awards_bulk(queued)
+            print(f"📄 Prefetched contracts for {len(found)}/{len(queued)} companies")
+        except Exception as e:
+            print(f"⚠️ Contract prefetch failed: {e}")
+        finally:
+            with _prefetching_lock:
+                _prefetching.difference_update(queued)
+    
+    if queued:
+        _prefetch_pool.submit(prefetch)
+    return jsonify({'status': 'started', 'companies': len(names), 'queued': len(queued)}), 202
+
+def collect_job_statuses(job_ids, include_content: bool = False):
+    """Status records for several jobs from one IN query, plus their teardowns if completed"""
+    jobs = {job.id: job for job in db.get_jobs(job_ids)}
+    completed = [job_id for job_id, job in jobs.items() if job.status == JobStatus.COMPLETED]
+    teardowns = db.get_teardowns_by_jobs(completed, load_content=include_content) if completed else {}
+    
+    records = {}
+    for job_id, job in jobs.items():
+        record = job.to_status_dict()
+        teardown = teardowns.get(job_id)
+        if teardown:
+            record['teardown_id'] = teardown.id
+            if include_content:
+                record['teardown'] = teardown.to_dict()
+        records[job_id] = record
+    return records
+
+@bp.route('/api/job_status', methods=['GET', 'POST'])
+def job_statuses():
+    """
+    Status of many jobs in one request.
+    
+    GET ?ids=a,b,c or POST {"ids": [...]}. Records are compact; include_content adds each completed
+    job's teardown. With wait=<seconds> the request is held until some job's status differs from
+    `known` (POST, {id: status}) or from its status when the request arrived, or the wait runs out.
+    When MAX_STATUS_WAITERS requests are already held, it answers at once with retry_after.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids') or []
+        known = data.get('known') or {}
+        include_content = bool(data.get('include_content'))
+        wait = data.get('wait', 0)
+    else:
+        ids = [i for i in request.args.get('ids', '').split(',') if i]
+        known = {}
+        include_content = request.args.get('include_content', '').lower() in ('1', 'true', 'yes')
+        wait = request.args.get('wait', 0)
+    
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) for i in ids):
+        return jsonify({'error': 'ids is required'}), 400
+    if len(ids) > MAX_STATUS_IDS:
+        return jsonify({'error': f'At most {MAX_STATUS_IDS} ids per request'}), 400
+    if not isinstance(known, dict):
+        return jsonify({'error': 'known must map job IDs to statuses'}), 400
+    try:
+        wait = min(MAX_STATUS_WAIT_SECONDS, max(0.0, float(wait)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    
+    ids = list(dict.fromkeys(ids))
+    # Read the version first, so a change landing while the statuses are collected still wakes the wait
+    version = db.get_jobs_version()
+    records = collect_job_statuses(ids, include_content)
+    baseline = {job_id: known.get(job_id, record['status']) for job_id, record in records.items()}
+    changed = any(record['status'] != baseline[job_id] for job_id, record in records.items())
+    
+    retry_after = None
+    if not changed and wait > 0:
+        if _status_waiters.acquire(blocking=False):
+            try:
+                deadline = time.time() + wait
+                while not changed and time.time() < deadline:
+                    current = db.wait_for_job_change(version, deadline - time.time())
+                    if current == version:
+                        break
+                    # Some job changed status; re-read ours only now
+                    version = current
+                    records = collect_job_statuses(ids, include_content)
+                    changed = any(record['status'] != baseline.get(job_id) for job_id, record in records.items())
+            finally:
+                _status_waiters.release()
+        else:
+            retry_after = STATUS_RETRY_AFTER_SECONDS
+    
+    response = {
+        'jobs': records,
+        'missing': [job_id for job_id in ids if job_id not in records],
+        'changed': changed
+    }
+    if retry_after is not None:
+        response['retry_after'] = retry_after
+    return jsonify(response)
+
+@bp.route('/api/job_status/<job_id>')
 def job_status(job_id):
     job = db.get_job(job_id)
     if not job:
@@ -331,39 +292,139 @@ def job_status(job_id):
     
     return jsonify(response)
 
-@app.route('/api/teardowns')
+@bp.route('/api/job_preview/<job_id>')
+def job_preview(job_id):
+    """Live markdown preview built from the answers stored so far"""
+    job = db.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job.output_folder:
+        return jsonify({'job_id': job_id, 'status': job.status.value, 'content': ''})
+    
+    questions = get_templates().questions
+    
+    store = AnswerStore(job.output_folder, job.company_name)
+    answers = store.load()
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': job.status.value,
+        'answered': len(answers),
+        'total_questions': len(questions),
+        'content': store.render_markdown(questions, answers)
+    })
+
+def parse_teardowns_cursor(cursor: str, epoch: str) -> Optional[int]:
+    """Version encoded in a '<epoch>:<version>' cursor, or None if it is from another epoch or malformed"""
+    cursor_epoch, _, version = cursor.partition(':')
+    if cursor_epoch != epoch or not version.isdigit():
+        return None
+    return int(version)
+
+@bp.route('/api/teardowns')
 def get_teardowns():
-    teardowns = db.get_all_teardowns()
-    return jsonify([teardown.to_dict() for teardown in teardowns])
+    """
+    Teardown list (without bodies). With ?since=<cursor> only teardowns added after the cursor are
+    returned, plus the next cursor; reset=true means the client must replace its list. The strong
+    ETag tracks the table version, so an unchanged poll with If-None-Match gets a bodiless 304.
+    """
+    epoch, version = db.get_teardowns_version()
+    etag = f"teardowns-{epoch}-{version}"
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    
+    since = request.args.get('since')
+    if since is None:
+        response = jsonify([teardown.to_dict() for teardown in db.get_all_teardowns()])
+    else:
+        since_version = parse_teardowns_cursor(since, epoch)
+        reset = since_version is None or since_version > version
+        teardowns = db.get_teardowns_since(0 if reset else since_version)
+        # A teardown inserted after the version read is included now, so move the cursor past it
+        latest = max([version] + [t.seq or 0 for t in teardowns])
+        response = jsonify({
+            'cursor': f"{epoch}:{latest}",
+            'reset': reset,
+            'teardowns': [teardown.to_dict() for teardown in teardowns]
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
-@app.route('/api/teardown/<teardown_id>')
-def get_teardown(teardown_id):
+@bp.route('/api/search')
+def search():
+    """Full-text search over teardown sections and scraped sources"""
+    query = request.args.get('q', '').strip()
+    scope = request.args.get('scope', 'all')
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    if scope not in SCOPES:
+        return jsonify({'error': f'scope must be one of: {", ".join(SCOPES)}'}), 400
+    
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    
+    return jsonify(search_index.search(query, scope=scope, page=page, per_page=per_page))
+
+def load_teardown(teardown_id):
+    """(teardown with content, None) or (None, error response) when it is missing or its blob can't be read"""
     teardown = db.get_teardown(teardown_id)
     if not teardown:
-        return jsonify({'error': 'Teardown not found'}), 404
+        return None, (jsonify({'error': 'Teardown not found'}), 404)
+    if teardown.content is None:
+        return None, (jsonify({'error': 'Teardown content could not be loaded'}), 500)
+    return teardown, None
+
+@bp.route('/api/teardown/<teardown_id>')
+def get_teardown(teardown_id):
+    teardown, error = load_teardown(teardown_id)
+    if error:
+        return error
     return jsonify(teardown.to_dict())
 
-@app.route('/api/teardown/<teardown_id>/download')
+@bp.route('/api/teardown/<teardown_id>/download')
 def download_teardown(teardown_id):
-    teardown = db.get_teardown(teardown_id)
-    if not teardown:
-        return jsonify({'error': 'Teardown not found'}), 404
-    
-    # Create a temporary file for download
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(teardown.content)
-        temp_path = f.name
+    teardown, error = load_teardown(teardown_id)
+    if error:
+        return error
     
+    # Served straight from the blob store's copy
     filename = f"{teardown.company_name.replace(' ', '_').lower()}_teardown.md"
-    return send_file(temp_path, as_attachment=True, download_name=filename)
+    return send_file(io.BytesIO(teardown.content.encode('utf-8')), as_attachment=True,
+                     download_name=filename, mimetype='text/markdown')
 
-@app.route('/api/jobs')
+@bp.route('/api/jobs')
 def get_jobs():
     """Get all jobs for monitoring"""
     jobs = db.get_all_jobs()
     return jsonify([job.to_dict() for job in jobs])
 
-@app.route('/api/teardown/<teardown_id>/download_pdf')
+@bp.route('/api/jobs/<job_id>/trace')
+def get_job_trace(job_id):
+    """Per-stage spans and timing summary for a job"""
+    job = db.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    spans = load_trace(job.output_folder) if job.output_folder else []
+    return jsonify({
+        'job_id': job_id,
+        'status': job.status.value,
+        'summary': summarize_trace(spans),
+        'spans': spans
+    })
+
+@bp.route('/api/llm_governor')
+def llm_governor_state():
+    """Queue, concurrency and rate-limit window of this process's LLM governor"""
+    return jsonify(get_governor().snapshot())
+
+@bp.route('/api/teardown/<teardown_id>/download_pdf')
 def download_teardown_pdf(teardown_id):
     print(f"PDF download requested for teardown: {teardown_id}")
     
@@ -372,10 +433,16 @@ def download_teardown_pdf(teardown_id):
         return jsonify({'error': 'PDF generation not available. Please install reportlab.'}), 500
     
     # Get teardown from database
-    teardown = db.get_teardown(teardown_id)
-    if not teardown:
-        print(f"Teardown not found: {teardown_id}")
-        return jsonify({'error': 'Teardown not found'}), 404
+    teardown, error = load_teardown(teardown_id)
+    if error:
+        print(f"Teardown not available: {teardown_id}")
+        return error
+    
+    #pdf download imports
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.colors import HexColor
     
     print(f"Found teardown for: {teardown.company_name}")
     
@@ -550,4 +617,7 @@ if __name__ == '__main__':
     print("📱 Open your browser to: http://localhost:8080")
     print("⚡ UI-controlled batch processing")
     
-    app.run(debug=True, host='0.0.0.0', port=8080)
\ No newline at end of file
+    # The reloader re-imports this module in a child process, which would start every job twice.
+    # Use gunicorn (see gunicorn.conf.py) for anything beyond local development.
+    debug = os.environ.get("FLASK_DEBUG", "0") == "1"
+    create_app().run(debug=debug, use_reloader=False, host='0.0.0.0', port=8080)
@@ -0,0 +1,347 @@
+"""
+Load test for the Flask API against a stubbed pipeline.
+
+Starts app.py in-process on a threaded WSGI server with job submission replaced by a
+simulated job (like app_demo.py), seeds completed teardowns, then drives the API at fixed
+open-loop rates per endpoint:
+
+    POST /api/start_teardown, GET /api/job_status/<id>, GET /api/teardowns,
+    GET /api/teardown/<id>/download_pdf, GET /api/jobs
+
+and reports throughput, latency percentiles, SQLite operation latency and lock errors.
+
+    python -m benchmarks.api_load --duration 30 --status-rps 50 --list-rps 5
+    python -m benchmarks.api_load --json > baseline.json
+    python -m benchmarks.api_load --baseline baseline.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+SIMULATED_TEARDOWN = """# Company Teardown: {company}
+
+## the_company_name
+{company}
+
+## company_description
+{company} builds radiation-tolerant solar arrays for small satellites.
+
+## industry
+- Space hardware
+- Power systems
+
+## key_decision_makers
+- Jane Doe - CEO
+- John Roe - CFO
+
+## gov_contracts
+- AFWERX SBIR Phase II - $1,250,000
+- NASA SBIR Phase I - $150,000
+"""
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class StubbedApp:
+    """Imports app.py inside a scratch directory with the crew pipeline replaced by a timed simulation"""
+
+    def __init__(self, job_seconds: float):
+        self.job_seconds = job_seconds
+        self.work_dir = tempfile.mkdtemp(prefix="teardown_load_")
+        self.server = None
+        self.thread = None
+        self.module = None
+
+    def start(self, port: int = 0) -> str:
+        import logging
+        from werkzeug.serving import make_server
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+        # app.py uses cwd-relative paths for its database, blobs and output folders
+        os.chdir(self.work_dir)
+        shutil.copytree(os.path.join(REPO_ROOT, "template"), os.path.join(self.work_dir, "template"))
+        with contextlib.redirect_stdout(sys.stderr):
+            import app as app_module
+        self.module = app_module
+        app_module.submit_job = lambda job: threading.Thread(
+            target=self._simulated_teardown, args=(job,), daemon=True).start()
+
+        self.server = make_server("127.0.0.1", port, app_module.create_app(), threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def _simulated_teardown(self, job):
+        app_module = self.module
+        db = app_module.db
+        try:
+            job.status = app_module.JobStatus.RUNNING
+            job.started_at = datetime.now()
+            job.output_folder = app_module.create_job_folders(job.id)
+            db.update_job(job)
+
+            time.sleep(self.job_seconds)
+
+            content = SIMULATED_TEARDOWN.format(company=job.company_name)
+            db.create_teardown(app_module.Teardown(
+                id=app_module.generate_unique_id(),
+                job_id=job.id,
+                company_name=job.company_name,
+                company_url=job.company_url,
+                content=content,
+                created_at=datetime.now()
+            ))
+            job.status = app_module.JobStatus.COMPLETED
+        except Exception as e:
+            job.status = app_module.JobStatus.FAILED
+            job.error_message = str(e)
+        finally:
+            job.completed_at = datetime.now()
+            db.update_job(job)
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class LoadRunner:
+    """Open-loop load generator: each endpoint fires at its own fixed rate regardless of latency"""
+
+    def __init__(self, base_url: str, rates: Dict[str, float], duration: float, workers: int):
+        self.base_url = base_url.rstrip("/")
+        self.rates = {name: rps for name, rps in rates.items() if rps > 0}
+        self.duration = duration
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {name: [] for name in self.rates}
+        self.errors: Dict[str, int] = {name: 0 for name in self.rates}
+        self.job_ids: List[str] = []
+        self.teardown_ids: List[str] = []
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def seed(self, teardowns: int):
+        """Submit jobs up front so list, status and PDF endpoints have data"""
+        for i in range(teardowns):
+            response = self._session().post(f"{self.base_url}/api/start_teardown", json={
+                "company_name": f"Seed Company {i}", "company_url": f"https://seed-{i}.example.com"
+            })
+            self.job_ids.append(response.json()["job_id"])
+
+    def wait_for_seed(self, timeout: float = 120.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            teardowns = self._session().get(f"{self.base_url}/api/teardowns").json()
+            if len(teardowns) >= len(self.job_ids):
+                self.teardown_ids = [t["id"] for t in teardowns]
+                return
+            time.sleep(0.2)
+        raise RuntimeError("Seed teardowns did not complete in time")
+
+    def load_existing(self):
+        """Use the jobs and teardowns already on a running server instead of seeding"""
+        self.job_ids = [j["id"] for j in self._session().get(f"{self.base_url}/api/jobs").json()]
+        self.teardown_ids = [t["id"] for t in self._session().get(f"{self.base_url}/api/teardowns").json()]
+        if not self.job_ids or not self.teardown_ids:
+            raise RuntimeError("Target server needs at least one job and one teardown")
+
+    def _request(self, name: str):
+        session = self._session()
+        start = time.perf_counter()
+        ok = False
+        try:
+            if name == "start_teardown":
+                n = random.randint(0, 1_000_000)
+                response = session.post(f"{self.base_url}/api/start_teardown", json={
+                    "company_name": f"Load Company {n}", "company_url": f"https://load-{n}.example.com"
+                })
+                if response.ok:
+                    with self.lock:
+                        self.job_ids.append(response.json()["job_id"])
+            elif name == "job_status":
+                response = session.get(f"{self.base_url}/api/job_status/{random.choice(self.job_ids)}")
+            elif name == "teardowns":
+                response = session.get(f"{self.base_url}/api/teardowns")
+            elif name == "download_pdf":
+                response = session.get(f"{self.base_url}/api/teardown/{random.choice(self.teardown_ids)}/download_pdf")
+            elif name == "jobs":
+                response = session.get(f"{self.base_url}/api/jobs")
+            else:
+                raise ValueError(f"Unknown endpoint {name}")
+            response.content  # drain the body so latency includes transfer
+            ok = response.ok
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.samples[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+    def run(self) -> Dict:
+        start = time.perf_counter()
+        next_fire = {name: start for name in self.rates}
+        futures = []
+
+        while True:
+            now = time.perf_counter()
+            if now - start >= self.duration:
+                break
+            for name, rps in self.rates.items():
+                while next_fire[name] <= now:
+                    futures.append(self.pool.submit(self._request, name))
+                    next_fire[name] += 1.0 / rps
+            time.sleep(max(0.0, min(next_fire.values()) - time.perf_counter()))
+
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        self.pool.shutdown()
+
+        endpoints = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            endpoints[name] = {
+                "target_rps": self.rates[name],
+                "requests": len(ordered),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 2) if ordered else None,
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 2) if ordered else None,
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 2) if ordered else None,
+                "max_ms": round(ordered[-1] * 1000, 2) if ordered else None
+            }
+        return {"duration_s": round(elapsed, 2), "endpoints": endpoints}
+
+
+def database_stats() -> Dict:
+    """SQLite latency and lock errors from the in-process metrics registry"""
+    from metrics import DB_QUERY_DURATION, DB_LOCK_ERRORS
+
+    stats = {}
+    for key, state in list(DB_QUERY_DURATION._values.items()):
+        operation = key[0]
+        stats[operation] = {
+            "count": state[-1],
+            "mean_ms": round(state[-2] / state[-1] * 1000, 3) if state[-1] else None,
+            "p95_ms_bucket": round(DB_QUERY_DURATION.quantile(0.95, operation=operation) * 1000, 3),
+            "lock_errors": DB_LOCK_ERRORS.value(operation=operation)
+        }
+    return stats
+
+
+def compare(report: Dict, baseline: Dict):
+    print()
+    print(f"{'endpoint':<16}{'p95 ms':>10}{'baseline':>10}{'change':>9}{'rps':>8}{'baseline':>10}")
+    for name, entry in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base or not base.get("p95_ms") or entry["p95_ms"] is None:
+            continue
+        change = (entry["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        print(f"{name:<16}{entry['p95_ms']:>10.1f}{base['p95_ms']:>10.1f}{change:>+8.0f}%"
+              f"{entry['throughput_rps']:>8.1f}{base['throughput_rps']:>10.1f}")
+
+
+def print_report(report: Dict):
+    print(f"Duration: {report['duration_s']}s  simulated job time: {report['job_seconds']}s")
+    print()
+    print(f"{'endpoint':<16}{'target':>8}{'rps':>8}{'reqs':>7}{'errs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, e in report["endpoints"].items():
+        print(f"{name:<16}{e['target_rps']:>8.1f}{e['throughput_rps']:>8.1f}{e['requests']:>7}{e['errors']:>6}"
+              f"{e['p50_ms'] or 0:>9.1f}{e['p95_ms'] or 0:>9.1f}{e['p99_ms'] or 0:>9.1f}{e['max_ms'] or 0:>9.1f}")
+    if report.get("database"):
+        print()
+        print(f"{'sqlite operation':<24}{'count':>8}{'mean ms':>10}{'p95 ms':>10}{'locked':>8}")
+        for operation, s in sorted(report["database"].items()):
+            print(f"{operation:<24}{s['count']:>8}{s['mean_ms'] or 0:>10.3f}{s['p95_ms_bucket']:>10.3f}{s['lock_errors']:>8.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the teardown API against a stubbed pipeline")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--start-rps", type=float, default=0.5, help="POST /api/start_teardown per second")
+    parser.add_argument("--status-rps", type=float, default=20.0, help="GET /api/job_status/<id> per second")
+    parser.add_argument("--list-rps", type=float, default=2.0, help="GET /api/teardowns per second")
+    parser.add_argument("--pdf-rps", type=float, default=0.5, help="GET /api/teardown/<id>/download_pdf per second")
+    parser.add_argument("--jobs-rps", type=float, default=1.0, help="GET /api/jobs per second")
+    parser.add_argument("--job-seconds", type=float, default=5.0, help="duration of each simulated teardown")
+    parser.add_argument("--seed-teardowns", type=int, default=20, help="completed teardowns created before the run")
+    parser.add_argument("--workers", type=int, default=32, help="client threads")
+    parser.add_argument("--target", help="load an already running server (its real pipeline!) instead of the in-process stub")
+    parser.add_argument("--baseline", help="JSON report from an earlier run to compare against")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    rates = {
+        "start_teardown": args.start_rps,
+        "job_status": args.status_rps,
+        "teardowns": args.list_rps,
+        "download_pdf": args.pdf_rps,
+        "jobs": args.jobs_rps
+    }
+
+    stub = None
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.target:
+            base_url = args.target
+        else:
+            stub = StubbedApp(job_seconds=args.job_seconds)
+            base_url = stub.start()
+            # Seed jobs finish quickly; the job time setting applies to jobs started under load
+            stub.job_seconds, job_seconds = 0.05, args.job_seconds
+
+        try:
+            runner = LoadRunner(base_url, rates, args.duration, args.workers)
+            if stub:
+                runner.seed(args.seed_teardowns)
+                runner.wait_for_seed()
+                stub.job_seconds = job_seconds
+            else:
+                runner.load_existing()
+            report = runner.run()
+            report["job_seconds"] = args.job_seconds if stub else None
+            report["database"] = database_stats() if stub else None
+        finally:
+            if stub:
+                stub.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
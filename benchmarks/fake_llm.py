@@ -0,0 +1,99 @@
+"""
+Deterministic stand-in for the chat model used by RAGTeardownCompiler.
+
+It answers instantly (plus configurable latency) with text derived from a hash of the prompt,
+and reports token usage the same way the OpenAI client does, so tracing and metrics see
+realistic call and token counts. With tpm_limit/rpm_limit it also behaves like a rate-limited
+provider, answering calls over the limit with a 429 error. Map prompts that ask for a CONFIDENCE
+line get one, also derived from the prompt hash, so early exit from the map loop is exercised.
+"""
+import time
+import hashlib
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like the OpenAI client's RateLimitError as far as the LLM governor is concerned"""
+    status_code = 429
+
+
+@dataclass
+class FakeMessage:
+    content: str
+    usage_metadata: Dict[str, int] = field(default_factory=dict)
+    response_metadata: Dict = field(default_factory=dict)
+
+
+class FakeChatModel:
+    """
+    latency_ms is paid on every call; ms_per_1k_tokens adds time proportional to prompt size
+    to mimic how real models slow down with larger map chunks. tpm_limit and rpm_limit (0 = none)
+    are enforced over a rolling window_s, like a provider's per-minute limits.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, ms_per_1k_tokens: float = 0.0, model: str = "fake-chat",
+                 tpm_limit: int = 0, rpm_limit: int = 0, window_s: float = 60.0):
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.model = model
+        self.tpm_limit = tpm_limit
+        self.rpm_limit = rpm_limit
+        self.window_s = window_s
+        self.calls = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._window = deque()  # (accepted_at, tokens)
+        self._lock = threading.Lock()
+
+    def _check_rate_limit(self, tokens: int):
+        if not (self.tpm_limit or self.rpm_limit):
+            return
+        now = time.monotonic()
+        with self._lock:
+            while self._window and self._window[0][0] <= now - self.window_s:
+                self._window.popleft()
+            used = sum(t for _, t in self._window)
+            if (self.rpm_limit and len(self._window) >= self.rpm_limit) or (self.tpm_limit and used + tokens > self.tpm_limit):
+                self.rate_limited += 1
+                raise FakeRateLimitError("Error code: 429 - rate limit reached")
+            self._window.append((now, tokens))
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return max(1, len(text) // 4)
+
+    def invoke(self, prompt) -> FakeMessage:
+        text = prompt if isinstance(prompt, str) else str(prompt)
+        prompt_tokens = self._estimate_tokens(text)
+        self._check_rate_limit(prompt_tokens)
+
+        delay_ms = self.latency_ms + self.ms_per_1k_tokens * prompt_tokens / 1000.0
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        content = (
+            f"- Finding {digest[:4]}: offline benchmark answer derived from the supplied company data.\n"
+            f"- Finding {digest[4:8]}: deterministic for prompt {digest}."
+        )
+        if "CONFIDENCE: <0-100>" in text:
+            content += f"\nCONFIDENCE: {int(digest[8:12], 16) % 101}"
+        completion_tokens = self._estimate_tokens(content)
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        return FakeMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        )
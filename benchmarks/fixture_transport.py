@@ -0,0 +1,124 @@
+"""
+Replays recorded responses for every outbound HTTP call made through `requests`.
+
+All requests Sessions (including the ones `requests.get`/`requests.post` and the SerpAPI client
+create internally) resolve their adapter through Session.get_adapter, so patching that one method
+routes the scrapers to local fixtures without touching tool code.
+"""
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Hosts served by the news-article fixture (SerpAPI organic result links)
+NEWS_HOSTS = ("techcrunch.com", "www.crunchbase.com", "crunchbase.com", "venturebeat.com")
+# Company-site fixtures with absolute URLs; "{site}" is replaced with the requested scheme and host
+SITE_FIXTURES = ("company_robots.txt", "company_sitemap.xml")
+
+
+class FixtureAdapter(BaseAdapter):
+    """
+    requests transport adapter that answers from benchmarks/fixtures.
+
+    latency_ms is added to every response to model network time. Scenario "rate_limited"
+    makes SpaceNews answer 429 with the recorded rate-limit page.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, scenario: str = "default"):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.scenario = scenario
+        self.request_count = 0
+        self.bytes_served = 0
+        self._cache: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def _fixture(self, name: str) -> bytes:
+        if name not in self._cache:
+            with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+                self._cache[name] = f.read()
+        return self._cache[name]
+
+    def route(self, method: str, url: str):
+        """Return (status_code, fixture_name, content_type) for a request"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        path = parsed.path or "/"
+
+        if host.endswith("spacenews.com"):
+            if self.scenario == "rate_limited":
+                return 429, "spacenews_429.html", "text/html"
+            if parsed.query.startswith("s=") or "s=" in parsed.query:
+                return 200, "spacenews_search.html", "text/html"
+            return 200, "spacenews_article.html", "text/html"
+        if host.endswith("globenewswire.com"):
+            if path.lower().startswith("/search"):
+                return 200, "globenewswire_search.html", "text/html"
+            return 200, "globenewswire_article.html", "text/html"
+        if host == "api.usaspending.gov":
+            if "count" in path:
+                return 200, "usaspending_count.json", "application/json"
+            return 200, "usaspending_awards.json", "application/json"
+        if host == "serpapi.com":
+            return 200, "serpapi_results.json", "application/json"
+        if host in NEWS_HOSTS:
+            return 200, "news_article.html", "text/html"
+        # Anything else is treated as the company's own website
+        if path == "/robots.txt":
+            return 200, "company_robots.txt", "text/plain"
+        if path == "/sitemap.xml":
+            return 200, "company_sitemap.xml", "application/xml"
+        if path in ("", "/"):
+            return 200, "company_home.html", "text/html"
+        return 200, "company_page.html", "text/html"
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status_code, fixture_name, content_type = self.route(request.method, request.url)
+        body = self._fixture(fixture_name)
+        if fixture_name in SITE_FIXTURES:
+            parsed = urlparse(request.url)
+            body = body.replace(b"{site}", f"{parsed.scheme}://{parsed.netloc}".encode("utf-8"))
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        with self._lock:
+            self.request_count += 1
+            self.bytes_served += len(body)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = "OK" if status_code == 200 else "Too Many Requests"
+        response.headers = CaseInsensitiveDict({
+            "Content-Type": f"{content_type}; charset=utf-8",
+            "Content-Length": str(len(body))
+        })
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def replay_http(latency_ms: float = 0.0, scenario: str = "default", adapter: Optional[FixtureAdapter] = None):
+    """Route all requests-based HTTP traffic to fixtures for the duration of the block"""
+    adapter = adapter or FixtureAdapter(latency_ms=latency_ms, scenario=scenario)
+    original_get_adapter = requests.Session.get_adapter
+    requests.Session.get_adapter = lambda self, url: adapter
+    try:
+        yield adapter
+    finally:
+        requests.Session.get_adapter = original_get_adapter
@@ -0,0 +1,144 @@
+"""
+Import-time budget check for the entry points.
+
+Imports each module in a fresh interpreter under `python -X importtime`, reports its cumulative
+import time and heaviest dependencies, and fails if a module is over budget or pulls in a heavy
+package (crewAI, LangChain, ReportLab) that should only load on first use.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --scale 2 --json
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> budget in milliseconds (cumulative import time on a warm bytecode cache)
+BUDGETS_MS = {
+    "app": 600,
+    "wsgi": 600,
+    "worker": 300,
+    "job_runner": 300,
+    "pipeline": 300,
+    "src.agents.agent": 50,
+    "tasks.teardown_task": 50,
+}
+
+# Packages the web tier and worker startup must not import eagerly
+LAZY_PACKAGES = ("crewai", "langchain", "langchain_core", "langchain_community", "langchain_openai", "reportlab", "openai")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse `-X importtime` output into [{name, self_us, cumulative_us, depth}]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, raw_name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        stripped = raw_name.lstrip()
+        entries.append({
+            "name": stripped,
+            "self_us": int(self_us.strip()),
+            "cumulative_us": int(cumulative_us.strip()),
+            "depth": (len(raw_name) - len(stripped) - 1) // 2
+        })
+    return entries
+
+
+def measure(module: str, work_dir: str) -> Dict:
+    """Import module in a fresh interpreter and return its cumulative time and eager heavy imports"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    # Warm the bytecode cache so compilation isn't counted as import time
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=work_dir, env=env,
+                   capture_output=True, text=True)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=work_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"module": module, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"}
+
+    entries = parse_importtime(result.stderr)
+    top_index = next((i for i, e in enumerate(entries) if e["name"] == module and e["depth"] == 0), None)
+    top = entries[top_index] if top_index is not None else None
+    # importtime lists children before their parent: walk back to the previous top-level import
+    children = []
+    for entry in reversed(entries[:top_index or 0]):
+        if entry["depth"] == 0:
+            break
+        if entry["depth"] == 1:
+            children.append(entry)
+    direct_deps = sorted(children, key=lambda e: -e["cumulative_us"])
+    eager = sorted({e["name"].split(".")[0] for e in entries if e["name"].split(".")[0] in LAZY_PACKAGES})
+    return {
+        "module": module,
+        "cumulative_ms": round(top["cumulative_us"] / 1000.0, 1) if top else None,
+        "heaviest": [(e["name"], round(e["cumulative_us"] / 1000.0, 1)) for e in direct_deps[:5]],
+        "eager_heavy_imports": eager
+    }
+
+
+def run_check(modules: List[str], scale: float = 1.0) -> Dict:
+    # app.py creates its database and folders in the working directory, so import from a scratch one
+    work_dir = tempfile.mkdtemp(prefix="teardown_imports_")
+    try:
+        shutil.copytree(os.path.join(REPO_ROOT, "template"), os.path.join(work_dir, "template"))
+        results = [measure(module, work_dir) for module in modules]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failures = []
+    for result in results:
+        budget = BUDGETS_MS.get(result["module"], 0) * scale
+        result["budget_ms"] = budget
+        if "error" in result:
+            failures.append(f"{result['module']}: {result['error']}")
+            continue
+        if budget and (result["cumulative_ms"] or 0) > budget:
+            failures.append(f"{result['module']}: {result['cumulative_ms']}ms over budget of {budget:.0f}ms")
+        if result["eager_heavy_imports"]:
+            failures.append(f"{result['module']}: eagerly imports {', '.join(result['eager_heavy_imports'])}")
+    return {"results": results, "failures": failures}
+
+
+def print_report(report: Dict):
+    print(f"{'module':<24}{'import ms':>12}{'budget ms':>12}  heaviest dependencies")
+    for result in report["results"]:
+        if "error" in result:
+            print(f"{result['module']:<24}{'error':>12}{result['budget_ms']:>12.0f}  {result['error']}")
+            continue
+        heaviest = ", ".join(f"{name} {ms}" for name, ms in result["heaviest"][:3])
+        print(f"{result['module']:<24}{result['cumulative_ms']:>12.1f}{result['budget_ms']:>12.0f}  {heaviest}")
+    print()
+    if report["failures"]:
+        print("FAILED")
+        for failure in report["failures"]:
+            print(f"  - {failure}")
+    else:
+        print("All modules within their import budget")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check entry-point import times against budgets")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS), help="modules to check (default: all budgeted)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. for slow CI machines")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_check(args.modules, scale=args.scale)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
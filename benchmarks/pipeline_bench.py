@@ -0,0 +1,280 @@
+"""
+Offline end-to-end benchmark for the teardown pipeline.
+
+Runs every scraper against recorded fixtures and answers every question with a fake chat model,
+for N companies at concurrency K, then reports per-stage and end-to-end wall time plus LLM call
+and token counts. No OpenAI or SerpAPI quota is used. See --help for the scheduler, time budget,
+rate limit and digest options.
+
+    python -m benchmarks.pipeline_bench --companies 4 --concurrency 2 --llm-latency-ms 200
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.fixture_transport import replay_http
+
+
+def _call_tool(tool, **kwargs):
+    """crewAI tools wrap the original function; call it directly, bypassing the agent loop"""
+    return getattr(tool, "func", tool)(**kwargs)
+
+
+def _load_pipeline(source_budget: float = 0.0, governor_tpm: int = 0, governor_rpm: int = 0, rate_window_s: float = 60.0,
+                   digests: bool = True, chunk_tokens: int = 0, map_confidence: int = -1):
+    """Import pipeline modules lazily so argument parsing stays fast"""
+    import deadline
+    import llm_governor
+    import pipeline
+    from src.tools import spacenews_scraper, globalnewswire_tool, serpapi_tool
+    from src.tools import newTeardownCompilerTool as compiler
+
+    # Recorded fixtures don't rate-limit, and SerpAPI only needs a non-empty key
+    spacenews_scraper.REQUEST_DELAY_SECONDS = 0
+    globalnewswire_tool.REQUEST_DELAY_SECONDS = 0
+    serpapi_tool.SERPAPI_API_KEY = serpapi_tool.SERPAPI_API_KEY or "offline-fixture-key"
+    compiler.DIGESTS_ENABLED = digests
+    compiler.CHUNK_TOKENS = chunk_tokens or compiler.CHUNK_TOKENS
+    if map_confidence >= 0:
+        compiler.MAP_CONFIDENCE_THRESHOLD = map_confidence
+    # Production budgets are minutes; the bench only applies the ones asked for
+    deadline.SOURCE_BUDGET_SECONDS = source_budget
+    deadline.QUESTION_BUDGET_SECONDS = 0
+    # A fresh governor per run; without explicit limits it never holds calls back
+    llm_governor.WINDOW_SECONDS = rate_window_s
+    llm_governor.BACKOFF_SECONDS = min(llm_governor.BACKOFF_SECONDS, rate_window_s / 60)
+    llm_governor._governor = llm_governor.LLMGovernor(
+        rpm=governor_rpm or 10 ** 9, tpm=governor_tpm or 10 ** 12, db_path=""
+    )
+
+    return {"pipeline": pipeline, "compiler": compiler, "deadline": deadline, "governor": llm_governor._governor}
+
+
+def run_company(pipeline, index: int, work_dir: str, mode: str = "dag", job_deadline: float = 0.0) -> Dict:
+    """Run the full pipeline for one synthetic company and return its stage timings"""
+    from tracing import get_tracer, release_tracer, load_trace, summarize_trace
+
+    compiler = pipeline["compiler"]
+    company_name = f"Orbital Example {index}"
+    company_url = f"https://orbital-example-{index}.com/"
+    output_folder = os.path.join(work_dir, f"bench_job_{index}")
+    os.makedirs(output_folder, exist_ok=True)
+
+    partial = {}
+    start = time.perf_counter()
+    with get_tracer(output_folder, trace_id=f"bench_{index}").span("job", kind="job", company_name=company_name):
+        if mode == "dag":
+            with pipeline["deadline"].budget(job_deadline):
+                partial = pipeline["pipeline"].build_job_dag(company_name, company_url, output_folder).run()["partial"]
+        else:
+            with open("template/question.json", "r", encoding="utf-8") as f:
+                question_ids = [q["id"] for q in json.load(f)]
+            for run_source in pipeline["pipeline"].source_runners(company_name, company_url, output_folder).values():
+                run_source()
+            for question_id in question_ids:
+                _call_tool(compiler.compile_teardown_rag, company_name=company_name,
+                           output_folder=output_folder, question_id=question_id)
+        compiler.compile_final_teardown(company_name, output_folder, notes=partial)
+    elapsed = time.perf_counter() - start
+    release_tracer(output_folder)
+
+    return {"company": company_name, "wall_s": elapsed, "partial_answers": len(partial),
+            "stages": summarize_trace(load_trace(output_folder))}
+
+
+def aggregate_stages(results: List[Dict]) -> Dict[str, Dict]:
+    stages = {}
+    for result in results:
+        for name, entry in result["stages"].items():
+            total = stages.setdefault(name, {"kind": entry["kind"], "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            total["count"] += entry["count"]
+            total["errors"] += entry["errors"]
+            total["total_ms"] = round(total["total_ms"] + entry["total_ms"], 2)
+            total["max_ms"] = max(total["max_ms"], entry["max_ms"])
+    return stages
+
+
+# USD per 1M prompt / completion tokens, for the cost estimate; unknown models count as free
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def _estimated_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000, 6)
+
+
+def run_benchmark(companies: int = 2, concurrency: int = 1, llm_latency_ms: float = 0.0,
+                  llm_ms_per_1k_tokens: float = 0.0, http_latency_ms: float = 0.0,
+                  scenario: str = "default", keep_output: bool = False, mode: str = "dag",
+                  job_deadline: float = 0.0, source_budget: float = 0.0, llm_tpm_limit: int = 0,
+                  governor_tpm: int = 0, governor_rpm: int = 0, rate_window_s: float = 60.0,
+                  digests: bool = True, chunk_tokens: int = 0, map_confidence: int = -1) -> Dict:
+    os.chdir(REPO_ROOT)
+    pipeline = _load_pipeline(source_budget, governor_tpm, governor_rpm, rate_window_s, digests, chunk_tokens, map_confidence)
+    # One fake per routed model, so calls and tokens can be broken down by model
+    fake_llms: Dict[str, FakeChatModel] = {}
+
+    def fake_llm_for(model: str) -> FakeChatModel:
+        fake_llms[model] = FakeChatModel(latency_ms=llm_latency_ms, ms_per_1k_tokens=llm_ms_per_1k_tokens,
+                                         model=model, tpm_limit=llm_tpm_limit, window_s=rate_window_s)
+        return fake_llms[model]
+    pipeline["compiler"].set_llm_factory(fake_llm_for)
+
+    work_dir = tempfile.mkdtemp(prefix="teardown_bench_")
+    # Keep the USAspending cache per run so every run measures real (replayed) fetches
+    import usaspending_client
+    usaspending_client._client = usaspending_client.USAspendingClient(cache_dir=os.path.join(work_dir, "usaspending_cache"))
+    # Same for the digest cache, which is only shared between the companies of this run
+    from src.utils import digest_store
+    from metrics import DIGEST_CACHE
+    digest_store.DIGEST_CACHE_DIR = os.path.join(work_dir, "digest_cache")
+    digest_hits, digest_misses = DIGEST_CACHE.value(result="hit"), DIGEST_CACHE.value(result="miss")
+    try:
+        with replay_http(latency_ms=http_latency_ms, scenario=scenario) as adapter:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(lambda i: run_company(pipeline, i, work_dir, mode, job_deadline), range(1, companies + 1)))
+            wall_s = time.perf_counter() - start
+    finally:
+        if not keep_output:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    job_times = sorted(r["wall_s"] for r in results)
+    models = {
+        model: {
+            "calls": fake.calls,
+            "prompt_tokens": fake.prompt_tokens,
+            "completion_tokens": fake.completion_tokens,
+            "est_cost_usd": _estimated_cost(model, fake.prompt_tokens, fake.completion_tokens)
+        }
+        for model, fake in sorted(fake_llms.items())
+    }
+    calls = sum(fake.calls for fake in fake_llms.values())
+    return {
+        "companies": companies,
+        "concurrency": concurrency,
+        "scenario": scenario,
+        "pipeline": mode,
+        "wall_s": round(wall_s, 3),
+        "throughput_per_min": round(companies / wall_s * 60, 2) if wall_s else None,
+        "job_wall_s": {
+            "min": round(job_times[0], 3),
+            "p50": round(job_times[len(job_times) // 2], 3),
+            "max": round(job_times[-1], 3)
+        },
+        "llm": {
+            "calls": calls,
+            "prompt_tokens": sum(entry["prompt_tokens"] for entry in models.values()),
+            "completion_tokens": sum(entry["completion_tokens"] for entry in models.values()),
+            "calls_per_teardown": round(calls / companies, 1),
+            "rate_limited": sum(fake.rate_limited for fake in fake_llms.values()),
+            "est_cost_per_teardown_usd": round(sum(entry["est_cost_usd"] for entry in models.values()) / companies, 4),
+            "models": models
+        },
+        "digests": {
+            "enabled": digests,
+            "hits": int(DIGEST_CACHE.value(result="hit") - digest_hits),
+            "misses": int(DIGEST_CACHE.value(result="miss") - digest_misses)
+        },
+        "governor": pipeline["governor"].snapshot(),
+        "http": {"requests": adapter.request_count, "bytes": adapter.bytes_served},
+        "partial_answers": sum(r["partial_answers"] for r in results),
+        "stages": aggregate_stages(results),
+        "output_dir": work_dir if keep_output else None
+    }
+
+
+def print_report(report: Dict):
+    print(f"Companies: {report['companies']}  concurrency: {report['concurrency']}  "
+          f"scenario: {report['scenario']}  pipeline: {report['pipeline']}")
+    print(f"End-to-end wall: {report['wall_s']:.3f}s  ({report['throughput_per_min']} teardowns/min)")
+    job = report["job_wall_s"]
+    print(f"Per-job wall: min {job['min']:.3f}s  p50 {job['p50']:.3f}s  max {job['max']:.3f}s")
+    llm = report["llm"]
+    print(f"LLM: {llm['calls']} calls ({llm['calls_per_teardown']}/teardown), "
+          f"{llm['prompt_tokens']} prompt + {llm['completion_tokens']} completion tokens")
+    for model, entry in llm["models"].items():
+        print(f"  {model}: {entry['calls']} calls, {entry['prompt_tokens']} prompt + "
+              f"{entry['completion_tokens']} completion tokens, ~${entry['est_cost_usd']:.4f}")
+    print(f"Estimated LLM cost: ~${llm['est_cost_per_teardown_usd']:.4f}/teardown")
+    if report["digests"]["enabled"]:
+        print(f"Digests: {report['digests']['misses']} made, {report['digests']['hits']} reused")
+    if llm["rate_limited"]:
+        print(f"LLM 429s: {llm['rate_limited']} (governor concurrency limit now {report['governor']['concurrency_limit']})")
+    print(f"HTTP: {report['http']['requests']} requests, {report['http']['bytes']} bytes")
+    if report["partial_answers"]:
+        print(f"Partial answers: {report['partial_answers']}")
+    print()
+    print(f"{'stage':<28}{'kind':<10}{'count':>7}{'errors':>8}{'total ms':>12}{'max ms':>10}")
+    for name, entry in sorted(report["stages"].items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"{name:<28}{entry['kind'] or '':<10}{entry['count']:>7}{entry['errors']:>8}"
+              f"{entry['total_ms']:>12.1f}{entry['max_ms']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline teardown pipeline benchmark")
+    parser.add_argument("--companies", type=int, default=2, help="number of companies (N)")
+    parser.add_argument("--concurrency", type=int, default=1, help="companies processed in parallel (K)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="fixed latency per fake LLM call")
+    parser.add_argument("--llm-ms-per-1k-tokens", type=float, default=0.0, help="extra fake LLM latency per 1k prompt tokens")
+    parser.add_argument("--http-latency-ms", type=float, default=0.0, help="latency added to every replayed HTTP response")
+    parser.add_argument("--scenario", choices=["default", "rate_limited"], default="default")
+    parser.add_argument("--pipeline", choices=["dag", "sequential"], default="dag",
+                        help="dataflow scheduler like production, or all scrapers then all questions")
+    parser.add_argument("--job-deadline", type=float, default=0.0, help="per-job time budget in seconds, to check that slow sources are cut off and partial answers marked (dag only, 0 = none)")
+    parser.add_argument("--source-budget", type=float, default=0.0, help="per-source time budget in seconds (dag only, 0 = none)")
+    parser.add_argument("--llm-tpm-limit", type=int, default=0, help="fake model answers 429 past this many tokens per window, to compare throughput with and without --governor-tpm (0 = none)")
+    parser.add_argument("--governor-tpm", type=int, default=0, help="LLM governor tokens per window (0 = unlimited)")
+    parser.add_argument("--governor-rpm", type=int, default=0, help="LLM governor requests per window (0 = unlimited)")
+    parser.add_argument("--rate-window-s", type=float, default=60.0, help="length of the fake model and governor rate windows; shrink it so rate-limited runs take seconds")
+    parser.add_argument("--no-digests", action="store_true", help="map every question over the raw chunks instead of the per-document digests shared across companies")
+    parser.add_argument("--chunk-tokens", type=int, default=0, help="map chunk size in tokens; shrink it so the small fixture corpus spans several chunks (0 = production default)")
+    parser.add_argument("--map-confidence", type=int, default=-1, help="map early-exit confidence threshold (-1 = production default, 0 = off)")
+    parser.add_argument("--keep-output", action="store_true", help="keep the generated job folders")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    # Pipeline progress output goes to stderr so the report stays machine-readable
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmark(
+            companies=args.companies,
+            concurrency=args.concurrency,
+            llm_latency_ms=args.llm_latency_ms,
+            llm_ms_per_1k_tokens=args.llm_ms_per_1k_tokens,
+            http_latency_ms=args.http_latency_ms,
+            scenario=args.scenario,
+            keep_output=args.keep_output,
+            mode=args.pipeline,
+            job_deadline=args.job_deadline,
+            source_budget=args.source_budget,
+            llm_tpm_limit=args.llm_tpm_limit,
+            governor_tpm=args.governor_tpm,
+            governor_rpm=args.governor_rpm,
+            rate_window_s=args.rate_window_s,
+            digests=not args.no_digests,
+            chunk_tokens=args.chunk_tokens,
+            map_confidence=args.map_confidence
+        )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import zlib
+import hashlib
+import tempfile
+from typing import Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+class BlobStore:
+    """
+    Content-addressed store for teardown markdown.
+
+    Blobs are keyed by the SHA-256 of the uncompressed text and stored compressed under
+    blobs/<hash[:2]>/<hash>.zst (zstd) or .zz (zlib fallback when zstandard isn't installed).
+    Identical content is only ever written once.
+    """
+
+    def __init__(self, root: str = "blobs"):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, content_hash: str, suffix: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}{suffix}")
+
+    def _existing_path(self, content_hash: str) -> Optional[str]:
+        for suffix in (".zst", ".zz"):
+            path = self._path(content_hash, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def exists(self, content_hash: str) -> bool:
+        return self._existing_path(content_hash) is not None
+
+    def put(self, content: str) -> str:
+        """Store content and return its hash. No-op if the blob already exists."""
+        content_hash = self.hash_content(content)
+        if self.exists(content_hash):
+            return content_hash
+
+        raw = content.encode("utf-8")
+        if ZSTD_AVAILABLE:
+            data = zstandard.ZstdCompressor(level=10).compress(raw)
+            path = self._path(content_hash, ".zst")
+        else:
+            data = zlib.compress(raw, 9)
+            path = self._path(content_hash, ".zz")
+
+        # Write to a temp file and rename so readers never see a partial blob
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return content_hash
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """Return the decompressed content, or None if the blob is missing."""
+        path = self._existing_path(content_hash)
+        if not path:
+            return None
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if path.endswith(".zst"):
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"Blob {content_hash} is zstd-compressed but zstandard is not installed")
+            raw = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            raw = zlib.decompress(data)
+        return raw.decode("utf-8")
@@ -24,6 +24,8 @@ def cleanup_output_folders():
         "output",
         "vector_stores",
         "vector_store",  # Alternative naming
+        "blobs",
+        "cache",
         "template"
     ]
     
@@ -121,6 +123,7 @@ def main():
     print("  • Database cleared")
     print("  • Output folders cleaned")
     print("  • Vector stores cleared")
+    print("  • Teardown blob store cleared")
     print("  • Cache files removed")
     print("  • Directory structure recreated")
     print("\nYou can now start fresh with:")
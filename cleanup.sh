@@ -24,6 +24,8 @@ echo "Cleaning output folders and vector stores..."
 rm -rf output/* 2>/dev/null || true
 rm -rf vector_stores/* 2>/dev/null || true
 rm -rf vector_store/* 2>/dev/null || true
+rm -rf blobs/* 2>/dev/null || true
+rm -rf cache/* 2>/dev/null || true
 rm -f vector_store_status.txt 2>/dev/null || true
 echo "✅ Output folders and vector stores cleaned"
 
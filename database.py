@@ -1,11 +1,43 @@
 import sqlite3
+import threading
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from models import TeardownJob, Teardown, JobStatus
+from blob_store import BlobStore
+from metrics import timed_db
+
+JOB_COLUMNS = """id, company_name, company_url, status, created_at, started_at, completed_at,
+                 error_message, output_folder, worker_id, lease_expires_at, attempts, partial_reason,
+                 template_version"""
+
+# file_path (legacy, NOT NULL) is written empty: the blob store holds the only copy of a teardown
+TEARDOWN_COLUMNS = "id, job_id, company_name, company_url, created_at, content_hash, seq"
+
+# A job whose worker crashed this many times is marked failed instead of being retried
+MAX_JOB_ATTEMPTS = 3
+# How often a job status waiter checks the jobs version for changes made by other processes
+JOB_VERSION_POLL_SECONDS = 1.0
+
+# Wakes status waiters in this process as soon as one of its threads changes a job
+_job_changed = threading.Condition()
+_job_changes = 0
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a worker writes to a job whose lease it no longer holds"""
+
+
+def _notify_job_change():
+    global _job_changes
+    with _job_changed:
+        _job_changes += 1
+        _job_changed.notify_all()
 
 class Database:
-    def __init__(self, db_path: str = "teardown_app.db"):
+    def __init__(self, db_path: str = "teardown_app.db", blob_root: str = "blobs"):
         self.db_path = db_path
+        self.blobs = BlobStore(blob_root)
         self.init_db()
     
     def init_db(self):
@@ -38,9 +70,127 @@ class Database:
                 )
             """)
             
+            # Lease columns used by workers that claim jobs (see worker.py), why a job finished partial,
+            # and the template version it ran with
+            job_columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            for column, ddl in (
+                ("worker_id", "TEXT"),
+                ("lease_expires_at", "TEXT"),
+                ("heartbeat_at", "TEXT"),
+                ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+                ("partial_reason", "TEXT"),
+                ("template_version", "TEXT"),
+            ):
+                if column not in job_columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {ddl}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+            
+            # Teardown content lives in the blob store; the row only keeps its hash
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(teardowns)")]
+            if "content_hash" not in columns:
+                conn.execute("ALTER TABLE teardowns ADD COLUMN content_hash TEXT")
+            
+            # Version counter for delta sync of the teardown list: every insert takes the next
+            # version as its seq. Deleting rows starts a new epoch, so clients do a full reload.
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS table_versions (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    epoch TEXT NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO table_versions (name, version, epoch) VALUES ('teardowns', 0, lower(hex(randomblob(4))))"
+            )
+            if "seq" not in columns:
+                conn.execute("ALTER TABLE teardowns ADD COLUMN seq INTEGER")
+                conn.execute("""
+                    UPDATE teardowns SET seq = (
+                        SELECT COUNT(*) FROM teardowns AS earlier
+                        WHERE earlier.created_at < teardowns.created_at
+                           OR (earlier.created_at = teardowns.created_at AND earlier.rowid <= teardowns.rowid)
+                    )
+                """)
+                conn.execute(
+                    "UPDATE table_versions SET version = (SELECT COUNT(*) FROM teardowns) WHERE name = 'teardowns'"
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_teardowns_seq ON teardowns (seq)")
+            
+            # Jobs version: bumped by every status change, whichever process makes it, so status
+            # long-polls check one row instead of re-reading their jobs
+            conn.execute(
+                "INSERT OR IGNORE INTO table_versions (name, version, epoch) VALUES ('jobs', 0, '')"
+            )
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS jobs_status_version AFTER UPDATE OF status ON jobs
+                WHEN NEW.status != OLD.status BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = 'jobs';
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS teardowns_delete_epoch AFTER DELETE ON teardowns BEGIN
+                    UPDATE table_versions SET version = version + 1, epoch = lower(hex(randomblob(4)))
+                    WHERE name = 'teardowns';
+                END
+            """)
+            
+            conn.commit()
+            self._migrate_inline_content(conn)
+    
+    def _migrate_inline_content(self, conn):
+        """Move content stored inline by older versions into the blob store"""
+        rows = conn.execute(
+            "SELECT id, content FROM teardowns WHERE content_hash IS NULL AND content != ''"
+        ).fetchall()
+        for teardown_id, content in rows:
+            content_hash = self.blobs.put(content)
+            conn.execute(
+                "UPDATE teardowns SET content_hash = ?, content = '' WHERE id = ?",
+                (content_hash, teardown_id)
+            )
+        if rows:
             conn.commit()
+            print(f"Moved {len(rows)} teardown bodies into the blob store")
+    
+    def _row_to_job(self, row) -> TeardownJob:
+        return TeardownJob(
+            id=row[0],
+            company_name=row[1],
+            company_url=row[2],
+            status=JobStatus(row[3]),
+            created_at=datetime.fromisoformat(row[4]),
+            started_at=datetime.fromisoformat(row[5]) if row[5] else None,
+            completed_at=datetime.fromisoformat(row[6]) if row[6] else None,
+            error_message=row[7],
+            output_folder=row[8],
+            worker_id=row[9],
+            lease_expires_at=datetime.fromisoformat(row[10]) if row[10] else None,
+            attempts=row[11] or 0,
+            partial_reason=row[12],
+            template_version=row[13]
+        )
+    
+    def _row_to_teardown(self, row, load_content: bool) -> Teardown:
+        content_hash = row[5]
+        content = None
+        if load_content and content_hash:
+            try:
+                content = self.blobs.get(content_hash)
+            except Exception as e:
+                print(f"❌ Could not load teardown blob {content_hash}: {e}")
+        return Teardown(
+            id=row[0],
+            job_id=row[1],
+            company_name=row[2],
+            company_url=row[3],
+            content=content,
+            created_at=datetime.fromisoformat(row[4]),
+            content_hash=content_hash,
+            seq=row[6]
+        )
     
     # Job operations
+    @timed_db("create_job")
     def create_job(self, job: TeardownJob) -> TeardownJob:
         with sqlite3.connect(self.db_path) as conn:
             conn.execute(
@@ -58,137 +208,287 @@ class Database:
             conn.commit()
         return job
     
+    def _update_job(self, conn, job: TeardownJob):
+        # A leased job is only written by the worker holding the lease; once it has been re-queued
+        # (or failed) the row no longer names this worker and nothing is updated
+        cursor = conn.execute(
+            """UPDATE jobs SET status = ?, started_at = ?, completed_at = ?, 
+               error_message = ?, output_folder = ?, partial_reason = ?, template_version = ?
+               WHERE id = ?""" + (" AND worker_id = ?" if job.worker_id else ""),
+            (
+                job.status.value,
+                job.started_at.isoformat() if job.started_at else None,
+                job.completed_at.isoformat() if job.completed_at else None,
+                job.error_message,
+                job.output_folder,
+                job.partial_reason,
+                job.template_version,
+                job.id
+            ) + ((job.worker_id,) if job.worker_id else ())
+        )
+        if job.worker_id and cursor.rowcount == 0:
+            raise LeaseLostError(f"Worker {job.worker_id} no longer holds job {job.id}")
+    
+    @timed_db("update_job")
     def update_job(self, job: TeardownJob) -> TeardownJob:
+        """Write the job's status fields. Raises LeaseLostError if job.worker_id no longer holds it."""
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """UPDATE jobs SET status = ?, started_at = ?, completed_at = ?, 
-                   error_message = ?, output_folder = ? WHERE id = ?""",
-                (
-                    job.status.value,
-                    job.started_at.isoformat() if job.started_at else None,
-                    job.completed_at.isoformat() if job.completed_at else None,
-                    job.error_message,
-                    job.output_folder,
-                    job.id
-                )
-            )
+            self._update_job(conn, job)
             conn.commit()
+        _notify_job_change()
         return job
     
+    @timed_db("get_job")
     def get_job(self, job_id: str) -> Optional[TeardownJob]:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute(
-                """SELECT id, company_name, company_url, status, created_at,
-                   started_at, completed_at, error_message, output_folder FROM jobs WHERE id = ?""",
+                f"""SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?""",
                 (job_id,)
             )
             row = cursor.fetchone()
             if row:
-                return TeardownJob(
-                    id=row[0],
-                    company_name=row[1],
-                    company_url=row[2],
-                    status=JobStatus(row[3]),
-                    created_at=datetime.fromisoformat(row[4]),
-                    started_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                    completed_at=datetime.fromisoformat(row[6]) if row[6] else None,
-                    error_message=row[7],
-                    output_folder=row[8]
-                )
+                return self._row_to_job(row)
         return None
     
+    @timed_db("get_jobs")
+    def get_jobs(self, job_ids: List[str]) -> List[TeardownJob]:
+        """Several jobs in one round trip (missing IDs are skipped)"""
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" for _ in job_ids)
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id IN ({placeholders})", list(job_ids))
+            return [self._row_to_job(row) for row in cursor.fetchall()]
+    
+    @timed_db("get_all_jobs")
     def get_all_jobs(self) -> List[TeardownJob]:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute(
-                """SELECT id, company_name, company_url, status, created_at,
-                   started_at, completed_at, error_message, output_folder FROM jobs 
+                f"""SELECT {JOB_COLUMNS} FROM jobs 
                    ORDER BY created_at DESC"""
             )
             return [
-                TeardownJob(
-                    id=row[0],
-                    company_name=row[1],
-                    company_url=row[2],
-                    status=JobStatus(row[3]),
-                    created_at=datetime.fromisoformat(row[4]),
-                    started_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                    completed_at=datetime.fromisoformat(row[6]) if row[6] else None,
-                    error_message=row[7],
-                    output_folder=row[8]
-                )
+                self._row_to_job(row)
                 for row in cursor.fetchall()
             ]
     
-    # Teardown operations
-    def create_teardown(self, teardown: Teardown) -> Teardown:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """INSERT INTO teardowns (id, job_id, company_name, company_url,
-                   content, created_at, file_path) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+    @timed_db("claim_job")
+    def claim_job(self, worker_id: str, lease_seconds: float) -> Optional[TeardownJob]:
+        """
+        Atomically lease the oldest pending job to worker_id, or return None if there is none.
+        
+        BEGIN IMMEDIATE takes SQLite's write lock up front, so two workers can never both see the
+        same row as pending; the status guard on the UPDATE makes the claim safe regardless.
+        Expired leases (crashed workers) are put back to pending first.
+        """
+        now = datetime.now()
+        lease_expires_at = datetime.fromtimestamp(now.timestamp() + lease_seconds)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at ASC LIMIT 1",
+                (JobStatus.PENDING.value,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            cursor = conn.execute(
+                """UPDATE jobs SET status = ?, worker_id = ?, lease_expires_at = ?, heartbeat_at = ?,
+                   started_at = ?, attempts = attempts + 1 WHERE id = ? AND status = ?""",
+                (
+                    JobStatus.RUNNING.value, worker_id, lease_expires_at.isoformat(), now.isoformat(),
+                    now.isoformat(), row[0], JobStatus.PENDING.value
+                )
+            )
+            claimed = cursor.rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get_job(row[0]) if claimed else None
+    
+    @timed_db("claim_job_by_id")
+    def claim_job_by_id(self, job_id: str, worker_id: str, lease_seconds: float) -> Optional[TeardownJob]:
+        """Lease one specific pending job to worker_id, or return None if it isn't pending any more"""
+        now = datetime.now()
+        lease_expires_at = datetime.fromtimestamp(now.timestamp() + lease_seconds)
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = ?, worker_id = ?, lease_expires_at = ?, heartbeat_at = ?,
+                   started_at = ?, attempts = attempts + 1 WHERE id = ? AND status = ?""",
                 (
-                    teardown.id, teardown.job_id, teardown.company_name,
-                    teardown.company_url, teardown.content,
-                    teardown.created_at.isoformat(), teardown.file_path
+                    JobStatus.RUNNING.value, worker_id, lease_expires_at.isoformat(), now.isoformat(),
+                    now.isoformat(), job_id, JobStatus.PENDING.value
                 )
             )
             conn.commit()
+            claimed = cursor.rowcount == 1
+        return self.get_job(job_id) if claimed else None
+    
+    def _requeue_expired(self, conn, now: datetime):
+        """Return jobs whose worker stopped heartbeating to the queue, or fail them after MAX_JOB_ATTEMPTS"""
+        conn.execute(
+            """UPDATE jobs SET status = ?, completed_at = ?, error_message = ?, worker_id = NULL,
+               lease_expires_at = NULL WHERE status = ? AND lease_expires_at < ? AND attempts >= ?""",
+            (
+                JobStatus.FAILED.value, now.isoformat(),
+                f"Worker lease expired {MAX_JOB_ATTEMPTS} times", JobStatus.RUNNING.value,
+                now.isoformat(), MAX_JOB_ATTEMPTS
+            )
+        )
+        cursor = conn.execute(
+            """UPDATE jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL
+               WHERE status = ? AND lease_expires_at < ?""",
+            (JobStatus.PENDING.value, JobStatus.RUNNING.value, now.isoformat())
+        )
+        if cursor.rowcount:
+            print(f"♻️ Re-queued {cursor.rowcount} job(s) with expired worker leases")
+    
+    @timed_db("heartbeat_job")
+    def heartbeat_job(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a running job's lease. Returns False if worker_id no longer holds it."""
+        now = datetime.now()
+        lease_expires_at = datetime.fromtimestamp(now.timestamp() + lease_seconds)
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET heartbeat_at = ?, lease_expires_at = ?
+                   WHERE id = ? AND worker_id = ? AND status = ?""",
+                (now.isoformat(), lease_expires_at.isoformat(), job_id, worker_id, JobStatus.RUNNING.value)
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+    
+    @timed_db("count_jobs_by_status")
+    def count_jobs_by_status(self) -> Dict[str, int]:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            return {status: count for status, count in cursor.fetchall()}
+    
+    @timed_db("complete_job")
+    def complete_job(self, job: TeardownJob, teardown: Teardown) -> Teardown:
+        """
+        Store the teardown and write the job's final status in one transaction, so a worker that
+        lost its lease (LeaseLostError) leaves no teardown behind for the job's new owner to duplicate.
+        """
+        teardown.content_hash = self.blobs.put(teardown.content)
+        with sqlite3.connect(self.db_path) as conn:
+            self._update_job(conn, job)
+            self._insert_teardown(conn, teardown)
+            conn.commit()
+        _notify_job_change()
+        return teardown
+    
+    # Teardown operations
+    def _insert_teardown(self, conn, teardown: Teardown):
+        # The version bump takes the write lock, so seq values are unique and increasing
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = 'teardowns'")
+        teardown.seq = conn.execute("SELECT version FROM table_versions WHERE name = 'teardowns'").fetchone()[0]
+        conn.execute(
+            """INSERT INTO teardowns (id, job_id, company_name, company_url,
+               content, created_at, file_path, content_hash, seq) VALUES (?, ?, ?, ?, '', ?, '', ?, ?)""",
+            (
+                teardown.id, teardown.job_id, teardown.company_name,
+                teardown.company_url, teardown.created_at.isoformat(),
+                teardown.content_hash, teardown.seq
+            )
+        )
+    
+    @timed_db("create_teardown")
+    def create_teardown(self, teardown: Teardown) -> Teardown:
+        teardown.content_hash = self.blobs.put(teardown.content)
+        with sqlite3.connect(self.db_path) as conn:
+            self._insert_teardown(conn, teardown)
+            conn.commit()
         return teardown
     
-    def get_teardown(self, teardown_id: str) -> Optional[Teardown]:
+    @timed_db("get_teardown")
+    def get_teardown(self, teardown_id: str, load_content: bool = True) -> Optional[Teardown]:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute(
-                """SELECT id, job_id, company_name, company_url, content,
-                   created_at, file_path FROM teardowns WHERE id = ?""",
+                f"SELECT {TEARDOWN_COLUMNS} FROM teardowns WHERE id = ?",
                 (teardown_id,)
             )
             row = cursor.fetchone()
             if row:
-                return Teardown(
-                    id=row[0],
-                    job_id=row[1],
-                    company_name=row[2],
-                    company_url=row[3],
-                    content=row[4],
-                    created_at=datetime.fromisoformat(row[5]),
-                    file_path=row[6]
-                )
+                return self._row_to_teardown(row, load_content)
         return None
     
-    def get_teardown_by_job(self, job_id: str) -> Optional[Teardown]:
+    @timed_db("get_teardown_by_job")
+    def get_teardown_by_job(self, job_id: str, load_content: bool = True) -> Optional[Teardown]:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute(
-                """SELECT id, job_id, company_name, company_url, content,
-                   created_at, file_path FROM teardowns WHERE job_id = ?""",
+                f"SELECT {TEARDOWN_COLUMNS} FROM teardowns WHERE job_id = ?",
                 (job_id,)
             )
             row = cursor.fetchone()
             if row:
-                return Teardown(
-                    id=row[0],
-                    job_id=row[1],
-                    company_name=row[2],
-                    company_url=row[3],
-                    content=row[4],
-                    created_at=datetime.fromisoformat(row[5]),
-                    file_path=row[6]
-                )
+                return self._row_to_teardown(row, load_content)
         return None
     
+    @timed_db("get_teardowns_by_jobs")
+    def get_teardowns_by_jobs(self, job_ids: List[str], load_content: bool = False) -> Dict[str, Teardown]:
+        """Teardowns for several jobs in one query, keyed by job ID"""
+        if not job_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in job_ids)
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                f"SELECT {TEARDOWN_COLUMNS} FROM teardowns WHERE job_id IN ({placeholders})", list(job_ids)
+            )
+            return {row[1]: self._row_to_teardown(row, load_content) for row in cursor.fetchall()}
+    
+    @timed_db("get_all_teardowns")
     def get_all_teardowns(self) -> List[Teardown]:
+        """List teardowns without their bodies; use get_teardown to load content"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute(
-                """SELECT id, job_id, company_name, company_url, content,
-                   created_at, file_path FROM teardowns ORDER BY created_at DESC"""
+                f"SELECT {TEARDOWN_COLUMNS} FROM teardowns ORDER BY created_at DESC"
             )
-            return [
-                Teardown(
-                    id=row[0],
-                    job_id=row[1],
-                    company_name=row[2],
-                    company_url=row[3],
-                    content=row[4],
-                    created_at=datetime.fromisoformat(row[5]),
-                    file_path=row[6]
-                )
-                for row in cursor.fetchall()
-            ]
\ No newline at end of file
+            return [self._row_to_teardown(row, load_content=False) for row in cursor.fetchall()]
+    
+    @timed_db("get_teardowns_version")
+    def get_teardowns_version(self) -> Tuple[str, int]:
+        """(epoch, version) of the teardowns table; cheap enough to check on every poll"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT epoch, version FROM table_versions WHERE name = 'teardowns'").fetchone()
+            return (row[0], row[1]) if row else ("", 0)
+    
+    @timed_db("get_jobs_version")
+    def get_jobs_version(self) -> int:
+        """Counter bumped by every job status change"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT version FROM table_versions WHERE name = 'jobs'").fetchone()
+            return row[0] if row else 0
+    
+    def wait_for_job_change(self, version: int, timeout: float) -> int:
+        """
+        Block until the jobs version moves past `version` or `timeout` seconds pass; returns the
+        current version. Changes made in this process wake the waiter at once, changes made by
+        other processes (job workers) within JOB_VERSION_POLL_SECONDS.
+        """
+        end = time.time() + timeout
+        while True:
+            with _job_changed:
+                seen = _job_changes
+            current = self.get_jobs_version()
+            left = end - time.time()
+            if current != version or left <= 0:
+                return current
+            # The DB is read outside the condition, so a slow query never holds up other waiters
+            with _job_changed:
+                _job_changed.wait_for(lambda: _job_changes != seen, timeout=min(JOB_VERSION_POLL_SECONDS, left))
+    
+    @timed_db("get_teardowns_since")
+    def get_teardowns_since(self, seq: int) -> List[Teardown]:
+        """Teardowns added after the given version, newest first, without their bodies"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                f"SELECT {TEARDOWN_COLUMNS} FROM teardowns WHERE seq > ? ORDER BY created_at DESC",
+                (seq,)
+            )
+            return [self._row_to_teardown(row, load_content=False) for row in cursor.fetchall()]
@@ -0,0 +1,173 @@
+"""
+Time budgets for a teardown job and its stages.
+
+A budget is an absolute expiry time carried in a context variable, so it follows the work into
+scrapers, the HTTP client and the compiler without changing tool signatures. Nested budgets can
+only shorten the deadline. Code that loops over slow work checks it cooperatively: the HTTP
+client refuses new requests and clamps timeouts to the time left, scrapers stop fetching and
+save what they have, and the compiler stops reading more chunks.
+
+A soft budget (soft_budget()) doesn't stop anything by itself. It only tells cooperative loops to
+wrap up (should_wrap_up()), e.g. a question stops reading chunks but still writes its answer.
+
+Work that finished with less than it wanted records why with note_partial(); the compiler collects
+those notes and stores them with the answer, so the teardown says which answers are partial.
+
+A job can also be cancelled from another thread (cancellable()): once its event is set, every
+budget under it counts as expired, so the job stops at the next cooperative check.
+
+    with deadline.budget(300):
+        for url in urls:
+            if not deadline.sleep(REQUEST_DELAY_SECONDS):
+                break
+            fetch(url)
+"""
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+JOB_DEADLINE_SECONDS = float(os.environ.get("TEARDOWN_JOB_DEADLINE", "600"))
+SOURCE_BUDGET_SECONDS = float(os.environ.get("TEARDOWN_SOURCE_BUDGET", "300"))
+QUESTION_BUDGET_SECONDS = float(os.environ.get("TEARDOWN_QUESTION_BUDGET", "120"))
+
+_expires_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("teardown_deadline", default=None)
+_wrap_up_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("teardown_wrap_up", default=None)
+_notes: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("teardown_partial_notes", default=None)
+_cancel: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("teardown_cancel", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started after its budget ran out"""
+
+
+def _shortened(current: Optional[float], seconds: Optional[float]) -> Optional[float]:
+    if not seconds or seconds <= 0:
+        return current
+    ends = time.monotonic() + seconds
+    return min(current, ends) if current is not None else ends
+
+
+@contextmanager
+def budget(seconds: Optional[float]):
+    """Limit the enclosed work to `seconds` (or less, if an outer budget ends sooner). 0/None means no new limit."""
+    token = _expires_at.set(_shortened(_expires_at.get(), seconds))
+    try:
+        yield
+    finally:
+        _expires_at.reset(token)
+
+
+@contextmanager
+def soft_budget(seconds: Optional[float]):
+    """Ask the enclosed work to wrap up after `seconds`, without refusing anything it still does"""
+    token = _wrap_up_at.set(_shortened(_wrap_up_at.get(), seconds))
+    try:
+        yield
+    finally:
+        _wrap_up_at.reset(token)
+
+
+@contextmanager
+def cancellable(event: threading.Event):
+    """Treat the enclosed work's budget as used up once `event` is set (e.g. its job lease was lost)"""
+    token = _cancel.set(event)
+    try:
+        yield
+    finally:
+        _cancel.reset(token)
+
+
+def cancelled() -> bool:
+    event = _cancel.get()
+    return event is not None and event.is_set()
+
+
+def expires_at() -> Optional[float]:
+    """Monotonic time the current budget ends, or None without a budget"""
+    return _expires_at.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (never negative), or None without a budget"""
+    if cancelled():
+        return 0.0
+    expires = _expires_at.get()
+    return None if expires is None else max(0.0, expires - time.monotonic())
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def should_wrap_up() -> bool:
+    """True once the hard or the soft budget has run out"""
+    wrap_up_at = _wrap_up_at.get()
+    return expired() or (wrap_up_at is not None and time.monotonic() >= wrap_up_at)
+
+
+def check(what: str = "work"):
+    """Raise DeadlineExceeded if the current budget has run out"""
+    if expired():
+        raise DeadlineExceeded(f"Deadline reached before {what}")
+
+
+def sleep(seconds: float) -> bool:
+    """Sleep, but not past the deadline. Returns False if the budget is used up."""
+    left = remaining()
+    if left is None:
+        time.sleep(seconds)
+        return True
+    time.sleep(min(seconds, left))
+    return seconds < left
+
+
+def clamp_timeout(timeout):
+    """Shrink a requests-style timeout (seconds or (connect, read)) so it ends by the deadline"""
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, 0.001)
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(min(t, left) if t is not None else left for t in timeout)
+    return min(timeout, left)
+
+
+def propagate(fn: Callable) -> Callable:
+    """Wrap fn so it runs under the caller's budget (and cancellation) when called from a worker thread"""
+    expires = _expires_at.get()
+    cancel = _cancel.get()
+
+    def run(*args, **kwargs):
+        token = _expires_at.set(expires)
+        cancel_token = _cancel.set(cancel)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _cancel.reset(cancel_token)
+            _expires_at.reset(token)
+    return run
+
+
+@contextmanager
+def collect_notes():
+    """Collect note_partial() calls made by the enclosed work; yields the list"""
+    notes: List[str] = []
+    token = _notes.set(notes)
+    try:
+        yield notes
+    finally:
+        _notes.reset(token)
+
+
+def note_partial(reason: str):
+    """Record that the current work finished with less data than it wanted"""
+    notes = _notes.get()
+    if notes is not None and reason not in notes:
+        notes.append(reason)
+
@@ -0,0 +1,47 @@
+"""
+gunicorn settings for the teardown web app.
+
+Request serving and job execution are separate: gunicorn workers handle HTTP and only insert
+PENDING jobs, while a job worker (`python -m worker`) started from the master leases and executes
+them. On SIGTERM gunicorn stops its workers within graceful_timeout and the job worker finishes the
+jobs it already started before exiting. Set TEARDOWN_EMBEDDED_RUNNER=0 to run workers as their own
+service (or on other machines) instead.
+"""
+import os
+import signal
+import subprocess
+import sys
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8080")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+raw_env = ["TEARDOWN_JOB_EXECUTION=queue"]
+
+_runner = None
+
+
+def when_ready(server):
+    global _runner
+    if os.environ.get("TEARDOWN_EMBEDDED_RUNNER", "1") == "0":
+        return
+    env = dict(os.environ, TEARDOWN_JOB_EXECUTION="queue")
+    _runner = subprocess.Popen([sys.executable, "-m", "worker"], env=env)
+    server.log.info("Started job worker (pid %s)", _runner.pid)
+
+
+def on_exit(server):
+    if _runner is None or _runner.poll() is not None:
+        return
+    drain_timeout = float(os.environ.get("TEARDOWN_DRAIN_TIMEOUT", "1800"))
+    server.log.info("Waiting up to %ss for the job worker to drain", drain_timeout)
+    _runner.send_signal(signal.SIGTERM)
+    try:
+        _runner.wait(timeout=drain_timeout)
+    except subprocess.TimeoutExpired:
+        _runner.kill()
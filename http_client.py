@@ -0,0 +1,232 @@
+"""
+Process-wide HTTP client shared by every scraper.
+
+One requests Session with keep-alive connection pools per host, so TLS handshakes are reused across
+articles and jobs. Requests get connect/read timeouts by default, so a hung host can't stall a
+worker. Inside a job or stage budget (see deadline.py) timeouts are clamped to the time left and
+no new attempt is started once it has run out. 429 and 5xx responses and connection errors are retried with exponential backoff, and
+Retry-After is honoured. Bodies are capped at max_bytes; anything past the cap is dropped and
+the response is marked truncated. gzip/deflate are always accepted, and brotli is added when the
+brotli package is installed. HTTP/2 is used for https when TEARDOWN_HTTP2=1 and httpx with h2 is
+installed.
+
+    from http_client import get_client
+    response = get_client().get(url, headers={"User-Agent": "..."})
+"""
+import os
+import time
+import random
+import threading
+import importlib.util
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import deadline
+from metrics import REGISTRY
+
+HTTP2_AVAILABLE = importlib.util.find_spec("httpx") is not None and importlib.util.find_spec("h2") is not None
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None or importlib.util.find_spec("brotlicffi") is not None
+
+CONNECT_TIMEOUT_SECONDS = float(os.environ.get("TEARDOWN_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT_SECONDS = float(os.environ.get("TEARDOWN_HTTP_READ_TIMEOUT", "20"))
+MAX_RETRIES = int(os.environ.get("TEARDOWN_HTTP_RETRIES", "3"))
+BACKOFF_SECONDS = float(os.environ.get("TEARDOWN_HTTP_BACKOFF", "0.5"))
+MAX_BACKOFF_SECONDS = 30.0
+MAX_RESPONSE_BYTES = int(os.environ.get("TEARDOWN_HTTP_MAX_BYTES", str(5 * 1024 * 1024)))
+POOL_HOSTS = 64
+POOL_CONNECTIONS_PER_HOST = int(os.environ.get("TEARDOWN_HTTP_POOL_SIZE", "10"))
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+)
+
+HTTP_RETRIES = REGISTRY.counter("teardown_http_retries_total", "Outbound HTTP retries by host and reason", ("host", "reason"))
+HTTP_TRUNCATED = REGISTRY.counter("teardown_http_truncated_total", "Responses cut off at the size cap", ("host",))
+
+
+def _retry_after_seconds(response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """Pooled, retrying HTTP client. Thread-safe; share one per process via get_client()."""
+
+    def __init__(self, connect_timeout: float = CONNECT_TIMEOUT_SECONDS, read_timeout: float = READ_TIMEOUT_SECONDS,
+                 max_retries: int = MAX_RETRIES, backoff: float = BACKOFF_SECONDS,
+                 max_bytes: int = MAX_RESPONSE_BYTES, pool_size: int = POOL_CONNECTIONS_PER_HOST,
+                 http2: bool = False, headers: Optional[Dict[str, str]] = None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_bytes = max_bytes
+
+        self.session = requests.Session()
+        # Retries are handled in request() so they apply to both transports and show up in metrics
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Accept-Encoding": "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate",
+        })
+        if headers:
+            self.session.headers.update(headers)
+
+        self._http2 = None
+        if http2 and HTTP2_AVAILABLE:
+            import httpx
+            self._http2 = httpx.Client(
+                http2=True,
+                headers=dict(self.session.headers),
+                limits=httpx.Limits(max_keepalive_connections=POOL_HOSTS, max_connections=POOL_HOSTS * pool_size),
+                follow_redirects=True
+            )
+
+    def request(self, method: str, url: str, timeout=None, max_bytes: Optional[int] = None,
+                retries: Optional[int] = None, **kwargs):
+        """
+        Send a request, retrying 429/5xx and connection errors with exponential backoff.
+
+        Returns the final response (which may still be a 429/5xx once retries run out) with its
+        body read up to max_bytes. `response.attempts` and `response.truncated` describe how it went.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        max_bytes = max_bytes if max_bytes is not None else self.max_bytes
+        retries = self.max_retries if retries is None else retries
+        host = urlparse(url).netloc or "unknown"
+
+        attempt = 0
+        while True:
+            attempt += 1
+            deadline.check(f"{method} {url}")
+            try:
+                response = self._send(method, url, deadline.clamp_timeout(timeout), max_bytes, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt > retries:
+                    raise
+                reason = "timeout" if isinstance(e, requests.Timeout) else "connection"
+                HTTP_RETRIES.inc(host=host, reason=reason)
+                deadline.sleep(self._backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt <= retries:
+                delay = _retry_after_seconds(response)
+                delay = min(MAX_BACKOFF_SECONDS, delay) if delay is not None else self._backoff_delay(attempt)
+                left = deadline.remaining()
+                # A retry that can't happen before the deadline is skipped and the 429/5xx returned as is
+                if left is None or delay < left:
+                    HTTP_RETRIES.inc(host=host, reason=str(response.status_code))
+                    time.sleep(delay)
+                    continue
+
+            response.attempts = attempt
+            if response.truncated:
+                HTTP_TRUNCATED.inc(host=host)
+            return response
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * (2 ** (attempt - 1))))
+
+    def _send(self, method: str, url: str, timeout, max_bytes: int, **kwargs):
+        if self._http2 is not None and url.startswith("https://"):
+            return self._send_http2(method, url, timeout, max_bytes, **kwargs)
+
+        response = self.session.request(method, url, timeout=timeout, stream=True, **kwargs)
+        if response._content is not False:
+            # Body already loaded by the transport adapter
+            body = response._content
+            truncated = len(body) > max_bytes
+            body = body[:max_bytes]
+        else:
+            try:
+                body, truncated = self._read_capped(response.iter_content(64 * 1024), max_bytes)
+            finally:
+                response.close()
+        response._content = body
+        response._content_consumed = True
+        response.truncated = truncated
+        return response
+
+    def _send_http2(self, method: str, url: str, timeout, max_bytes: int, **kwargs):
+        import httpx
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        headers = kwargs.pop("headers", None)
+        try:
+            with self._http2.stream(method, url, timeout=timeout, headers=headers, **kwargs) as streamed:
+                body, truncated = self._read_capped(streamed.iter_bytes(), max_bytes)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e))
+
+        # Same type as the HTTP/1.1 path, so callers get .ok and requests.HTTPError from raise_for_status
+        response = requests.Response()
+        response.status_code = streamed.status_code
+        response.reason = streamed.reason_phrase
+        response.headers = CaseInsensitiveDict(streamed.headers.items())
+        response._content = body
+        response._content_consumed = True
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = str(streamed.url)
+        response.request = requests.Request(method, response.url, headers=dict(streamed.request.headers)).prepare()
+        response.truncated = truncated
+        return response
+
+    @staticmethod
+    def _read_capped(chunks, max_bytes: int):
+        parts = []
+        size = 0
+        for chunk in chunks:
+            if size + len(chunk) > max_bytes:
+                parts.append(chunk[:max_bytes - size])
+                return b"".join(parts), True
+            parts.append(chunk)
+            size += len(chunk)
+        return b"".join(parts), False
+
+    def close(self):
+        self.session.close()
+        if self._http2 is not None:
+            self._http2.close()
+
+
+_client: Optional[HttpClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """The process-wide client. Rebuilt after a fork so worker processes don't share sockets."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = HttpClient(http2=os.environ.get("TEARDOWN_HTTP2", "0") == "1")
+            _client_pid = os.getpid()
+        return _client
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3.11
+"""
+Job execution, kept separate from request serving.
+
+JobExecutor runs teardowns on a bounded thread pool and can drain on shutdown. In production the
+web workers only insert PENDING jobs and JobRunner processes started by worker.py lease them from
+the jobs table. With TEARDOWN_JOB_EXECUTION=inline (the development default) the web app's own
+JobRunner claims each job it creates and runs it in-process, so a worker polling the same
+database can't pick it up too.
+
+A job only writes its results while its runner holds the lease. When a heartbeat finds the lease
+gone (the job was re-queued after missed heartbeats), the job is cancelled through its deadline
+and abandons its work.
+"""
+import os
+import time
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+import deadline
+from database import Database
+from search_index import SearchIndex
+from models import TeardownJob
+
+MAX_CONCURRENT_JOBS = int(os.environ.get("TEARDOWN_MAX_CONCURRENT_JOBS", "2"))
+POLL_INTERVAL_SECONDS = float(os.environ.get("TEARDOWN_POLL_INTERVAL", "2"))
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("TEARDOWN_DRAIN_TIMEOUT", "1800"))
+# A claimed job is re-queued if its worker misses heartbeats for this long; heartbeats go out every quarter lease
+LEASE_SECONDS = float(os.environ.get("TEARDOWN_LEASE_SECONDS", "120"))
+
+
+class JobExecutor:
+    """Bounded pool of teardown threads that tracks which jobs are in flight"""
+
+    def __init__(self, db: Database, search_index: SearchIndex, max_workers: int = MAX_CONCURRENT_JOBS):
+        self.db = db
+        self.search_index = search_index
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="teardown")
+        self._futures: Dict[str, object] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, job: TeardownJob) -> bool:
+        """Queue a job on the pool. Returns False if it is already running or we are shutting down."""
+        # Imported here so processes that only serve requests never load crewAI and the agents
+        from pipeline import run_single_teardown
+
+        with self._lock:
+            if self._closed or job.id in self._futures:
+                return False
+            cancel = threading.Event()
+            future = self._pool.submit(self._run, run_single_teardown, job, cancel)
+            self._futures[job.id] = future
+            self._cancel_events[job.id] = cancel
+        future.add_done_callback(lambda _: self._forget(job.id))
+        return True
+
+    def _run(self, run_single_teardown, job: TeardownJob, cancel: threading.Event):
+        with deadline.cancellable(cancel):
+            run_single_teardown(job, self.db, self.search_index)
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a running job to stop at its next deadline check. Returns False if it isn't running here."""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+    def active_jobs(self):
+        with self._lock:
+            return list(self._futures)
+
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def has_capacity(self) -> bool:
+        return self.active_count() < self.max_workers
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = DRAIN_TIMEOUT_SECONDS):
+        """Stop accepting jobs and, if drain is set, wait for running ones to finish"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            futures = list(self._futures.values())
+
+        if drain and futures:
+            print(f"⏳ Draining {len(futures)} running job(s) (timeout {timeout}s)")
+            done, not_done = wait(futures, timeout=timeout)
+            if not_done:
+                print(f"⚠️ {len(not_done)} job(s) still running after drain timeout")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobRunner:
+    """
+    Leases PENDING jobs from the jobs table and feeds them to a JobExecutor until stopped.
+    
+    Any number of runners, in one or more processes or on machines sharing the database and
+    output folders, can poll the same table: claims are atomic and each claimed job carries a
+    lease that the runner keeps extending while the job runs.
+    """
+
+    def __init__(self, db: Optional[Database] = None, poll_interval: float = POLL_INTERVAL_SECONDS,
+                 max_workers: int = MAX_CONCURRENT_JOBS, worker_id: Optional[str] = None,
+                 lease_seconds: float = LEASE_SECONDS):
+        self.db = db or Database()
+        self.executor = JobExecutor(self.db, SearchIndex(self.db.db_path), max_workers=max_workers)
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._heartbeats_started = False
+        self._heartbeats_lock = threading.Lock()
+
+    def stop(self, *_):
+        if not self._stop.is_set():
+            print(f"🛑 Worker {self.worker_id} stopping - no new jobs will be claimed")
+        self._stop.set()
+
+    def poll_once(self) -> int:
+        """Claim jobs until every executor slot is busy or the queue is empty. Returns how many were started."""
+        started = 0
+        while self.executor.has_capacity() and not self._stop.is_set():
+            job = self.db.claim_job(self.worker_id, self.lease_seconds)
+            if job is None:
+                break
+            if self.executor.submit(job):
+                print(f"▶️ Worker {self.worker_id} started job {job.id} for {job.company_name}")
+                started += 1
+        return started
+
+    def submit(self, job_id: str) -> bool:
+        """Claim one specific pending job and run it here (inline mode). Returns False if it couldn't be claimed."""
+        job = self.db.claim_job_by_id(job_id, self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+        self.start_heartbeats()
+        # If the pool refuses it (shutting down), the lease runs out and another worker re-queues the job
+        return self.executor.submit(job)
+
+    def heartbeat(self):
+        """Extend the lease on every job this runner is executing; cancel the ones whose lease is gone"""
+        for job_id in self.executor.active_jobs():
+            if not self.db.heartbeat_job(job_id, self.worker_id, self.lease_seconds):
+                print(f"⚠️ Worker {self.worker_id} lost the lease on job {job_id}, cancelling it")
+                self.executor.cancel(job_id)
+
+    def _heartbeat_loop(self):
+        while not (self._stop.is_set() and self.executor.active_count() == 0):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"❌ Worker {self.worker_id} heartbeat failed: {e}")
+            time.sleep(self.lease_seconds / 4)
+
+    def start_heartbeats(self):
+        """Start the heartbeat thread once; it keeps going while running jobs drain after stop()"""
+        with self._heartbeats_lock:
+            if self._heartbeats_started:
+                return
+            self._heartbeats_started = True
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+
+    def run(self, drain_timeout: Optional[float] = DRAIN_TIMEOUT_SECONDS):
+        print(f"🚀 Worker {self.worker_id} started (max {self.executor.max_workers} concurrent jobs)")
+        self.start_heartbeats()
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"❌ Worker {self.worker_id} poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+        self.executor.shutdown(drain=True, timeout=drain_timeout)
+        print(f"✅ Worker {self.worker_id} stopped")
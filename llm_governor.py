@@ -0,0 +1,394 @@
+"""
+Process-wide governor for LLM calls.
+
+Every compiler call goes through one LLMGovernor, so concurrent questions and jobs share the
+organisation's rate limits instead of each client bursting on its own:
+
+- Requests and tokens are counted over a rolling minute. A call is admitted only if it fits under
+  TEARDOWN_LLM_RPM and TEARDOWN_LLM_TPM, using an estimate of its tokens that is corrected with
+  the real usage once the response arrives.
+- Waiting calls are admitted strictly by priority, then arrival order. Synthesis calls go first
+  (they finish a question), then simple questions, then document digests and map calls over chunks.
+- Concurrency adapts with AIMD: each success raises the in-flight limit by 1/limit, and a 429
+  halves it (at most once per second) and pauses all calls for Retry-After or a backoff. The
+  governor retries rate-limited calls itself, so the OpenAI client's own retries are disabled.
+- Transient failures (5xx, timeouts, dropped connections) free their slot and are retried after
+  a short backoff, as the client's retries used to do. Other errors are raised.
+
+With TEARDOWN_LLM_GOVERNOR_DB set to a SQLite path, the rolling window and the 429 pause are
+shared by every process using that file (e.g. several `python -m worker` processes), so the limits
+apply to all of them together. Priorities and the concurrency limit stay per process.
+
+    response = get_governor().call(lambda: llm.invoke(prompt), tokens=estimate, priority="map",
+                                   usage=lambda r: r.usage_metadata["total_tokens"])
+"""
+import os
+import time
+import heapq
+import random
+import sqlite3
+import threading
+import itertools
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import deadline
+from metrics import REGISTRY
+
+RPM_LIMIT = int(os.environ.get("TEARDOWN_LLM_RPM", "500"))
+TPM_LIMIT = int(os.environ.get("TEARDOWN_LLM_TPM", "200000"))
+MAX_CONCURRENCY = int(os.environ.get("TEARDOWN_LLM_CONCURRENCY", "8"))
+GOVERNOR_DB = os.environ.get("TEARDOWN_LLM_GOVERNOR_DB", "")
+RATE_LIMIT_RETRIES = int(os.environ.get("TEARDOWN_LLM_RATE_LIMIT_RETRIES", "5"))
+TRANSIENT_RETRIES = int(os.environ.get("TEARDOWN_LLM_TRANSIENT_RETRIES", "2"))
+
+WINDOW_SECONDS = 60.0
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+DECREASE_INTERVAL_SECONDS = 1.0
+# Other processes can free capacity at any time, so a shared ledger is re-checked at least this often
+SHARED_POLL_SECONDS = 0.5
+
+PRIORITIES = {"synthesis": 0, "simple": 1, "digest": 2, "map": 3}
+DEFAULT_PRIORITY = 1
+
+LLM_RATE_LIMITED = REGISTRY.counter("teardown_llm_rate_limited_total", "LLM calls answered with a 429", ("priority",))
+LLM_ADMISSION_WAIT = REGISTRY.histogram(
+    "teardown_llm_admission_wait_seconds", "Time LLM calls waited for the governor", ("priority",)
+)
+LLM_GOVERNOR_STATE = REGISTRY.gauge("teardown_llm_governor", "LLM governor queue and window state", ("field",))
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    """429 from the OpenAI client (RateLimitError) or anything else reporting that status"""
+    if type(error).__name__ == "RateLimitError":
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+# Exception names the OpenAI client, httpx and requests use for failures worth another attempt
+_TRANSIENT_ERRORS = {
+    "APITimeoutError", "APIConnectionError", "InternalServerError", "ServiceUnavailableError",
+    "Timeout", "ReadTimeout", "ConnectTimeout", "ConnectError", "RemoteProtocolError"
+}
+
+
+def is_transient(error: BaseException) -> bool:
+    """5xx responses, timeouts and connection failures"""
+    if isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in _TRANSIENT_ERRORS:
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and 500 <= status < 600
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class _LocalLedger:
+    """Rolling window of admitted calls for this process"""
+
+    def __init__(self):
+        self._entries: deque = deque()  # [admitted_at, tokens, id]
+        self._by_id: Dict[int, list] = {}
+        self._ids = itertools.count(1)
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._entries and self._entries[0][0] <= now - WINDOW_SECONDS:
+            self._by_id.pop(self._entries.popleft()[2], None)
+
+    def try_admit(self, tokens: int, rpm: int, tpm: int) -> Tuple[Optional[int], float]:
+        """Record the call if it fits. Returns (entry id, 0) or (None, seconds until it might fit)."""
+        now = time.time()
+        with self._lock:
+            if now < self._cooldown_until:
+                return None, self._cooldown_until - now
+            self._expire(now)
+            used = sum(entry[1] for entry in self._entries)
+            if len(self._entries) >= rpm or (self._entries and used + tokens > tpm):
+                return None, self._entries[0][0] + WINDOW_SECONDS - now
+            entry = [now, tokens, next(self._ids)]
+            self._entries.append(entry)
+            self._by_id[entry[2]] = entry
+            return entry[2], 0.0
+
+    def settle(self, entry_id: int, tokens: int):
+        with self._lock:
+            entry = self._by_id.get(entry_id)
+            if entry is not None:
+                entry[1] = tokens
+
+    def cool_down(self, seconds: float):
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.time() + seconds)
+
+    def usage(self) -> Dict[str, float]:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            return {
+                "window_requests": len(self._entries),
+                "window_tokens": sum(entry[1] for entry in self._entries),
+                "cooldown_s": round(max(0.0, self._cooldown_until - now), 3)
+            }
+
+
+class _SQLiteLedger:
+    """Rolling window shared by every process that points at the same SQLite file"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_usage (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    admitted_at REAL NOT NULL,
+                    tokens INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_admitted ON llm_usage (admitted_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cooldown (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    until REAL NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO llm_cooldown (id, until) VALUES (1, 0)")
+            conn.commit()
+
+    def try_admit(self, tokens: int, rpm: int, tpm: int) -> Tuple[Optional[int], float]:
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            # The write lock up front makes check-then-insert atomic across processes
+            conn.execute("BEGIN IMMEDIATE")
+            until = conn.execute("SELECT until FROM llm_cooldown WHERE id = 1").fetchone()[0]
+            if now < until:
+                conn.execute("COMMIT")
+                return None, until - now
+            conn.execute("DELETE FROM llm_usage WHERE admitted_at <= ?", (now - WINDOW_SECONDS,))
+            count, used, oldest = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(admitted_at) FROM llm_usage"
+            ).fetchone()
+            if count >= rpm or (count and used + tokens > tpm):
+                conn.execute("COMMIT")
+                return None, oldest + WINDOW_SECONDS - now
+            entry_id = conn.execute(
+                "INSERT INTO llm_usage (admitted_at, tokens) VALUES (?, ?)", (now, tokens)
+            ).lastrowid
+            conn.execute("COMMIT")
+            return entry_id, 0.0
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def settle(self, entry_id: int, tokens: int):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.execute("UPDATE llm_usage SET tokens = ? WHERE id = ?", (tokens, entry_id))
+            conn.commit()
+
+    def cool_down(self, seconds: float):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.execute("UPDATE llm_cooldown SET until = MAX(until, ?) WHERE id = 1", (time.time() + seconds,))
+            conn.commit()
+
+    def usage(self) -> Dict[str, float]:
+        now = time.time()
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            count, used = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM llm_usage WHERE admitted_at > ?", (now - WINDOW_SECONDS,)
+            ).fetchone()
+            until = conn.execute("SELECT until FROM llm_cooldown WHERE id = 1").fetchone()[0]
+        return {"window_requests": count, "window_tokens": used, "cooldown_s": round(max(0.0, until - now), 3)}
+
+
+class LLMGovernor:
+    """Admits LLM calls by priority under RPM/TPM limits with an AIMD concurrency limit. Thread-safe."""
+
+    def __init__(self, rpm: int = RPM_LIMIT, tpm: int = TPM_LIMIT, max_concurrency: int = MAX_CONCURRENCY,
+                 db_path: str = GOVERNOR_DB, rate_limit_retries: int = RATE_LIMIT_RETRIES,
+                 transient_retries: int = TRANSIENT_RETRIES):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.rate_limit_retries = rate_limit_retries
+        self.transient_retries = transient_retries
+        self.ledger = _SQLiteLedger(db_path) if db_path else _LocalLedger()
+        self.shared = bool(db_path)
+
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._last_decrease = 0.0
+        self._consecutive_limits = 0
+        self._queue: list = []  # heap of (priority rank, seq, phase label)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def call(self, fn: Callable[[], Any], tokens: int, priority="simple",
+             usage: Optional[Callable[[Any], int]] = None) -> Any:
+        """
+        Run fn once admitted. tokens is the estimated total (prompt + completion) for the call;
+        usage(result) gives the real count to settle the window with. Rate-limited calls are
+        retried after the shared pause, transient failures after a backoff; other errors are raised.
+        """
+        rank = PRIORITIES.get(priority, DEFAULT_PRIORITY) if isinstance(priority, str) else int(priority)
+        label = priority if isinstance(priority, str) else str(rank)
+        # A call bigger than the whole budget could never fit; let it through alone instead
+        tokens = max(1, min(int(tokens), self.tpm))
+
+        attempt = 0
+        transient = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            entry_id = self._acquire(tokens, rank, label)
+            LLM_ADMISSION_WAIT.observe(time.perf_counter() - start, priority=label)
+            try:
+                result = fn()
+            except Exception as e:
+                limited = is_rate_limit(e)
+                self._release(entry_id, tokens, rate_limited=limited, retry_after=_retry_after(e) if limited else None,
+                              succeeded=False)
+                if limited:
+                    LLM_RATE_LIMITED.inc(priority=label)
+                    if attempt <= self.rate_limit_retries:
+                        print(f"🚦 LLM rate limited, retrying ({attempt}/{self.rate_limit_retries}) at concurrency {int(self.limit)}")
+                        continue
+                elif is_transient(e) and transient < self.transient_retries:
+                    transient += 1
+                    # The slot is already free; only this call waits, and never past its deadline
+                    backoff = BACKOFF_SECONDS * (2 ** (transient - 1))
+                    print(f"🔁 LLM call failed ({type(e).__name__}), retrying ({transient}/{self.transient_retries})")
+                    if deadline.sleep(random.uniform(backoff / 2, backoff)):
+                        continue
+                raise
+            used = usage(result) if usage else None
+            self._release(entry_id, used or tokens)
+            return result
+
+    def _acquire(self, tokens: int, rank: int, label: str) -> int:
+        key = (rank, next(self._seq), label)
+        with self._cond:
+            heapq.heappush(self._queue, key)
+        try:
+            while True:
+                with self._cond:
+                    deadline.check("an LLM call was admitted")
+                    if not (self._queue[0] == key and self.in_flight < max(1, int(self.limit))):
+                        self._cond.wait(self._wait_seconds(None))
+                        continue
+                    # Hold the slot while the ledger is asked, so the lock isn't held during its I/O
+                    self.in_flight += 1
+
+                # The shared ledger is a SQLite transaction that can wait on other processes; only
+                # this call waits for it, not every caller queued on the lock
+                entry_id, retry_in = None, None
+                try:
+                    entry_id, retry_in = self.ledger.try_admit(tokens, self.rpm, self.tpm)
+                finally:
+                    with self._cond:
+                        if entry_id is not None:
+                            self._queue.remove(key)
+                            heapq.heapify(self._queue)
+                        else:
+                            self.in_flight -= 1
+                        self._cond.notify_all()
+                if entry_id is not None:
+                    return entry_id
+
+                with self._cond:
+                    self._cond.wait(self._wait_seconds(retry_in))
+        except BaseException:
+            with self._cond:
+                if key in self._queue:
+                    self._queue.remove(key)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+            raise
+
+    def _wait_seconds(self, retry_in: Optional[float]) -> Optional[float]:
+        """How long a queued call sleeps before checking again (None: until notified)"""
+        wait = SHARED_POLL_SECONDS if self.shared else None
+        if retry_in is not None:
+            wait = min(retry_in, wait) if wait is not None else retry_in
+        left = deadline.remaining()
+        if left is not None:
+            wait = min(wait, left) if wait is not None else left
+        return max(wait, 0.01) if wait is not None else None
+
+    def _release(self, entry_id: int, tokens: int, rate_limited: bool = False, retry_after: Optional[float] = None,
+                 succeeded: bool = True):
+        self.ledger.settle(entry_id, tokens)
+        if rate_limited:
+            with self._cond:
+                now = time.monotonic()
+                self.rate_limited += 1
+                self._consecutive_limits += 1
+                # Multiplicative decrease, once per interval so a burst of 429s from one overshoot counts once
+                if now - self._last_decrease >= DECREASE_INTERVAL_SECONDS:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._last_decrease = now
+                backoff = BACKOFF_SECONDS * (2 ** min(self._consecutive_limits - 1, 6))
+                pause = retry_after if retry_after is not None else random.uniform(backoff / 2, backoff)
+            # Record the pause (outside the lock) before the slot is freed, so no waiter slips in first
+            self.ledger.cool_down(min(MAX_BACKOFF_SECONDS, pause))
+        with self._cond:
+            self.in_flight -= 1
+            if succeeded:
+                # Additive increase: about +1 per `limit` successful calls
+                self._consecutive_limits = 0
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue and window state for monitoring"""
+        with self._cond:
+            queued: Dict[str, int] = {}
+            for _, _, label in self._queue:
+                queued[label] = queued.get(label, 0) + 1
+            state = {
+                "rpm_limit": self.rpm,
+                "tpm_limit": self.tpm,
+                "concurrency_limit": round(self.limit, 2),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "queued": sum(queued.values()),
+                "queued_by_priority": queued,
+                "rate_limited_total": self.rate_limited,
+                "shared": self.shared
+            }
+        state.update(self.ledger.usage())
+        return state
+
+
+_governor: Optional[LLMGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> LLMGovernor:
+    """The process-wide governor"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = LLMGovernor()
+        return _governor
+
+
+def _gauge_values():
+    state = get_governor().snapshot()
+    return {(field,): state[field] for field in
+            ("concurrency_limit", "in_flight", "queued", "window_requests", "window_tokens", "cooldown_s")}
+
+
+LLM_GOVERNOR_STATE.set_function(_gauge_values)
@@ -0,0 +1,260 @@
+import time
+import bisect
+import sqlite3
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default latency buckets in seconds, from fast SQLite queries up to multi-minute jobs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs += [f'{name}="{_escape(value)}"' for name, value in extra.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Point-in-time value. Either set() directly or computed at scrape time via set_function()."""
+    type_name = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._function: Optional[Callable[[], Dict[Tuple, float]]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], Dict[Tuple, float]]):
+        """function returns {label_values_tuple: value}; use {(): value} for an unlabelled gauge"""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                items = list(self._function().items())
+            except Exception as e:
+                print(f"Warning: could not collect gauge {self.name}: {e}")
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile from bucket counts (upper bound of the bucket it falls in)"""
+        state = self._values.get(self._key(labels))
+        if not state or not state[-1]:
+            return None
+        target = q * state[-1]
+        cumulative = 0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def _samples(self):
+        lines = []
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key, {"le": "+Inf"})
+            lines.append(f"{self.name}_bucket{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class Registry:
+    """In-process metrics registry rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Metrics shared across modules. Module-specific ones are registered where they're used.
+JOBS_TOTAL = REGISTRY.counter("teardown_jobs_total", "Teardown jobs by final state", ("status",))
+JOB_DURATION = REGISTRY.histogram("teardown_job_duration_seconds", "Wall time of completed and failed jobs", ("status",))
+SOURCE_RUNS = REGISTRY.counter("teardown_source_runs_total", "Scraper tool runs by source and outcome", ("source", "outcome"))
+SOURCE_DURATION = REGISTRY.histogram("teardown_source_duration_seconds", "Scraper tool wall time", ("source",))
+HTTP_REQUESTS = REGISTRY.counter("teardown_http_requests_total", "Outbound HTTP requests by host and status class", ("host", "status"))
+HTTP_DURATION = REGISTRY.histogram("teardown_http_request_duration_seconds", "Outbound HTTP request latency", ("host",))
+HTTP_CACHE = REGISTRY.counter("teardown_http_cache_requests_total", "Cached HTTP lookups by result (hit/miss)", ("cache", "result"))
+DEADLINE_CUTOFFS = REGISTRY.counter(
+    "teardown_deadline_cutoffs_total", "Sources, questions and jobs cut short by a time budget", ("stage",)
+)
+CORPUS_TOKENS = REGISTRY.counter("teardown_corpus_tokens_total", "Estimated source tokens before and after corpus cleaning", ("stage",))
+MAP_CHUNKS_PER_QUESTION = REGISTRY.histogram(
+    "teardown_map_chunks_per_question", "Chunks mapped for one question, by why the map loop stopped", ("stop",),
+    buckets=(1, 2, 3, 5, 8, 13, 21)
+)
+DIGEST_CACHE = REGISTRY.counter("teardown_digest_cache_total", "Document digest lookups by result (hit/miss)", ("result",))
+LLM_CALLS = REGISTRY.counter("teardown_llm_calls_total", "LLM calls by phase, model and outcome", ("phase", "model", "outcome"))
+LLM_TOKENS = REGISTRY.counter("teardown_llm_tokens_total", "LLM tokens by phase, model and direction", ("phase", "model", "direction"))
+LLM_DURATION = REGISTRY.histogram("teardown_llm_call_duration_seconds", "LLM call latency", ("phase", "model"))
+LLM_CALLS_PER_TEARDOWN = REGISTRY.histogram(
+    "teardown_llm_calls_per_teardown", "LLM calls made for one teardown", (),
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 400)
+)
+LLM_TOKENS_PER_TEARDOWN = REGISTRY.histogram(
+    "teardown_llm_tokens_per_teardown", "LLM tokens spent on one teardown", (),
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_000_000, 5_000_000)
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "teardown_db_query_duration_seconds", "SQLite operation latency", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+DB_LOCK_ERRORS = REGISTRY.counter("teardown_db_lock_errors_total", "SQLite 'database is locked' errors by operation", ("operation",))
+API_REQUEST_DURATION = REGISTRY.histogram(
+    "teardown_api_request_duration_seconds", "Flask request latency by endpoint", ("endpoint", "method", "status")
+)
+
+
+def timed_db(operation: str):
+    """Decorator for Database methods: observe their latency under the given operation name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with DB_QUERY_DURATION.time(operation=operation):
+                try:
+                    return func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if "locked" in str(e):
+                        DB_LOCK_ERRORS.inc(operation=operation)
+                    raise
+        return wrapper
+
+    return decorator
@@ -0,0 +1,53 @@
+"""
+Per-question, per-phase model routing for the teardown compiler.
+
+Every LLM call happens in a phase: "simple" (one-shot answer for basic fields like the company
+name), "digest" (structured extraction of one document, shared by every question), "map" (pull
+what's relevant out of one chunk) or "synthesis" (combine the extracts into the answer). The model for a call is, in order of precedence:
+
+1. the question's "models" in question.json, e.g. {"synthesis": "strong"}; "*" covers every phase
+2. TEARDOWN_MODEL_SIMPLE / TEARDOWN_MODEL_DIGEST / TEARDOWN_MODEL_MAP / TEARDOWN_MODEL_SYNTHESIS
+3. the "fast" tier
+
+Values are a tier name ("fast" -> TEARDOWN_MODEL_FAST, "strong" -> TEARDOWN_MODEL_STRONG) or a
+model name used as is. So the bulk of the calls (map over chunks, simple fields) go to the cheap
+model, and only the questions that ask for it pay for the strong one.
+
+TEARDOWN_LLM_PROVIDER=local replaces every model with the deterministic offline stand-in from
+benchmarks/fake_llm.py (named after the routed model), so the pipeline runs without an API key.
+"""
+import os
+from typing import Dict
+
+LLM_PROVIDER = os.environ.get("TEARDOWN_LLM_PROVIDER", "openai")
+# Per-request timeout for the chat model, so a stalled completion can't outlive the job deadline
+LLM_TIMEOUT_SECONDS = float(os.environ.get("TEARDOWN_LLM_TIMEOUT", "120"))
+
+MODEL_TIERS = {
+    "fast": os.environ.get("TEARDOWN_MODEL_FAST", "gpt-4o-mini"),
+    "strong": os.environ.get("TEARDOWN_MODEL_STRONG", "gpt-4o"),
+}
+PHASE_MODELS = {
+    phase: os.environ.get(f"TEARDOWN_MODEL_{phase.upper()}", "fast")
+    for phase in ("simple", "digest", "map", "synthesis")
+}
+
+
+def resolve_model(question: Dict, phase: str) -> str:
+    """Model name for one call of `question` in `phase`"""
+    routes = question.get("models") or {}
+    choice = routes.get(phase) or routes.get("*") or PHASE_MODELS.get(phase, "fast")
+    return MODEL_TIERS.get(choice, choice)
+
+
+def create_chat_model(model: str):
+    """Chat client for a routed model name"""
+    if LLM_PROVIDER == "local":
+        from benchmarks.fake_llm import FakeChatModel
+        return FakeChatModel(model=model)
+
+    # LangChain's OpenAI client is slow to import, so load it only when a model is first needed
+    from langchain_community.chat_models import ChatOpenAI
+    # The LLM governor retries calls itself: 429s with a shared pause for every call, and 5xx,
+    # timeouts and connection errors with a backoff, so the client's own retries are off
+    return ChatOpenAI(temperature=0, model=model, request_timeout=LLM_TIMEOUT_SECONDS, max_retries=0)
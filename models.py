@@ -20,6 +20,11 @@ class TeardownJob:
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     output_folder: Optional[str] = None
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    attempts: int = 0
+    partial_reason: Optional[str] = None  # set when the job finished with partial answers (e.g. its deadline hit)
+    template_version: Optional[str] = None  # version of question.json and the prompt templates the job ran with
     
     def to_dict(self):
         return {
@@ -31,7 +36,23 @@ class TeardownJob:
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'error_message': self.error_message,
-            'output_folder': self.output_folder
+            'output_folder': self.output_folder,
+            'worker_id': self.worker_id,
+            'attempts': self.attempts,
+            'partial': self.partial_reason is not None,
+            'partial_reason': self.partial_reason,
+            'template_version': self.template_version
+        }
+    
+    def to_status_dict(self):
+        """Compact record for status polling"""
+        return {
+            'id': self.id,
+            'status': self.status.value,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'error_message': self.error_message,
+            'partial_reason': self.partial_reason
         }
 
 @dataclass
@@ -40,17 +61,20 @@ class Teardown:
     job_id: str
     company_name: str
     company_url: str
-    content: str
+    content: Optional[str]  # None until loaded from the blob store
     created_at: datetime
-    file_path: str
+    content_hash: Optional[str] = None
+    seq: Optional[int] = None  # teardowns table version at insert, used as the delta-sync cursor
     
     def to_dict(self):
-        return {
+        data = {
             'id': self.id,
             'job_id': self.job_id,
             'company_name': self.company_name,
             'company_url': self.company_url,
-            'content': self.content,
             'created_at': self.created_at.isoformat(),
-            'file_path': self.file_path
-        }
\ No newline at end of file
+            'content_hash': self.content_hash
+        }
+        if self.content is not None:
+            data['content'] = self.content
+        return data
\ No newline at end of file
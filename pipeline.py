@@ -0,0 +1,317 @@
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from dotenv import load_dotenv
+
+# Set OpenAI API key as environment variable
+load_dotenv()
+
+from database import Database, LeaseLostError
+from search_index import SearchIndex
+from tracing import get_tracer, release_tracer, load_trace, summarize_trace
+import deadline
+from metrics import JOBS_TOTAL, JOB_DURATION, LLM_CALLS_PER_TEARDOWN, LLM_TOKENS_PER_TEARDOWN, DEADLINE_CUTOFFS
+from models import TeardownJob, Teardown, JobStatus
+from utils import generate_unique_id, create_job_folders
+from scheduler import TeardownDAG, CUT_SHORT, TIMED_OUT
+from template_registry import get_templates
+from src.utils.corpus_store import CorpusStore
+
+# "dag" starts each question as soon as the sources it needs are scraped (see scheduler.py);
+# "crew" runs every scraper and then every question through crewAI agents in order.
+PIPELINE_MODE = os.environ.get("TEARDOWN_PIPELINE", "dag")
+
+def record_job_metrics(job: TeardownJob):
+    """Record final state, duration and LLM cost of a finished job"""
+    JOBS_TOTAL.inc(status=job.status.value)
+    if job.started_at and job.completed_at:
+        JOB_DURATION.observe((job.completed_at - job.started_at).total_seconds(), status=job.status.value)
+    
+    if job.status == JobStatus.COMPLETED and job.output_folder:
+        llm_calls = 0
+        llm_tokens = 0
+        for name, entry in summarize_trace(load_trace(job.output_folder)).items():
+            if entry.get("kind") == "llm":
+                llm_calls += entry["count"]
+                llm_tokens += entry.get("total_tokens", 0)
+        LLM_CALLS_PER_TEARDOWN.observe(llm_calls)
+        LLM_TOKENS_PER_TEARDOWN.observe(llm_tokens)
+
+def _call_tool(tool, **kwargs):
+    """crewAI tools wrap the original function; call it directly, without an agent deciding the arguments"""
+    return getattr(tool, "func", tool)(**kwargs)
+
+def source_runners(company_name: str, company_url: str, output_folder: str) -> Dict[str, Callable[[], str]]:
+    """Scraper for each source name, bound to one company and job folder"""
+    from src.tools import spacenews_scraper, globalnewswire_tool, serpapi_tool
+    from src.tools.companynews_scraper import CompanyWebsiteScraper
+    from src.tools.governmentContract_tool import fetch_contracts_by_company
+
+    return {
+        "company_website": lambda: _call_tool(CompanyWebsiteScraper, company_url=company_url, output_folder=output_folder),
+        "spacenews": lambda: _call_tool(spacenews_scraper.SpaceNewsScraper, company=company_name, output_folder=output_folder),
+        "usaspending": lambda: _call_tool(fetch_contracts_by_company, company_name=company_name, output_folder=output_folder),
+        "globenewswire": lambda: _call_tool(globalnewswire_tool.GlobeNewswireScraper, company=company_name, output_folder=output_folder),
+        "serpapi": lambda: _call_tool(serpapi_tool.serpapi_scraper_to_txt, company=company_name, output_folder=output_folder),
+    }
+
+def build_job_dag(company_name: str, company_url: str, output_folder: str,
+                  questions_path: str = "template/question.json") -> TeardownDAG:
+    """Scrapers and per-question compiler calls for one job, wired by the dependencies in question.json"""
+    from src.tools.newTeardownCompilerTool import compile_teardown_rag
+
+    questions = get_templates(questions_path=questions_path).questions
+
+    def has_data(source: str) -> bool:
+        return any(document.source == source for document in CorpusStore(output_folder).documents())
+
+    return TeardownDAG(
+        sources=source_runners(company_name, company_url, output_folder),
+        questions=questions,
+        answer=lambda question_id: _call_tool(
+            compile_teardown_rag, company_name=company_name, output_folder=output_folder, question_id=question_id
+        ),
+        has_data=has_data,
+        source_budget=deadline.SOURCE_BUDGET_SECONDS,
+        question_budget=deadline.QUESTION_BUDGET_SECONDS
+    )
+
+def run_dag_pipeline(job: TeardownJob, output_folder: str) -> Tuple[Dict, Dict[str, List[str]]]:
+    """
+    Scrape and answer with the dataflow scheduler.
+    Returns attributes for the job span and the reasons answers are partial, by question id.
+    """
+    summary = build_job_dag(job.company_name, job.company_url, output_folder).run()
+    print(f"🧭 DAG finished in {summary['wall_s']}s: sources {summary['sources']}")
+    attrs = {
+        "pipeline": "dag",
+        "tasks": len(summary["sources"]) + sum(summary["question_runs"].values()),
+        "failed_sources": len([s for s in summary["sources"].values() if s == "failed"]),
+        "question_reruns": sum(max(0, runs - 1) for runs in summary["question_runs"].values())
+    }
+
+    cut = [name for name, outcome in summary["sources"].items() if outcome in (CUT_SHORT, TIMED_OUT)]
+    if summary["partial"]:
+        reasons = []
+        if cut:
+            reasons.append(f"sources cut short by the time budget: {', '.join(cut)}")
+        if summary["unanswered"]:
+            reasons.append(f"{len(summary['unanswered'])} questions not answered before the deadline")
+        reasons.append(f"{len(summary['partial'])} of {len(summary['question_runs'])} answers partial")
+        attrs["partial_reason"] = "; ".join(reasons)
+        if cut or summary["unanswered"]:
+            DEADLINE_CUTOFFS.inc(stage="job")
+    return attrs, summary["partial"]
+
+def run_crew_pipeline(job: TeardownJob, output_folder: str) -> Tuple[Dict, Dict[str, List[str]]]:
+    """
+    Scrape and answer with crewAI agents, all sources first.
+    Returns attributes for the job span and (always empty) partial-answer reasons.
+    """
+    from crewai import Crew, Task
+    from src.agents.agent import spacenews_agent, companynews_agent, contract_agent, globalnewswire_agent, serpapi_agent, teardown_agent
+
+    # ===== THE KEY CHANGE: Pass output_folder to ALL tasks =====
+
+    # Create dynamic tasks with job-specific output folder
+    dynamic_companynews_task = Task(
+        description=f"Scrape {job.company_name}'s website ({job.company_url}) and extract all useful text-based content. Save files to {output_folder}.",
+        expected_output="A .txt file with structured information scraped from the company's homepage and subpages.",
+        agent=companynews_agent,
+        # ADD THIS - pass the job-specific folder to the agent
+        inputs={
+            "company_name": job.company_name,
+            "company_url": job.company_url,
+            "output_folder": output_folder  # <-- This ensures data goes to job-specific folder
+        }
+    )
+
+    dynamic_spacenews_task = Task(
+        description=f"Find the most interesting recent developments about {job.company_name} in the space sector and compile them in a txt file. Save files to {output_folder}.",
+        expected_output="A .txt file with recent space industry news related to the company.",
+        agent=spacenews_agent,
+        inputs={
+            "company_name": job.company_name,
+            "output_folder": output_folder  # <-- Job-specific folder
+        }
+    )
+
+    dynamic_government_contract_task = Task(
+        description=f"Use the USAspending API to find government contracts awarded to {job.company_name} and save them to a text file. Save files to {output_folder}.",
+        expected_output="A .txt file with recent contract/award news.",
+        agent=contract_agent,
+        inputs={
+            "company_name": job.company_name,
+            "output_folder": output_folder  # <-- Job-specific folder
+        }
+    )
+
+    dynamic_globalnewswire_task = Task(
+        description=f"Find the most interesting recent developments about {job.company_name} in the deep tech sector and compile them in a txt file. Save files to {output_folder}.",
+        expected_output="A .txt file with recent deep tech industry news related to the company.",
+        agent=globalnewswire_agent,
+        inputs={
+            "company_name": job.company_name,
+            "output_folder": output_folder  # <-- Job-specific folder
+        }
+    )
+
+    dynamic_serpapi_task = Task(
+        description=f"Find the most interesting recent developments about {job.company_name} on the internet and compile them in a txt file. Save files to {output_folder}.",
+        expected_output="A .txt file with recent news related to the company.",
+        agent=serpapi_agent,
+        inputs={
+            "company_name": job.company_name,
+            "output_folder": output_folder  # <-- Job-specific folder
+        }
+    )
+
+    # Create teardown tasks with job-specific folder
+    print(f"DEBUG: Loading questions from template/question.json")
+    questions = get_templates().questions
+
+    print(f"DEBUG: Loaded {len(questions)} questions")
+
+    teardown_tasks_individual = []
+
+    for i, q in enumerate(questions):
+        print(f"DEBUG: Creating task {i+1} for question: {q.get('id', 'NO_ID')}")
+        task = Task(
+            description=f"Use the compile_teardown_rag tool to answer this specific question about {job.company_name}: {q['title']}. Question ID: {q['id']}. Instruction: {q['instruction']}",
+            expected_output=f"A comprehensive answer to question '{q['title']}' saved to the teardown file.",
+            agent=teardown_agent,
+            inputs={
+                "company_name": job.company_name,
+                "output_folder": output_folder,  # <-- Job-specific folder
+                "question_id": q["id"]
+            }
+        )
+        teardown_tasks_individual.append(task)
+
+    print(f"DEBUG: Created {len(teardown_tasks_individual)} teardown tasks")
+
+    # Create and run crew with job-specific tasks
+    all_tasks = [
+        dynamic_companynews_task, 
+        dynamic_spacenews_task, 
+        dynamic_government_contract_task,
+        dynamic_globalnewswire_task,
+        dynamic_serpapi_task  # Use the dynamic version
+    ] + teardown_tasks_individual
+
+    crew = Crew(
+        agents=[companynews_agent, spacenews_agent, contract_agent, globalnewswire_agent, serpapi_agent, teardown_agent],
+        tasks=all_tasks,
+        verbose=True
+    )
+
+    # Run crew with job-specific inputs
+    inputs = {
+        "company_name": job.company_name,
+        "company_url": job.company_url,
+        "output_folder": output_folder,  # <-- Pass job-specific folder to all tasks
+    }
+
+    print(f"🚀 Starting crew with {len(all_tasks)} tasks")
+    print(f"📁 All tasks will use folder: {output_folder}")
+    result = crew.kickoff(inputs=inputs)
+    return {"pipeline": "crew", "tasks": len(all_tasks), "crew_result_chars": len(str(result))}, {}
+
+def run_single_teardown(job: TeardownJob, db: Database, search_index: SearchIndex):
+    """Run the full scrape + teardown pipeline for one job and store the result"""
+    # The compiler (and crewAI behind it) is a heavy import; load it when the first job runs
+    from src.tools.newTeardownCompilerTool import compile_final_teardown
+
+    try:
+        # Update job status to running
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+        # Answers and caches made for this job can be matched to the templates they were made with
+        job.template_version = get_templates().version
+        db.update_job(job)
+        
+        # Create job-specific folders (KEEP THIS AS IS)
+        output_folder = create_job_folders(job.id)
+        job.output_folder = output_folder
+        db.update_job(job)
+
+        with get_tracer(output_folder, trace_id=job.id).span("job", kind="job", company_name=job.company_name,
+                                                             template_version=job.template_version) as job_span:
+            print(f"Company Name: {job.company_name}")
+            print(f"Output Folder: {output_folder}")  # Should be something like "output/job_20250807_115103_121af0e2"
+            
+            # Scraping and answering share the job's time budget; compiling and saving always run
+            with deadline.budget(deadline.JOB_DEADLINE_SECONDS):
+                if PIPELINE_MODE == "crew":
+                    pipeline_attrs, partial = run_crew_pipeline(job, output_folder)
+                else:
+                    pipeline_attrs, partial = run_dag_pipeline(job, output_folder)
+            if deadline.cancelled():
+                raise LeaseLostError(f"Job {job.id} was cancelled after its worker lost the lease")
+            job.partial_reason = pipeline_attrs.get("partial_reason")
+            if job.partial_reason:
+                print(f"⚠️ Partial teardown for {job.company_name}: {job.partial_reason}")
+        
+            # Assemble the teardown markdown once from the answer store - this is the only read
+            teardown_content = compile_final_teardown(job.company_name, output_folder, notes=partial)
+        
+            # Record what the pipeline produced on the job span instead of dumping it to stdout
+            output_files = [f for f in os.listdir(output_folder) if os.path.isfile(os.path.join(output_folder, f))]
+            job_span.set(
+                output_files=len(output_files),
+                bytes=sum(os.path.getsize(os.path.join(output_folder, f)) for f in output_files),
+                **pipeline_attrs
+            )
+        
+            if not teardown_content.strip():
+                teardown_content = f"# Company Teardown: {job.company_name}\n\nTeardown file not generated properly."
+        
+            print(f"✅ Teardown completed. File size: {len(teardown_content)} characters")
+        
+            # Create teardown record
+            teardown = Teardown(
+                id=generate_unique_id(),
+                job_id=job.id,
+                company_name=job.company_name,
+                company_url=job.company_url,
+                content=teardown_content,
+                created_at=datetime.now()
+            )
+        
+            # Store the teardown and mark the job completed together, only while this worker holds it
+            job.status = JobStatus.COMPLETED
+            job.completed_at = datetime.now()
+            db.complete_job(job, teardown)
+            record_job_metrics(job)
+        
+            # Incrementally add this job's sections and sources to the full-text index
+            try:
+                search_index.index_job(job, teardown)
+            except Exception as e:
+                print(f"⚠️ Search indexing failed for {job.company_name}: {e}")
+        
+            print(f"✅ Teardown completed for {job.company_name}")
+            
+    except LeaseLostError as e:
+        # The job was re-queued to another worker; leave its status and results to that worker
+        print(f"🛑 Abandoning job {job.id} for {job.company_name}: {e}")
+    
+    except Exception as e:
+        # Update job status to failed
+        job.status = JobStatus.FAILED
+        job.completed_at = datetime.now()
+        job.error_message = str(e)
+        try:
+            db.update_job(job)
+        except LeaseLostError:
+            print(f"🛑 Job {job.id} failed after its worker lost the lease; not recording the failure")
+            return
+        record_job_metrics(job)
+        
+        print(f"❌ Teardown failed for {job.company_name}: {e}")
+        import traceback
+        traceback.print_exc()
+    
+    finally:
+        if job.output_folder:
+            release_tracer(job.output_folder)
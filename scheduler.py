@@ -0,0 +1,249 @@
+"""
+Dataflow scheduler for one teardown job.
+
+Instead of running every scraper and then every question, each question declares in
+question.json which sources it needs before it can start ("sources") and which ones can improve
+it later ("optional_sources"). Scrapers run in parallel, and a question is queued for the LLM
+pool as soon as its required sources have finished, so answers that only need the company
+website don't wait for rate-limited news scrapers. If an optional source delivers data after a
+question was answered, the question is answered again, at most once per batch of new sources.
+A question without "sources" waits for every source.
+
+Time budgets (deadline.py) bound the whole graph. Each source runs under its own budget and
+stops fetching when it runs out. A source that still hasn't returned CANCEL_GRACE_SECONDS later is
+abandoned, and the questions waiting on it go ahead with the corpus that exists. After the job
+deadline, questions that haven't started are skipped and running ones are abandoned. run()
+reports which sources were cut short and which answers are partial because of that.
+
+    dag = TeardownDAG(sources={"company_website": run_website, ...}, questions=questions,
+                      answer=lambda question_id: ..., has_data=lambda source: ...)
+    summary = dag.run()
+"""
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import deadline
+from metrics import DEADLINE_CUTOFFS
+
+SOURCE_WORKERS = int(os.environ.get("TEARDOWN_SOURCE_WORKERS", "5"))
+QUESTION_WORKERS = int(os.environ.get("TEARDOWN_QUESTION_WORKERS", "4"))
+
+# Time a source or question gets past its budget to stop on its own before it is abandoned
+CANCEL_GRACE_SECONDS = float(os.environ.get("TEARDOWN_CANCEL_GRACE", "5"))
+
+# Source outcomes in run()'s summary
+DONE, FAILED, CUT_SHORT, TIMED_OUT = "done", "failed", "cut_short", "timed_out"
+
+# Returned by a question that was skipped because the job deadline had passed
+_SKIPPED = object()
+
+
+@dataclass
+class QuestionNode:
+    id: str
+    sources: Set[str]
+    optional_sources: Set[str]
+    # Sources that had finished when the latest answer for this question started executing
+    answered_with: Set[str] = field(default_factory=set)
+    runs: int = 0
+    running: bool = False
+    dirty: bool = False
+    answered: bool = False
+
+
+def _submit(pool: ThreadPoolExecutor, fn: Callable, *args):
+    # Run in a copy of the caller's context so spans nest under the job span
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+class TeardownDAG:
+    """Runs source callables and question callables in dependency order with overlap"""
+
+    def __init__(self, sources: Dict[str, Callable[[], Any]], questions: List[dict],
+                 answer: Callable[[str], Any], has_data: Optional[Callable[[str], bool]] = None,
+                 source_workers: int = SOURCE_WORKERS, question_workers: int = QUESTION_WORKERS,
+                 source_budget: Optional[float] = None, question_budget: Optional[float] = None):
+        self.sources = sources
+        self.answer = answer
+        self.has_data = has_data or (lambda source: True)
+        self.source_workers = source_workers
+        self.question_workers = question_workers
+        self.source_budget = source_budget
+        self.question_budget = question_budget
+
+        all_sources = set(sources)
+        self.questions: Dict[str, QuestionNode] = {}
+        for q in questions:
+            declared = q.get("sources")
+            required = set(declared) & all_sources if declared is not None else set(all_sources)
+            optional = (set(q.get("optional_sources") or []) & all_sources) - required
+            self.questions[q["id"]] = QuestionNode(q["id"], required, optional)
+
+        self.finished_sources: Set[str] = set()
+        self.source_outcomes: Dict[str, str] = {}
+        # Guards finished_sources and answered_with, which question threads snapshot when they start
+        self._lock = threading.Lock()
+
+    def _ready(self, node: QuestionNode) -> bool:
+        # Nothing new starts after the job deadline; unstarted questions are reported as unanswered
+        return node.runs == 0 and not node.running and node.sources <= self.finished_sources and not deadline.expired()
+
+    def _start_question(self, pool: ThreadPoolExecutor, node: QuestionNode, pending: Dict):
+        node.running = True
+        node.dirty = False
+        future = _submit(pool, self._run_question, node)
+        pending[future] = ("question", node.id)
+
+    def _run_source(self, name: str) -> bool:
+        """Run one source under its budget. Returns True if the budget ran out, so it may have stopped early."""
+        with deadline.budget(self.source_budget):
+            self.sources[name]()
+            return deadline.expired()
+
+    def _run_question(self, node: QuestionNode):
+        # Past the job deadline a question that was still waiting for an LLM slot doesn't start
+        if deadline.expired():
+            return _SKIPPED
+        # A question may wait for a free LLM slot; it sees every source finished by the time it starts
+        with self._lock:
+            node.answered_with = set(self.finished_sources)
+        # The question budget is soft: it stops reading more data but still answers
+        with deadline.soft_budget(self.question_budget):
+            return self.answer(node.id)
+
+    def _hard_cutoff(self, kind: str, started: float, job_expires: Optional[float]) -> Optional[float]:
+        """Monotonic time after which a still-running source or question is abandoned"""
+        limits = [job_expires] if job_expires is not None else []
+        if kind == "source" and self.source_budget:
+            limits.append(started + self.source_budget)
+        return min(limits) + CANCEL_GRACE_SECONDS if limits else None
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the whole graph under the caller's job budget, if any. Returns per-source outcomes,
+        per-question run counts, questions left unanswered and the reasons answers are partial.
+        """
+        start = time.time()
+        job_expires = deadline.expires_at()
+        pending: Dict[Any, tuple] = {}
+        started: Dict[Any, float] = {}
+        abandoned = False
+        source_pool = ThreadPoolExecutor(max_workers=self.source_workers, thread_name_prefix="source")
+        question_pool = ThreadPoolExecutor(max_workers=self.question_workers, thread_name_prefix="question")
+        try:
+            for name in self.sources:
+                pending[_submit(source_pool, self._run_source, name)] = ("source", name)
+            # Questions that need no sources at all can start right away
+            for node in self.questions.values():
+                if self._ready(node):
+                    self._start_question(question_pool, node, pending)
+
+            while pending:
+                now = time.monotonic()
+                for future in pending:
+                    started.setdefault(future, now)
+                cutoffs = {future: self._hard_cutoff(pending[future][0], started[future], job_expires) for future in pending}
+                next_cutoff = min((c for c in cutoffs.values() if c is not None), default=None)
+                timeout = max(0.0, next_cutoff - now) if next_cutoff is not None else None
+
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, name = pending.pop(future)
+                    error = future.exception()
+                    if kind == "source":
+                        outcome = FAILED if error is not None else (CUT_SHORT if future.result() else DONE)
+                        self._source_finished(question_pool, name, outcome, error, pending)
+                    else:
+                        self._question_finished(question_pool, name, error, pending, future.result() if error is None else None)
+
+                # Whatever is still running past its cutoff is abandoned; its thread is left to finish on its own
+                now = time.monotonic()
+                for future in [f for f in pending if cutoffs.get(f) is not None and now >= cutoffs[f]]:
+                    kind, name = pending.pop(future)
+                    future.cancel()
+                    abandoned = True
+                    DEADLINE_CUTOFFS.inc(stage=kind)
+                    if kind == "source":
+                        print(f"⏱️ Abandoning source {name}: past its time budget")
+                        self._source_finished(question_pool, name, TIMED_OUT, None, pending)
+                    else:
+                        print(f"⏱️ Abandoning question {name}: past the job deadline")
+                        self.questions[name].running = False
+        finally:
+            source_pool.shutdown(wait=not abandoned, cancel_futures=abandoned)
+            question_pool.shutdown(wait=not abandoned, cancel_futures=abandoned)
+
+        unanswered = [node.id for node in self.questions.values() if not node.answered]
+        return {
+            "wall_s": round(time.time() - start, 3),
+            "sources": {name: self.source_outcomes.get(name, TIMED_OUT) for name in self.sources},
+            "question_runs": {node.id: node.runs for node in self.questions.values()},
+            "unanswered": unanswered,
+            "partial": self._partial_reasons(unanswered)
+        }
+
+    def _partial_reasons(self, unanswered: List[str]) -> Dict[str, List[str]]:
+        """Why each answer is incomplete: unanswered, or a source it uses was cut short or failed"""
+        cut = {name for name, outcome in self.source_outcomes.items() if outcome in (CUT_SHORT, TIMED_OUT)}
+        failed = {name for name, outcome in self.source_outcomes.items() if outcome == FAILED}
+        partial = {}
+        for node in self.questions.values():
+            uses = node.sources | node.optional_sources
+            reasons = []
+            if node.id in unanswered:
+                reasons.append("not answered before the job deadline")
+            if uses & cut:
+                reasons.append(f"sources cut short by the deadline: {', '.join(sorted(uses & cut))}")
+            if uses & failed:
+                reasons.append(f"sources that failed: {', '.join(sorted(uses & failed))}")
+            if reasons:
+                partial[node.id] = reasons
+        return partial
+
+    def _source_finished(self, pool: ThreadPoolExecutor, name: str, outcome: str,
+                         error: Optional[BaseException], pending: Dict):
+        if error is not None:
+            print(f"⚠️ Source {name} failed: {error}")
+        elif outcome == CUT_SHORT:
+            print(f"⏱️ Source {name} stopped at its time budget")
+            DEADLINE_CUTOFFS.inc(stage="source")
+        self.source_outcomes[name] = outcome
+        # An abandoned source may still be writing; questions don't wait for or re-run on it
+        delivered = outcome in (DONE, CUT_SHORT) and self.has_data(name)
+        with self._lock:
+            self.finished_sources.add(name)
+            missed = {
+                node.id for node in self.questions.values()
+                if (node.runs or node.running) and name in node.optional_sources and name not in node.answered_with
+            }
+
+        for node in self.questions.values():
+            if self._ready(node):
+                self._start_question(pool, node, pending)
+            elif delivered and node.id in missed:
+                # New data this question could use: refresh it once the current run (if any) is done
+                node.dirty = True
+                if not node.running:
+                    print(f"🔁 Re-answering {node.id}: new data from {name}")
+                    self._start_question(pool, node, pending)
+
+    def _question_finished(self, pool: ThreadPoolExecutor, question_id: str, error: Optional[BaseException],
+                           pending: Dict, result: Any = None):
+        node = self.questions[question_id]
+        node.running = False
+        if result is _SKIPPED:
+            print(f"⏱️ Skipped {'re-answering ' if node.answered else ''}{question_id}: job deadline reached")
+            DEADLINE_CUTOFFS.inc(stage="question")
+            return
+        node.runs += 1
+        node.answered = True
+        if error is not None:
+            print(f"❌ Question {question_id} failed: {error}")
+        if node.dirty and not deadline.expired():
+            print(f"🔁 Re-answering {question_id} with sources that arrived while it ran")
+            self._start_question(pool, node, pending)
@@ -0,0 +1,234 @@
+import os
+import re
+import html
+import sqlite3
+from typing import Dict, List, Optional
+
+from src.utils.corpus_store import CorpusStore
+from template_registry import get_templates
+
+SCOPES = ("all", "teardowns", "sources")
+
+# FTS5 wraps matches in these; they can't occur in indexed text, so the snippet is escaped first and
+# the markers become <mark> tags afterwards
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+
+
+def _highlight(snippet: Optional[str]) -> str:
+    """HTML-safe snippet with the matched terms in <mark>"""
+    return html.escape(snippet or "").replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over teardown sections and scraped source documents.
+
+    Teardown sections are keyed by question ID from question.json; source documents are
+    the pages and articles in a job's corpus store (or its .txt files for older jobs). Jobs are indexed incrementally when
+    they complete.
+    """
+
+    def __init__(self, db_path: str = "teardown_app.db", questions_path: str = "template/question.json"):
+        self.db_path = db_path
+        self.questions_path = questions_path
+        self.init_index()
+
+    def init_index(self):
+        """Initialize FTS tables"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS teardown_sections_fts USING fts5(
+                    body, title,
+                    teardown_id UNINDEXED, job_id UNINDEXED,
+                    company_name UNINDEXED, question_id UNINDEXED,
+                    tokenize = 'porter unicode61'
+                )
+            """)
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS source_documents_fts USING fts5(
+                    body, title,
+                    job_id UNINDEXED, company_name UNINDEXED, filename UNINDEXED,
+                    tokenize = 'porter unicode61'
+                )
+            """)
+            conn.commit()
+
+    def _question_titles(self) -> Dict[str, str]:
+        try:
+            return {q["id"]: q.get("title", q["id"]) for q in get_templates(questions_path=self.questions_path).questions}
+        except Exception as e:
+            print(f"Error loading questions for search index: {e}")
+            return {}
+
+    @staticmethod
+    def split_sections(content: str) -> List[Dict[str, str]]:
+        """Split teardown markdown into (question_id, body) sections on '## ' headings"""
+        sections = []
+        current_id = None
+        current_lines = []
+        for line in content.split("\n"):
+            if line.startswith("## "):
+                if current_id:
+                    sections.append({"question_id": current_id, "body": "\n".join(current_lines).strip()})
+                current_id = line[3:].strip()
+                current_lines = []
+            elif current_id:
+                current_lines.append(line)
+        if current_id:
+            sections.append({"question_id": current_id, "body": "\n".join(current_lines).strip()})
+        return [s for s in sections if s["body"] and s["body"] != "#"]
+
+    def index_teardown(self, conn, teardown_id: str, job_id: str, company_name: str, content: str):
+        titles = self._question_titles()
+        conn.execute("DELETE FROM teardown_sections_fts WHERE job_id = ?", (job_id,))
+        conn.executemany(
+            """INSERT INTO teardown_sections_fts (body, title, teardown_id, job_id, company_name, question_id)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            [
+                (s["body"], titles.get(s["question_id"], s["question_id"]),
+                 teardown_id, job_id, company_name, s["question_id"])
+                for s in self.split_sections(content)
+            ]
+        )
+
+    def index_sources(self, conn, job_id: str, company_name: str, output_folder: str):
+        conn.execute("DELETE FROM source_documents_fts WHERE job_id = ?", (job_id,))
+        if not output_folder or not os.path.isdir(output_folder):
+            return
+
+        store = CorpusStore(output_folder)
+        if store.exists():
+            # One row per scraped page/article, sliced straight out of the corpus blob
+            conn.executemany(
+                """INSERT INTO source_documents_fts (body, title, job_id, company_name, filename)
+                   VALUES (?, ?, ?, ?, ?)""",
+                ((text, document.title or document.filename, job_id, company_name, document.filename)
+                 for document, text in store.iter_texts())
+            )
+            return
+
+        rows = []
+        for filename in sorted(os.listdir(output_folder)):
+            if not filename.endswith(".txt"):
+                continue
+            try:
+                with open(os.path.join(output_folder, filename), "r", encoding="utf-8") as f:
+                    body = f.read().strip()
+            except Exception as e:
+                print(f"Error reading {filename} for search index: {e}")
+                continue
+            if body:
+                rows.append((body, filename, job_id, company_name, filename))
+
+        conn.executemany(
+            """INSERT INTO source_documents_fts (body, title, job_id, company_name, filename)
+               VALUES (?, ?, ?, ?, ?)""",
+            rows
+        )
+
+    def index_job(self, job, teardown):
+        """Index a completed job's teardown sections and scraped sources"""
+        with sqlite3.connect(self.db_path) as conn:
+            self.index_teardown(conn, teardown.id, job.id, job.company_name, teardown.content or "")
+            self.index_sources(conn, job.id, job.company_name, job.output_folder)
+            conn.commit()
+
+    def rebuild(self, db):
+        """Re-index every completed job, e.g. after upgrading an existing install"""
+        count = 0
+        for job in db.get_all_jobs():
+            teardown = db.get_teardown_by_job(job.id)
+            if teardown:
+                self.index_job(job, teardown)
+                count += 1
+        return count
+
+    @staticmethod
+    def build_match_query(query: str) -> Optional[str]:
+        """Turn free text into a safe FTS5 query: every term must match, terms are quoted"""
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return None
+        return " ".join(f'"{term}"' for term in terms)
+
+    def search(self, query: str, scope: str = "all", page: int = 1, per_page: int = 20) -> Dict:
+        """
+        Ranked full-text search with highlighted snippets and pagination.
+
+        bm25() values from different FTS tables aren't comparable (document counts and lengths
+        differ), so each table's scores are normalized by its best match for the query: the top
+        section and the top source document both score 1.0, and the rest are a fraction of that.
+        """
+        match = self.build_match_query(query)
+        if not match:
+            return {"query": query, "scope": scope, "page": page, "per_page": per_page, "total": 0, "results": []}
+
+        selects = []
+        params = []
+        if scope in ("all", "teardowns"):
+            selects.append("""
+                SELECT 'teardown' AS kind, job_id, company_name, teardown_id, question_id, title,
+                       snippet(teardown_sections_fts, 0, ?, ?, '...', 24) AS snippet,
+                       bm25(teardown_sections_fts) AS rank
+                FROM teardown_sections_fts WHERE teardown_sections_fts MATCH ?
+            """)
+            params += [_MATCH_START, _MATCH_END, match]
+        if scope in ("all", "sources"):
+            selects.append("""
+                SELECT 'source' AS kind, job_id, company_name, NULL AS teardown_id, filename AS question_id, title,
+                       snippet(source_documents_fts, 0, ?, ?, '...', 24) AS snippet,
+                       bm25(source_documents_fts) AS rank
+                FROM source_documents_fts WHERE source_documents_fts MATCH ?
+            """)
+            params += [_MATCH_START, _MATCH_END, match]
+        # bm25() is negative, lower is better; dividing by the table's best gives 1.0 down to 0
+        selects = [f"""
+            SELECT kind, job_id, company_name, teardown_id, question_id, title, snippet,
+                   CASE WHEN MIN(rank) OVER () < 0 THEN rank / MIN(rank) OVER () ELSE 1.0 END AS score
+            FROM ({select})
+        """ for select in selects]
+
+        union = " UNION ALL ".join(selects)
+        offset = (page - 1) * per_page
+
+        with sqlite3.connect(self.db_path) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM ({union})", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM ({union}) ORDER BY score DESC, kind DESC LIMIT ? OFFSET ?",
+                params + [per_page, offset]
+            ).fetchall()
+
+        results = []
+        for kind, job_id, company_name, teardown_id, key, title, snippet, score in rows:
+            result = {
+                "type": kind,
+                "job_id": job_id,
+                "company_name": company_name,
+                "title": title,
+                "snippet": _highlight(snippet),
+                "score": round(score, 4)
+            }
+            if kind == "teardown":
+                result["teardown_id"] = teardown_id
+                result["question_id"] = key
+            else:
+                result["filename"] = key
+            results.append(result)
+
+        return {
+            "query": query,
+            "scope": scope,
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "results": results
+        }
+
+
+if __name__ == "__main__":
+    from database import Database
+
+    db = Database()
+    index = SearchIndex(db.db_path)
+    print(f"✅ Indexed {index.rebuild(db)} completed jobs")
@@ -1,11 +1,22 @@
 from crewai.tools import tool
 from bs4 import BeautifulSoup
-import requests
 import os
 from urllib.parse import urljoin, urlparse
 from collections import deque
+import time
+import deadline
+from http_client import get_client
+from tracing import traced_request, traced_source
+from src.utils.corpus_store import CorpusStore
+from src.utils.site_discovery import discover, same_site, Robots
+from src.utils.urls import canonical_url
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+# Seed the crawl from robots.txt and the sitemaps before following links (0 = links only)
+SITEMAP_DISCOVERY = os.environ.get("TEARDOWN_SITEMAP_DISCOVERY", "1") != "0"
 
 @tool("Company Website Scraper")
+@traced_source("company_website")
 def CompanyWebsiteScraper(company_url: str, max_pages: int = 15, output_folder: str = "output") -> str:
     """
     Scrapes visible text content from a company's website (e.g., https://solestial.com/)
@@ -20,24 +31,35 @@ def CompanyWebsiteScraper(company_url: str, max_pages: int = 15, output_folder:
     """
     try:
         visited = set()
-        queue = deque([company_url])
         content = []
+        pages = []
         base_domain = urlparse(company_url).netloc
 
-        session = requests.Session()
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0"
-        })
+        client = get_client()
 
         priority_keywords = ['news', 'press', 'blog', 'in the news', 'media', 'about', 'team', 'leadership']
 
+        # The best sitemap pages go right after the homepage; links found while crawling fill the rest
+        robots, seeds = Robots(), []
+        if SITEMAP_DISCOVERY:
+            robots, seeds = discover(client, company_url, priority_keywords, max_pages - 1, output_folder, HEADERS)
+        queue = deque([company_url] + seeds)
+        fetched = 0
+
         while queue and len(visited) < max_pages:
+            if deadline.expired():
+                print(f"⏱️ Website deadline reached after {len(visited)} pages")
+                break
             url = queue.popleft()
-            if url in visited or urlparse(url).netloc != base_domain:
+            if canonical_url(url) in visited or not same_site(url, base_domain) or not robots.allowed(url):
                 continue
+            if fetched and robots.crawl_delay and not deadline.sleep(robots.crawl_delay):
+                print(f"⏱️ Website deadline reached after {len(visited)} pages")
+                break
+            fetched += 1
 
             try:
-                response = session.get(url, timeout=5)
+                response = traced_request(client, "GET", url, output_folder, headers=HEADERS, timeout=5)
                 if response.status_code != 200:
                     continue
 
@@ -64,8 +86,9 @@ def CompanyWebsiteScraper(company_url: str, max_pages: int = 15, output_folder:
 
                 if unique_blocks:
                     content.append(f"\n--- {title} ({url}) ---\n" + "\n".join(unique_blocks))
+                    pages.append({"title": title, "url": url, "text": "\n".join(unique_blocks), "fetched_at": time.time()})
 
-                visited.add(url)
+                visited.add(canonical_url(url))
 
                 # Discover internal links
                 internal_links = [urljoin(company_url, tag['href']) for tag in soup.find_all("a", href=True)]
@@ -88,6 +111,7 @@ def CompanyWebsiteScraper(company_url: str, max_pages: int = 15, output_folder:
 
         with open(file_path, "w", encoding="utf-8") as f:
             f.write("\n\n".join(content))
+        CorpusStore(output_folder).add_documents("company_website", f"{company_name}.txt", pages)
 
         return f"Scraped data saved to '{file_path}'"
 
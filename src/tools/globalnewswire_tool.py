@@ -1,11 +1,23 @@
 from crewai.tools import tool
 from bs4 import BeautifulSoup
-import requests
 import time
 from typing import List, Dict
 import os
+import deadline
+from http_client import HttpClient, get_client
+from tracing import traced_request, traced_source
+from src.utils.corpus_store import CorpusStore
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Pause between requests to stay under GlobeNewswire rate limits
+REQUEST_DELAY_SECONDS = 10
 
 @tool("GlobeNewswire Press Release Scraper")
+@traced_source("globenewswire")
 def GlobeNewswireScraper(company: str, max_articles: int = 20, output_folder: str = "output") -> str:
     """
     Searches GlobeNewswire for press releases related to the given company, scrapes each release,
@@ -15,13 +27,9 @@ def GlobeNewswireScraper(company: str, max_articles: int = 20, output_folder: st
         query = company.strip().replace(" ", "+")
         url = f"https://www.globenewswire.com/Search?q={query}"
 
-        session = requests.Session()
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-        })
+        client = get_client()
 
-        response = session.get(url)
+        response = traced_request(client, "GET", url, output_folder, headers=HEADERS)
         if response.status_code != 200:
             return f"Failed to retrieve search results. Status code: {response.status_code}"
 
@@ -33,8 +41,11 @@ def GlobeNewswireScraper(company: str, max_articles: int = 20, output_folder: st
 
         articles = []
         for i, post in enumerate(posts[:max_articles]):
-            time.sleep(10)
-            article_data = scrape_gnw_article(session, post)
+            # Out of time: keep the releases scraped so far
+            if not deadline.sleep(REQUEST_DELAY_SECONDS):
+                print(f"⏱️ GlobeNewswire deadline reached after {len(articles)} releases")
+                break
+            article_data = scrape_gnw_article(client, post, output_folder)
             if article_data:
                 articles.append(article_data)
 
@@ -54,13 +65,17 @@ def GlobeNewswireScraper(company: str, max_articles: int = 20, output_folder: st
 
         with open(filepath, "w", encoding="utf-8") as f:
             f.write(result.strip())
+        CorpusStore(output_folder).add_documents("globenewswire", filename, [
+            {"title": article["title"], "url": article["url"], "text": article["full_text"], "fetched_at": article.get("fetched_at")}
+            for article in articles
+        ])
 
         return f"Saved GlobeNewswire releases to '{filepath}'"
 
     except Exception as e:
         return f"Error scraping GlobeNewswire: {str(e)}"
 
-def scrape_gnw_article(session: requests.Session, post_link) -> Dict[str, str]:
+def scrape_gnw_article(client: HttpClient, post_link, output_folder: str = "output") -> Dict[str, str]:
     """
     Scrapes a single GlobeNewswire press release.
     """
@@ -68,7 +83,7 @@ def scrape_gnw_article(session: requests.Session, post_link) -> Dict[str, str]:
         title = post_link.get_text(strip=True)
         url = "https://www.globenewswire.com" + post_link["href"]
 
-        response = session.get(url)
+        response = traced_request(client, "GET", url, output_folder, headers=HEADERS)
         if response.status_code != 200:
             return {"title": title, "url": url, "full_text": f"Failed to load article: {response.status_code}"}
 
@@ -80,7 +95,8 @@ def scrape_gnw_article(session: requests.Session, post_link) -> Dict[str, str]:
         return {
             "title": title,
             "url": url,
-            "full_text": full_text or "Could not extract article content."
+            "full_text": full_text or "Could not extract article content.",
+            "fetched_at": time.time()
         }
 
     except Exception as e:
@@ -1,44 +1,20 @@
 import os
-import requests
 import json
 from crewai.tools import tool
 from collections import Counter
+from usaspending_client import get_usaspending_client
+from src.utils.corpus_store import CorpusStore
+from tracing import traced_source
 
 @tool("Fetch and save US government contracts for a given company")
+@traced_source("usaspending")
 def fetch_contracts_by_company(company_name: str, output_folder: str = "output") -> str:
     """
-    Fetches government contracts from USAspending API and writes summarized results to a text file.
+    Fetches government contracts from USAspending API (all pages up to the limit budget, cached per
+    company) and writes summarized results to a text file.
     """
-    url = "https://api.usaspending.gov/api/v2/search/spending_by_award/"
-
-    payload = {
-        "filters": {
-            "recipient_search_text": [company_name],
-            "award_type_codes": ["A", "B", "C", "D"]
-        },
-        "limit": 10,
-        "page": 1,
-        "fields": [
-            "Award ID",
-            "Recipient Name",
-            "Start Date",
-            "End Date",
-            "Award Amount",
-            "Awarding Agency",
-            "Award Description"
-        ],
-        "sort": "Award Amount",
-        "order": "desc"
-    }
-
-    headers = {"Content-Type": "application/json"}
-
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        if response.status_code != 200:
-            return f"❌ API Error: {response.status_code} - {response.text}"
-
-        results = response.json().get("results", [])
+        results = get_usaspending_client().fetch_awards(company_name, output_folder=output_folder)
         if not results:
             return f"No contracts found for '{company_name}'."
 
@@ -75,26 +51,31 @@ def fetch_contracts_by_company(company_name: str, output_folder: str = "output")
             + "=" * 80 + "\n\n"
         )
 
+        details = ["📋 Detailed Contract List:\n\n"]
+        for i, item in enumerate(results, 1):
+            details.append(
+                f"#{i}\n"
+                f"Award ID: {item.get('Award ID', 'N/A')}\n"
+                f"Recipient: {item.get('Recipient Name', 'N/A')}\n"
+                f"Award Amount: ${item.get('Award Amount', 0):,.2f}\n"
+                f"Start Date: {item.get('Start Date', 'N/A')}\n"
+                f"End Date: {item.get('End Date', 'N/A')}\n"
+                f"Agency: {item.get('Awarding Agency', 'N/A')}\n"
+                f"Description: {item.get('Award Description', 'N/A')}\n"
+                + "-" * 80 + "\n\n"
+            )
+        text = summary + "".join(details)
+
         # --- Save to File ---
         os.makedirs(output_folder, exist_ok=True)
-        file_path = os.path.join(
-            output_folder,
-            f"{company_name.lower().replace(' ', '_')}_contracts.txt"
-        )
+        filename = f"{company_name.lower().replace(' ', '_')}_contracts.txt"
+        file_path = os.path.join(output_folder, filename)
 
         with open(file_path, "w") as f:
-            f.write(summary)
-            f.write("📋 Detailed Contract List:\n\n")
-            for i, item in enumerate(results, 1):
-                f.write(f"#{i}\n")
-                f.write(f"Award ID: {item.get('Award ID', 'N/A')}\n")
-                f.write(f"Recipient: {item.get('Recipient Name', 'N/A')}\n")
-                f.write(f"Award Amount: ${item.get('Award Amount', 0):,.2f}\n")
-                f.write(f"Start Date: {item.get('Start Date', 'N/A')}\n")
-                f.write(f"End Date: {item.get('End Date', 'N/A')}\n")
-                f.write(f"Agency: {item.get('Awarding Agency', 'N/A')}\n")
-                f.write(f"Description: {item.get('Award Description', 'N/A')}\n")
-                f.write("-" * 80 + "\n\n")
+            f.write(text)
+        CorpusStore(output_folder).add_documents("usaspending", filename, [
+            {"title": f"Government contracts for {company_name}", "url": "https://www.usaspending.gov/", "text": text}
+        ])
 
         return f"✅ Saved summarized contracts to '{file_path}'"
 
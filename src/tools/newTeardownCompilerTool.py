@@ -1,16 +1,62 @@
 # Final version - Fast execution + Proper answer persistence
 import os
-import json
+import re
 import time
+import threading
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
-from langchain_community.chat_models import ChatOpenAI
 from crewai.tools import tool
-from utils import sanitize_filename
+import deadline
+from src.utils.answer_store import AnswerStore
+from src.utils.corpus_cleaner import load_clean_corpus, load_clean_store, parse_source_file
+from src.utils.corpus_store import CorpusStore
+from src.utils.relevance import rank_chunks
+from src.utils.digest_store import (DigestStore, DIGEST_PROMPT, MIN_DIGEST_TOKENS, MAX_DIGEST_TOKENS,
+                                    digest_key, render_digest)
+from tracing import get_tracer
+from llm_governor import get_governor
+from model_router import resolve_model, create_chat_model
+from template_registry import get_templates, Templates, QuestionPrompts, TemplateError
+from metrics import LLM_CALLS, LLM_TOKENS, LLM_DURATION, CORPUS_TOKENS, MAP_CHUNKS_PER_QUESTION
+
+# Completion tokens assumed when reserving rate-limit budget for a call, before the real usage is known
+COMPLETION_TOKENS_ESTIMATE = 500
+# Answer complex questions from per-document digests instead of a map pass over the raw chunks
+DIGESTS_ENABLED = os.environ.get("TEARDOWN_DIGESTS", "1") != "0"
+# Answered in one call from the first chunk of raw data
+SIMPLE_QUESTIONS = ['the_company_name', 'company_description', 'industry']
+# The map loop stops once a chunk answers the question with at least this confidence (0-100); 0 maps every chunk
+MAP_CONFIDENCE_THRESHOLD = int(os.environ.get("TEARDOWN_MAP_CONFIDENCE", "80"))
+# Chunk size for the map phase, in estimated tokens including the prompt
+CHUNK_TOKENS = int(os.environ.get("TEARDOWN_CHUNK_TOKENS", "12000"))
+
+_CONFIDENCE_LINE = re.compile(r"^\W*CONFIDENCE\W*(\d{1,3})\s*%?\W*$", re.IGNORECASE | re.MULTILINE)
+
+# Builds the chat model for a routed model name; swapped out by the offline benchmark
+_llm_factory = create_chat_model
+# One client per model, shared by every compiler in the process
+_llms: Dict[str, Any] = {}
+_llms_lock = threading.Lock()
+
+
+def set_llm_factory(factory):
+    """Override how compilers create their chat model from a model name (e.g. fake models for offline benchmarks)."""
+    global _llm_factory
+    with _llms_lock:
+        _llm_factory = factory
+        _llms.clear()
+
+
+def _llm_for(model: str):
+    with _llms_lock:
+        if model not in _llms:
+            _llms[model] = _llm_factory(model)
+        return _llms[model]
+
 
 class RAGTeardownCompiler(BaseModel):
     """
-    Fast execution with proper answer persistence using JSON intermediate storage.
+    Fast execution with proper answer persistence using an append-only answer store.
     """
     company_name: str
     template_path: str
@@ -20,14 +66,14 @@ class RAGTeardownCompiler(BaseModel):
     output_folder: str 
     llm: Optional[object] = None
 
-    def _load_text_file(self, path: str) -> str:
-        """Loads a single text file."""
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            print(f"Error loading {path}: {e}")
-            return ""
+    def _templates(self) -> Templates:
+        """Questions, Klear context and precompiled prompts, loaded once per process and reloaded on change."""
+        return get_templates(
+            questions_path=self.questions_path,
+            klear_context_path=self.klear_context_path,
+            research_template_path=self.template_path,
+            example_teardown_path=self.example_teardown_path
+        )
 
     def _load_company_data(self) -> List[Dict[str, str]]:
         """Loads individual files from the output folder."""
@@ -70,8 +116,9 @@ class RAGTeardownCompiler(BaseModel):
         """Rough token estimation (1 token ≈ 4 characters)."""
         return len(text) // 4
 
-    def _chunk_data_smartly(self, company_data: List[Dict], klear_context: str, max_tokens: int = 12000) -> List[str]:
+    def _chunk_data_smartly(self, company_data: List[Dict], klear_context: str, max_tokens: Optional[int] = None) -> List[str]:
         """Smart chunking that prioritizes relevant data."""
+        max_tokens = max_tokens or CHUNK_TOKENS
         if not company_data:
             return ["No company data available"]
             
@@ -129,48 +176,141 @@ class RAGTeardownCompiler(BaseModel):
         return chunks if chunks else ["No company data available"]
 
     def _load_questions(self) -> list:
-        """Loads questions from the JSON file."""
+        """Questions from the template registry."""
         try:
-            with open(self.questions_path, "r", encoding="utf-8") as f:
-                questions = json.load(f)
-                print(f"Loaded {len(questions)} questions")
-                return questions
-        except Exception as e:
+            return self._templates().questions
+        except TemplateError as e:
             print(f"Error loading questions: {e}")
             return []
 
-    def _answer_question_with_chunks(self, question: Dict, chunks: List[str], klear_context: str) -> str:
-        """Answer a question using multiple chunks if needed."""
-        if self.llm is None:
-            self.llm = ChatOpenAI(temperature=0, model="gpt-4o-mini")
-        
+    @staticmethod
+    def _token_usage(response) -> Dict[str, int]:
+        """Pull token counts off a chat response, whichever attribute the client populates."""
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage:
+            return {
+                "prompt_tokens": usage.get("input_tokens", 0),
+                "completion_tokens": usage.get("output_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0)
+            }
+        metadata = getattr(response, "response_metadata", None) or {}
+        usage = metadata.get("token_usage") or {}
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0)
+        }
+
+    def _invoke_llm(self, prompt: str, phase: str, question: Dict) -> str:
+        """Single traced LLM call. phase is 'simple', 'map' or 'synthesis' and picks the model with the question."""
+        question_id = question.get("id")
+        model = resolve_model(question, phase)
+        # A compiler given an llm uses it for every call
+        llm = self.llm if self.llm is not None else _llm_for(model)
+
+        def invoke():
+            with LLM_DURATION.time(phase=phase, model=model):
+                return llm.invoke(prompt)
+
+        tracer = get_tracer(self.output_folder)
+        with tracer.span(f"llm.{phase}", kind="llm", question_id=question_id, model=model, prompt_chars=len(prompt)) as span:
+            try:
+                # Admitted by the process-wide governor so concurrent jobs share the rate limits
+                response = get_governor().call(
+                    invoke,
+                    tokens=self._estimate_tokens(prompt) + COMPLETION_TOKENS_ESTIMATE,
+                    priority=phase,
+                    usage=lambda r: self._token_usage(r)["total_tokens"]
+                )
+            except Exception:
+                LLM_CALLS.inc(phase=phase, model=model, outcome="error")
+                raise
+            content = response.content.strip()
+            usage = self._token_usage(response)
+            span.set(response_chars=len(content), **usage)
+
+        LLM_CALLS.inc(phase=phase, model=model, outcome="success")
+        LLM_TOKENS.inc(usage["prompt_tokens"], phase=phase, model=model, direction="prompt")
+        LLM_TOKENS.inc(usage["completion_tokens"], phase=phase, model=model, direction="completion")
+        return content
+
+    @staticmethod
+    def _split_confidence(response: str):
+        """Strip the CONFIDENCE line a map call ends with. Returns (text, confidence or None)."""
+        match = None
+        for match in _CONFIDENCE_LINE.finditer(response):
+            pass
+        if match is None:
+            return response, None
+        text = (response[:match.start()] + response[match.end():]).strip()
+        return text, min(int(match.group(1)), 100)
+
+    def _digest_corpus(self, company_data: List[Dict[str, str]], question: Dict) -> List[Dict[str, str]]:
+        """
+        The corpus with every document replaced by its digest, in the same {"filename", "data", "size"}
+        shape so it chunks like the raw files. Digests are made once and shared by all questions.
+        """
+        q_id = question.get("id")
+        # Digests are shared by every question, so they use the digest phase's model, not the question's
+        model = resolve_model({}, "digest")
+        files = []  # (filename, [(header, text, key or None)])
+        keys, texts = [], []
+        for file_data in company_data:
+            documents = []
+            for document in parse_source_file(file_data["filename"], file_data["data"]).documents:
+                text = f"{document.header}\n{document.text}" if document.header else document.text
+                header = document.header or (document.lines[0] if document.lines else "")
+                if self._estimate_tokens(text) < MIN_DIGEST_TOKENS:
+                    documents.append((header, text, None))
+                    continue
+                text = text[:MAX_DIGEST_TOKENS * 4]
+                key = digest_key(text, model)
+                documents.append((header, text, key))
+                keys.append(key)
+                texts.append(text)
+            files.append((file_data["filename"], documents))
+
+        with get_tracer(self.output_folder).span("corpus.digest", kind="digest", question_id=q_id, documents=len(keys)) as span:
+            digests = DigestStore().digests(
+                keys, lambda i: self._invoke_llm(DIGEST_PROMPT.format(document=texts[i]), "digest", {"id": q_id})
+            )
+            by_key = {key: digest for key, digest in zip(keys, digests) if digest is not None}
+            missing = len(keys) - len(by_key)
+            span.set(digested=len(by_key))
+        # Out of time, undigested documents are left out; otherwise a failed digest (LLM error, 429 after
+        # retries, unreadable response) falls back to the document text so the answer still sees it
+        wrap_up = deadline.should_wrap_up()
+        if missing and wrap_up:
+            deadline.note_partial(f"left out {missing} of {len(keys)} undigested documents when the time budget ran out")
+
+        digested = []
+        for filename, documents in files:
+            parts = []
+            for header, text, key in documents:
+                if key in by_key:
+                    parts.append(render_digest(header, by_key[key]))
+                elif key is None or not wrap_up:
+                    parts.append(text)
+            data = "\n\n".join(part for part in parts if part)
+            if data:
+                digested.append({"filename": filename, "data": data, "size": len(data)})
+        print(f"🗜️ Digests for {q_id}: {sum(d['size'] for d in company_data) // 4} -> "
+              f"{sum(d['size'] for d in digested) // 4} tokens ({len(by_key)}/{len(keys)} documents digested)")
+        return digested
+
+    def _answer_question_with_chunks(self, question: Dict, chunks: List[str], prompts: QuestionPrompts,
+                                     digested: bool = False) -> str:
+        """Answer a question using multiple chunks if needed. digested means the chunks hold document digests."""
         q_id = question.get("id")
         print(f"🤖 Processing question: {q_id}")
         
-        # Add Klear context for relevant questions
-        klear_section = f"\nKlear Context:\n{klear_context}" if 'klear' in q_id and klear_context else ""
-        
         # Use first chunk for simple questions
-        if q_id in ['the_company_name', 'company_description', 'industry']:
+        if q_id in SIMPLE_QUESTIONS:
             chunk = chunks[0] if chunks else "No data available"
-            prompt = f"""You are a company research analyst for {self.company_name}.
-
-Your task: {question['instruction']}
-
-Company Data:
-{chunk}
-{klear_section}
-
-Instructions:
-- Answer only the specific question asked
-- Be precise and professional  
-- If information is not available, state "Information not available"
-
-Question: {question['title']}
-Answer:"""
+            prompt = prompts.simple.format(company_name=self.company_name, data=chunk)
             
             try:
-                response = self.llm.invoke(prompt).content.strip()
+                response = self._invoke_llm(prompt, "simple", question)
                 print(f"✅ Got answer for {q_id}: {len(response)} chars")
                 return response
             except Exception as e:
@@ -179,45 +319,52 @@ Answer:"""
         
         # For complex questions, combine insights
         combined_insights = []
+        # Digests that fit in one chunk are already extracted, so the answer is written from them directly.
+        # Klear questions still map, so the Klear context is read by the map model rather than at synthesis.
+        skip_map = digested and len(chunks) == 1 and not prompts.klear_context
+        if skip_map:
+            combined_insights.append(chunks[0])
         
-        for i, chunk in enumerate(chunks):
-            prompt = f"""You are a company research analyst for {self.company_name}.
-
-Your task: {question['instruction']}
-
-Company Data (Part {i+1}/{len(chunks)}):
-{chunk}
-{klear_section}
-
-Instructions:
-- Extract only information relevant to: {question['title']}
-- Be precise and concise
-- If no relevant information is found, say "No relevant information"
-
-Question: {question['title']}
-Relevant Information:"""
+        # Most relevant chunks first; questions that don't need every chunk stop once one answers them.
+        # List-style questions ("early_exit": false in question.json) always read the whole corpus.
+        early_exit = MAP_CONFIDENCE_THRESHOLD > 0 and question.get("early_exit", True) and len(chunks) > 1
+        confidence_instruction = (
+            "\n- End with a line \"CONFIDENCE: <0-100>\" for how completely this information alone answers the question"
+            if early_exit else ""
+        )
+        stop = "all"
+        mapped = 0
+        for i, chunk_index in enumerate([] if skip_map else rank_chunks(question, chunks)):
+            # Out of time: answer from the chunks read so far
+            if i > 0 and deadline.should_wrap_up():
+                print(f"⏱️ {q_id}: time budget reached after {i}/{len(chunks)} chunks")
+                deadline.note_partial(f"read {i} of {len(chunks)} source chunks before the time budget ran out")
+                stop = "deadline"
+                break
+            prompt = prompts.map.format(company_name=self.company_name, data=chunks[chunk_index], part=i + 1,
+                                        total=len(chunks), confidence_instruction=confidence_instruction)
 
+            mapped += 1
             try:
-                response = self.llm.invoke(prompt).content.strip()
+                response, confidence = self._split_confidence(self._invoke_llm(prompt, "map", question))
                 if response and "no relevant information" not in response.lower():
                     combined_insights.append(response)
+                    if early_exit and confidence is not None and confidence >= MAP_CONFIDENCE_THRESHOLD and i + 1 < len(chunks):
+                        print(f"✂️ {q_id}: answered after {i+1}/{len(chunks)} chunks (confidence {confidence})")
+                        stop = "sufficient"
+                        break
             except Exception as e:
-                print(f"Error processing chunk {i+1}: {e}")
+                print(f"Error processing chunk {chunk_index+1}: {e}")
                 continue
+        if mapped:
+            MAP_CHUNKS_PER_QUESTION.observe(mapped, stop=stop)
         
         # Synthesize final answer
         if combined_insights:
-            synthesis_prompt = f"""Based on the following information about {self.company_name}, provide a comprehensive answer to: {question['title']}
-
-Task: {question['instruction']}
-
-Information gathered:
-{chr(10).join(combined_insights)}
-
-Provide a final, synthesized answer:"""
+            synthesis_prompt = prompts.synthesis.format(company_name=self.company_name, insights="\n".join(combined_insights))
             
             try:
-                final_response = self.llm.invoke(synthesis_prompt).content.strip()
+                final_response = self._invoke_llm(synthesis_prompt, "synthesis", question)
                 print(f"✅ Got synthesized answer for {q_id}: {len(final_response)} chars")
                 return final_response
             except Exception as e:
@@ -226,67 +373,55 @@ Provide a final, synthesized answer:"""
         else:
             return "Information not available"
 
-    def _save_answer_to_json(self, question_id: str, answer: str):
-        """Save individual answers to JSON files - fast and atomic."""
-        safe_name = sanitize_filename(self.company_name)
-        answer_file = os.path.join(self.output_folder, f"{safe_name}_{question_id}.json")
-        
+    def _answer_store(self) -> AnswerStore:
+        return AnswerStore(self.output_folder, self.company_name)
+
+    def _save_answer(self, question_id: str, answer: str, partial: Optional[List[str]] = None,
+                     template_version: Optional[str] = None):
+        """Append a single answer to the job's JSONL answer store - O(1) per answer."""
         try:
-            answer_data = {
-                "question_id": question_id,
-                "answer": answer,
-                "timestamp": time.time(),
-                "company_name": self.company_name
-            }
-            
-            with open(answer_file, "w", encoding="utf-8") as f:
-                json.dump(answer_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"📝 Saved {question_id} to JSON file")
-            
+            self._answer_store().append(question_id, answer, partial=partial, template_version=template_version)
+            print(f"📝 Saved {question_id} to answer store")
         except Exception as e:
-            print(f"❌ Error saving {question_id} to JSON: {e}")
+            print(f"❌ Error saving {question_id} to answer store: {e}")
 
-    def _compile_final_teardown(self):
-        """Compile all JSON answers into the final teardown markdown file."""
-        safe_name = sanitize_filename(self.company_name)
-        output_path = os.path.join(self.output_folder, f"{safe_name}_teardown.md")
-        
-        # Load all answer JSON files
-        answers = {}
-        for filename in os.listdir(self.output_folder):
-            if filename.startswith(f"{safe_name}_") and filename.endswith(".json") and not filename.endswith("_teardown.json"):
-                try:
-                    with open(os.path.join(self.output_folder, filename), "r", encoding="utf-8") as f:
-                        answer_data = json.load(f)
-                        question_id = answer_data.get("question_id")
-                        answer = answer_data.get("answer", "")
-                        if question_id:
-                            answers[question_id] = answer
-                except Exception as e:
-                    print(f"Error loading {filename}: {e}")
-        
-        print(f"🔄 Compiling teardown with {len(answers)} answers")
-        
-        # Load questions to maintain proper order
+    def _compile_final_teardown(self, notes: Optional[Dict[str, List[str]]] = None) -> str:
+        """Compile all stored answers into the final teardown markdown (stored by the caller in the blob store)."""
+        store = self._answer_store()
         questions = self._load_questions()
-        
-        # Build the final markdown
-        markdown_content = f"# Company Teardown: {self.company_name}\n\n"
-        
-        for q in questions:
-            q_id = q.get("id")
-            if q_id:
-                answer = answers.get(q_id, "#")  # Use # as placeholder if no answer
-                markdown_content += f"## {q_id}\n{answer}\n\n"
-        
-        # Write the final teardown
-        try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(markdown_content)
-            print(f"✅ Final teardown compiled: {output_path}")
-        except Exception as e:
-            print(f"❌ Error writing final teardown: {e}")
+
+        with get_tracer(self.output_folder).span("compile", kind="compile") as span:
+            markdown_content = store.render_markdown(questions, notes=notes)
+            print(f"✅ Final teardown compiled for {self.company_name}")
+            span.set(questions=len(questions), bytes=len(markdown_content.encode("utf-8")))
+        return markdown_content
+
+    def _load_clean_corpus(self) -> List[Dict[str, str]]:
+        """
+        Loads the job's sources with site boilerplate and near-duplicate articles stripped.
+        Reads the structured corpus store when the scrapers wrote one, else the .txt files.
+        Computed once per job and cached.
+        """
+        store = CorpusStore(self.output_folder)
+        company_data = None
+        if not store.exists():
+            company_data = self._load_company_data()
+            if not company_data:
+                return company_data
+        with get_tracer(self.output_folder).span("corpus.clean", kind="clean", store=company_data is None) as span:
+            if company_data is None:
+                cleaned, report = load_clean_store(store)
+            else:
+                cleaned, report = load_clean_corpus(self.output_folder, company_data)
+            if report is None:
+                span.set(cached=True)
+                return cleaned
+            span.set(**report)
+        CORPUS_TOKENS.inc(report["tokens_before"], stage="raw")
+        CORPUS_TOKENS.inc(report["tokens_after"], stage="clean")
+        print(f"🧹 Cleaned corpus: {report['tokens_before']} -> {report['tokens_after']} tokens "
+              f"({report['boilerplate_lines']} boilerplate lines, {report['duplicate_documents']} near-duplicate documents)")
+        return cleaned
 
     def run(self, question_id: Optional[str] = None) -> str:
         """Runs the teardown compiler for a specific question."""
@@ -294,45 +429,58 @@ Provide a final, synthesized answer:"""
         print(f"🚀 RAGTeardownCompiler starting for question: {question_id}")
         start_time = time.time()
         
-        # Load data
-        company_data = self._load_company_data()
-        klear_context = self._load_text_file(self.klear_context_path) if self.klear_context_path else ""
-        questions = self._load_questions()
-        
-        if not questions:
-            return "No questions loaded"
+        with get_tracer(self.output_folder).span("question", kind="question", question_id=question_id) as span:
+            # Load data
+            company_data = self._load_clean_corpus()
+            try:
+                templates = self._templates()
+            except TemplateError as e:
+                print(f"Error loading questions: {e}")
+                return "No questions loaded"
+            klear_context = templates.klear_context
+            span.set(template_version=templates.version)
+
+            # Create chunks
+            chunks = self._chunk_data_smartly(company_data, klear_context)
+            span.set(source_files=len(company_data), bytes=sum(d["size"] for d in company_data), chunks=len(chunks))
+            
+            if not question_id:
+                return "No question_id provided"
 
-        # Create chunks
-        chunks = self._chunk_data_smartly(company_data, klear_context)
-        
-        if question_id:
             # Process specific question
-            question = next((q for q in questions if q.get("id") == question_id), None)
+            question = templates.question(question_id)
             if not question:
                 return f"Question {question_id} not found"
             
             try:
-                answer = self._answer_question_with_chunks(question, chunks, klear_context)
+                with deadline.collect_notes() as partial:
+                    # Complex questions read the shared per-document digests instead of the raw chunks
+                    digested = DIGESTS_ENABLED and question_id not in SIMPLE_QUESTIONS and bool(company_data)
+                    if digested:
+                        digest_data = self._digest_corpus(company_data, question)
+                        digested = bool(digest_data)
+                        if digested:
+                            chunks = self._chunk_data_smartly(digest_data, klear_context)
+                            span.set(digest_chunks=len(chunks))
+                    answer = self._answer_question_with_chunks(question, chunks, templates.prompts[question_id], digested)
                 
-                # Save answer to JSON (fast, atomic)
-                self._save_answer_to_json(question_id, answer)
-                
-                # Recompile the final teardown with all available answers
-                self._compile_final_teardown()
+                # Append answer to the store; the markdown is assembled once at the end of the job
+                self._save_answer(question_id, answer, partial=partial, template_version=templates.version)
                 
                 elapsed = time.time() - start_time
                 print(f"🎉 Completed {question_id} in {elapsed:.2f}s")
+                span.set(answer_chars=len(answer))
+                if partial:
+                    span.set(partial=True)
                 
                 return answer
                 
             except Exception as e:
                 error_msg = f"Error processing question: {e}"
                 print(f"❌ {error_msg}")
-                self._save_answer_to_json(question_id, error_msg)
-                self._compile_final_teardown()
+                span.fail(e)
+                self._save_answer(question_id, error_msg)
                 return error_msg
-        else:
-            return "No question_id provided"
 
 
 @tool
@@ -372,4 +520,21 @@ def compile_teardown_rag(company_name: str, output_folder: str, question_id: str
         print(f"❌ TOOL: {error_msg}")
         import traceback
         traceback.print_exc()
-        return error_msg
\ No newline at end of file
+        return error_msg
+
+
+def compile_final_teardown(company_name: str, output_folder: str, questions_path: str = "template/question.json",
+                           notes: Optional[Dict[str, List[str]]] = None) -> str:
+    """
+    Assemble the teardown markdown once from the answer store. Returns the markdown content.
+    notes maps question ids to reasons their answers are partial, beyond those stored with them.
+    """
+    compiler = RAGTeardownCompiler(
+        company_name=company_name,
+        template_path="template/research_template.txt",
+        klear_context_path="template/klear_context.txt",
+        example_teardown_path="template/example_teardown.txt",
+        questions_path=questions_path,
+        output_folder=output_folder
+    )
+    return compiler._compile_final_teardown(notes)
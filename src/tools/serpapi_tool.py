@@ -1,14 +1,32 @@
 import os
-from serpapi import GoogleSearch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
 from dotenv import load_dotenv
-import requests
 from bs4 import BeautifulSoup
 from crewai.tools import tool
+import deadline
+from http_client import get_client
+from src.utils.corpus_store import CorpusStore
+from src.utils.urls import canonical_url
+from tracing import get_tracer, traced_request, traced_source
 
 load_dotenv()
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+SERPAPI_SEARCH_URL = "https://serpapi.com/search.json"
+
+# Searches cost SerpAPI quota, so only this many strategies are in flight at once; the rest are
+# cancelled if enough unique results arrive first
+SEARCH_CONCURRENCY = 3
+# Collect this many candidates per wanted article, since some pages yield no usable text
+CANDIDATE_FACTOR = 2
+ARTICLE_FETCH_WORKERS = 5
+
+ARTICLE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
 @tool("SerpAPI Article Scraper Tool")
+@traced_source("serpapi")
 def serpapi_scraper_to_txt(company: str, sites: str = "techcrunch.com,venturebeat.com,crunchbase.com,techstartups.com,siliconangle.com", num_results: int = 5, output_folder: str = "output") -> str:
     """
     Searches specific news sites for articles about the given company using SerpAPI,
@@ -20,13 +38,9 @@ def serpapi_scraper_to_txt(company: str, sites: str = "techcrunch.com,venturebea
     
     print(f"🔑 API Key loaded: {SERPAPI_API_KEY[:10]}...")
     
-    site_list = [s.strip() for s in sites.split(",") if s.strip()]
     os.makedirs(output_folder, exist_ok=True)
 
-    results = []
-    file_count = 1
-
-    # Try multiple search strategies
+    # Try multiple search strategies, best first
     search_strategies = [
         f"site:{sites} {company}",  # Original approach
         f"{company}",  # Broader search without site restriction
@@ -35,79 +49,126 @@ def serpapi_scraper_to_txt(company: str, sites: str = "techcrunch.com,venturebea
         f"{company} startup",  # Add "startup" keyword
     ]
 
-    for strategy in search_strategies:
-        print(f"🔍 Trying search strategy: {strategy}")
-        
-        params = {
-            "q": strategy,
-            "api_key": SERPAPI_API_KEY,
-            "engine": "google",
-            "num": num_results
-        }
+    candidates = search_strategies_concurrently(search_strategies, num_results, output_folder)
+    print(f"📄 {len(candidates)} unique results across strategies")
 
-        try:
-            search = GoogleSearch(params)
-            search_results = search.get_dict()
-            
-            # Handle the case where we get HTML error instead of JSON
-            if isinstance(search_results, str) or not isinstance(search_results, dict):
-                print(f"❌ Got non-JSON response from SerpAPI (likely server error 522)")
-                print(f"Response type: {type(search_results)}")
-                continue
-            
-            # Debug: Check what we got back
-            print(f"🔍 Search results type: {type(search_results)}")
-            print(f"🔍 Search results keys: {list(search_results.keys()) if isinstance(search_results, dict) else 'Not a dict'}")
-            
-            # Check for API errors
-            if "error" in search_results:
-                print(f"❌ API Error: {search_results['error']}")
-                continue
-                
-            organic_results = search_results.get("organic_results", [])
-            print(f"📄 Found {len(organic_results)} results for strategy: {strategy}")
-
-            if len(organic_results) > 0:
-                for res in organic_results:
-                    title = res.get("title", "No Title")
-                    link = res.get("link")
-                    snippet = res.get("snippet", "")
-                    
-                    print(f"📰 Processing: {title}")
-                    article_text = scrape_article_text(link)
-
-                    if article_text and len(article_text) > 100:  # Only save substantial content
-                        filename = os.path.join(output_folder, f"{company.lower().replace(' ', '_')}_{file_count}.txt")
-                        with open(filename, "w", encoding="utf-8") as f:
-                            f.write(f"Title: {title}\nURL: {link}\nSnippet: {snippet}\n\n{article_text}")
-                        print(f"✅ Saved: {title} ➜ {filename}")
-                        file_count += 1
-                    else:
-                        print(f"⚠️ Skipped (no content): {link}")
-                
-                # If we found results, stop trying other strategies
-                if file_count > 1:
-                    break
-            else:
-                print(f"No results for strategy: {strategy}")
-                    
-        except Exception as e:
-            print(f"❌ Error with strategy '{strategy}': {str(e)}")
-            continue
-
-    success_message = f"Scraped and saved {file_count - 1} articles for '{company}' in '{output_folder}'"
+    # Fetch articles in waves of parallel requests until num_results are saved or candidates run out
+    saved = []
+    remaining = list(candidates)
+    with ThreadPoolExecutor(max_workers=ARTICLE_FETCH_WORKERS, thread_name_prefix="serpapi-article") as pool:
+        while remaining and len(saved) < num_results and not deadline.expired():
+            wave, remaining = remaining[:num_results - len(saved)], remaining[num_results - len(saved):]
+            texts = pool.map(deadline.propagate(lambda res: scrape_article_text(res["link"], output_folder)), wave)
+            for res, article_text in zip(wave, texts):
+                if article_text and len(article_text) > 100:  # Only save substantial content
+                    saved.append((res, article_text))
+                else:
+                    print(f"⚠️ Skipped (no content): {res['link']}")
+
+    store = CorpusStore(output_folder)
+    for file_count, (res, article_text) in enumerate(saved, 1):
+        title = res.get("title", "No Title")
+        basename = f"{company.lower().replace(' ', '_')}_{file_count}.txt"
+        filename = os.path.join(output_folder, basename)
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(f"Title: {title}\nURL: {res['link']}\nSnippet: {res.get('snippet', '')}\n\n{article_text}")
+        store.add_documents("serpapi", basename, [{"title": title, "url": res["link"], "text": article_text}])
+        print(f"✅ Saved: {title} ➜ {filename}")
+
+    success_message = f"Scraped and saved {len(saved)} articles for '{company}' in '{output_folder}'"
     print(success_message)
     return success_message
 
-def scrape_article_text(url: str) -> str:
+def search_strategies_concurrently(strategies: List[str], num_results: int, output_folder: str = "output") -> List[dict]:
     """
-    Scrapes and returns main text content from an article URL.
+    Run the search strategies in parallel and merge their organic results, deduplicated by
+    canonical URL and ordered by strategy priority then rank. Strategies that haven't started
+    are cancelled once enough unique results (num_results * CANDIDATE_FACTOR) have come back.
     """
+    enough = num_results * CANDIDATE_FACTOR
+    by_strategy: Dict[int, List[dict]] = {}
+    seen = set()
+
+    pool = ThreadPoolExecutor(max_workers=SEARCH_CONCURRENCY, thread_name_prefix="serpapi-search")
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        futures = {
+            pool.submit(deadline.propagate(run_search_strategy), strategy, num_results, output_folder): index
+            for index, strategy in enumerate(strategies)
         }
-        response = requests.get(url, timeout=10, headers=headers)
+        unique = 0
+        for future in as_completed(futures):
+            index = futures[future]
+            by_strategy[index] = future.result()
+            for res in by_strategy[index]:
+                key = canonical_url(res["link"])
+                if key not in seen:
+                    seen.add(key)
+                    unique += 1
+            if unique >= enough:
+                break
+    finally:
+        # Cancels searches that haven't been sent; ones already in flight finish and are ignored
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    merged = []
+    seen = set()
+    for index in sorted(by_strategy):
+        for res in by_strategy[index]:
+            key = canonical_url(res["link"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(res)
+    return merged
+
+def run_search_strategy(strategy: str, num_results: int, output_folder: str = "output") -> List[dict]:
+    """One SerpAPI query. Returns its organic results that have a link, or [] on any error."""
+    print(f"🔍 Trying search strategy: {strategy}")
+    params = {
+        "q": strategy,
+        "api_key": SERPAPI_API_KEY,
+        "engine": "google",
+        "num": num_results
+    }
+
+    try:
+        with get_tracer(output_folder).span("http.serpapi_search", kind="http", query=strategy) as search_span:
+            search_results = search_serpapi(params, output_folder)
+            search_span.set(results=len(search_results.get("organic_results", [])) if isinstance(search_results, dict) else 0)
+    except Exception as e:
+        print(f"❌ Error with strategy '{strategy}': {str(e)}")
+        return []
+
+    # Handle the case where we get HTML error instead of JSON
+    if not isinstance(search_results, dict):
+        print(f"❌ Got non-JSON response from SerpAPI (likely server error 522)")
+        return []
+
+    # Check for API errors
+    if "error" in search_results:
+        print(f"❌ API Error: {search_results['error']}")
+        return []
+
+    organic_results = [res for res in search_results.get("organic_results", []) if res.get("link")]
+    print(f"📄 Found {len(organic_results)} results for strategy: {strategy}")
+    return organic_results
+
+def search_serpapi(params: dict, output_folder: str = "output"):
+    """
+    Run one SerpAPI search through the shared HTTP client (same endpoint the serpapi package calls).
+    Returns the decoded JSON, or the raw body if SerpAPI answered with something else (e.g. a 522 page).
+    """
+    response = traced_request(get_client(), "GET", SERPAPI_SEARCH_URL, output_folder, params={**params, "output": "json"})
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+def scrape_article_text(url: str, output_folder: str = "output") -> str:
+    """
+    Scrapes and returns main text content from an article URL.
+    """
+    try:
+        response = traced_request(get_client(), "GET", url, output_folder, timeout=10, headers=ARTICLE_HEADERS)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, "html.parser")
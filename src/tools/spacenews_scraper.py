@@ -1,11 +1,24 @@
 from crewai.tools import tool
 from bs4 import BeautifulSoup
-import requests
 import time
 from typing import List, Dict
 import os
+import deadline
+from http_client import HttpClient, get_client
+from tracing import traced_request, traced_source
+from src.utils.corpus_store import CorpusStore
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.google.com/",
+}
+
+# Pause between requests to stay under SpaceNews rate limits
+REQUEST_DELAY_SECONDS = 10
 
 @tool("SpaceNews Article Scraper")
+@traced_source("spacenews")
 def SpaceNewsScraper(company: str, max_articles: int = 20, output_folder: str = "output") -> str:
     """
     Searches SpaceNews for articles related to the given company, scrapes each article,
@@ -15,18 +28,14 @@ def SpaceNewsScraper(company: str, max_articles: int = 20, output_folder: str =
         query = company.strip().replace(" ", "+")
         url = f"https://spacenews.com/?s={query}"
 
-        session = requests.Session()
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.google.com/",
-        })
+        client = get_client()
 
         # Get search results
-        response = session.get(url)
+        response = traced_request(client, "GET", url, output_folder, headers=HEADERS)
         if response.status_code != 200:
             return f"Failed to retrieve search results. Status code: {response.status_code}"
-        time.sleep(10)
+        if not deadline.sleep(REQUEST_DELAY_SECONDS):
+            return f"Deadline reached before any SpaceNews article for '{company}' was scraped."
 
         soup = BeautifulSoup(response.text, "html.parser")
         posts = soup.select("h2.entry-title a")
@@ -37,9 +46,11 @@ def SpaceNewsScraper(company: str, max_articles: int = 20, output_folder: str =
         # Scrape individual articles
         articles = []
         for i, post in enumerate(posts[:max_articles]):
-            if i > 0:
-                time.sleep(10)
-            article_data = scrape_article(session, post)
+            # Out of time: keep the articles scraped so far
+            if i > 0 and not deadline.sleep(REQUEST_DELAY_SECONDS):
+                print(f"⏱️ SpaceNews deadline reached after {len(articles)} articles")
+                break
+            article_data = scrape_article(client, post, output_folder)
             if article_data:
                 articles.append(article_data)
 
@@ -60,6 +71,10 @@ def SpaceNewsScraper(company: str, max_articles: int = 20, output_folder: str =
 
         with open(filepath, "w", encoding="utf-8") as f:
             f.write(result.strip())
+        CorpusStore(output_folder).add_documents("spacenews", filename, [
+            {"title": article["title"], "url": article["url"], "text": article["full_text"], "fetched_at": article.get("fetched_at")}
+            for article in articles
+        ])
 
         return f"Full article text saved to '{filepath}'"
 
@@ -67,7 +82,7 @@ def SpaceNewsScraper(company: str, max_articles: int = 20, output_folder: str =
         return f"An error occurred while scraping SpaceNews: {str(e)}"
 
 
-def scrape_article(session: requests.Session, post_link) -> Dict[str, str]:
+def scrape_article(client: HttpClient, post_link, output_folder: str = "output") -> Dict[str, str]:
     """
     Scrapes an individual SpaceNews article and returns full text.
     """
@@ -75,7 +90,7 @@ def scrape_article(session: requests.Session, post_link) -> Dict[str, str]:
         title = post_link.get_text(strip=True)
         url = post_link["href"]
 
-        response = session.get(url)
+        response = traced_request(client, "GET", url, output_folder, headers=HEADERS)
         if response.status_code != 200:
             return {"title": title, "url": url, "full_text": f"Could not retrieve article content: {response.status_code}"}
 
@@ -103,7 +118,8 @@ def scrape_article(session: requests.Session, post_link) -> Dict[str, str]:
         return {
             "title": title,
             "url": url,
-            "full_text": full_text
+            "full_text": full_text,
+            "fetched_at": time.time()
         }
 
     except Exception as e:
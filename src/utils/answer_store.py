@@ -0,0 +1,98 @@
+import os
+import json
+import time
+from typing import Dict, List, Optional
+from utils import sanitize_filename
+from src.utils.keyed_locks import KeyedLocks
+
+# One lock per answers file so concurrent tool calls for the same job don't interleave lines
+_locks = KeyedLocks()
+
+
+class AnswerStore:
+    """
+    Append-only JSONL store for teardown answers.
+
+    Each answer is one line in <company>_answers.jsonl, so saving an answer is a single
+    append instead of rewriting the teardown. The markdown is built once from the store
+    (at the end of a job, or on demand for previews) and written with an atomic rename.
+    An answer produced with less data than it needed (e.g. cut short by a time budget)
+    carries a "partial" list of reasons, which the markdown shows under the answer.
+    """
+
+    def __init__(self, output_folder: str, company_name: str):
+        self.output_folder = output_folder
+        self.company_name = company_name
+        self.safe_name = sanitize_filename(company_name)
+        self.path = os.path.join(output_folder, f"{self.safe_name}_answers.jsonl")
+
+    def append(self, question_id: str, answer: str, partial: Optional[List[str]] = None,
+               template_version: Optional[str] = None):
+        """Append a single answer record to the store, with the version of the templates it was made from."""
+        record = {
+            "question_id": question_id,
+            "answer": answer,
+            "timestamp": time.time(),
+            "company_name": self.company_name
+        }
+        if partial:
+            record["partial"] = partial
+        if template_version:
+            record["template_version"] = template_version
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+
+        os.makedirs(self.output_folder, exist_ok=True)
+        with _locks.hold(self.path):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def load(self) -> Dict[str, str]:
+        """Read all answers; later records for the same question win."""
+        return {question_id: record.get("answer", "") for question_id, record in self.load_records().items()}
+
+    def load_records(self) -> Dict[str, Dict]:
+        """Latest full record per question"""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crashed writer - skip it
+                    continue
+                question_id = record.get("question_id")
+                if question_id:
+                    records[question_id] = record
+        return records
+
+    def render_markdown(self, questions: List[Dict], answers: Optional[Dict[str, str]] = None,
+                        notes: Optional[Dict[str, List[str]]] = None) -> str:
+        """
+        Build the teardown markdown in question order. notes adds reasons an answer is partial
+        to those stored with it (e.g. the job's sources that were cut short).
+        """
+        records = self.load_records()
+        if answers is None:
+            answers = {question_id: record.get("answer", "") for question_id, record in records.items()}
+        partial = {question_id: list(record.get("partial") or []) for question_id, record in records.items()}
+        for question_id, reasons in (notes or {}).items():
+            partial.setdefault(question_id, []).extend(r for r in reasons if r not in partial[question_id])
+
+        q_ids = [q.get("id") for q in questions if q.get("id")]
+        partial_count = sum(1 for q_id in q_ids if partial.get(q_id))
+
+        markdown_content = f"# Company Teardown: {self.company_name}\n\n"
+        if partial_count:
+            markdown_content += f"> ⚠️ Partial teardown: {partial_count} of {len(q_ids)} answers are incomplete.\n\n"
+        for q_id in q_ids:
+            answer = answers.get(q_id, "#")  # Use # as placeholder if no answer
+            markdown_content += f"## {q_id}\n{answer}\n\n"
+            if partial.get(q_id):
+                markdown_content += f"> ⚠️ Partial answer: {'; '.join(partial[q_id])}\n\n"
+        return markdown_content
@@ -0,0 +1,265 @@
+"""
+Corpus cleaning before LLM ingestion.
+
+Scraped .txt files are split back into documents (website pages, news articles), then:
+
+1. Boilerplate: a line that appears in more than half of a site's documents (nav bars, footers,
+   cookie banners, newsletter prompts) is kept only in the first of them.
+2. Near-duplicates: documents are compared with bottom-k MinHash over 5-word shingles, and a
+   document that is >= 80% similar to a longer one already kept (e.g. the same press release from
+   GlobeNewswire and SerpAPI) is dropped.
+
+Documents come from the job's CorpusStore when it has one, otherwise from parsing the .txt files.
+The result is cached per job in corpus_clean.json and reused until the sources change, so the work
+is done once per job rather than once per question.
+"""
+import os
+import re
+import json
+import heapq
+import hashlib
+import tempfile
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from src.utils.corpus_store import CorpusStore
+
+CLEAN_CACHE_FILENAME = "corpus_clean.json"
+
+BOILERPLATE_MIN_DOCUMENTS = 3
+BOILERPLATE_RATIO = 0.5
+SHINGLE_WORDS = 5
+SKETCH_SIZE = 128
+DUPLICATE_THRESHOLD = 0.8
+MIN_WORDS_FOR_DEDUPE = 30
+
+ARTICLE_SEPARATOR = "=" * 80
+_PAGE_HEADER = re.compile(r"^--- (.*) \((\S+)\) ---$", re.MULTILINE)
+_URL_LINE = re.compile(r"^URL: (\S+)", re.MULTILINE)
+
+
+@dataclass
+class Document:
+    filename: str
+    site: str
+    header: str
+    lines: List[str]
+    dropped: bool = False
+    sketch: List[int] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+@dataclass
+class SourceFile:
+    filename: str
+    documents: List[Document]
+    joiner: str
+
+
+def _site_of(url: str, fallback: str) -> str:
+    host = urlparse(url).netloc.lower() if url else ""
+    return host[4:] if host.startswith("www.") else (host or fallback)
+
+
+def parse_source_file(filename: str, data: str) -> SourceFile:
+    """Split one scraped file into documents using the separators the scrapers write"""
+    headers = list(_PAGE_HEADER.finditer(data))
+    if headers:
+        # Company website: one "--- title (url) ---" header per crawled page
+        documents = []
+        for i, match in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(data)
+            body = data[match.end():end]
+            documents.append(Document(filename, _site_of(match.group(2), filename), match.group(0),
+                                      [line for line in body.split("\n") if line.strip()]))
+        return SourceFile(filename, documents, "\n\n")
+
+    if ARTICLE_SEPARATOR in data:
+        # SpaceNews / GlobeNewswire: articles separated by a line of "="
+        documents = []
+        for part in data.split(ARTICLE_SEPARATOR):
+            if not part.strip():
+                continue
+            url_match = _URL_LINE.search(part)
+            documents.append(Document(filename, _site_of(url_match.group(1) if url_match else "", filename), "",
+                                      [line for line in part.split("\n") if line.strip()]))
+        return SourceFile(filename, documents, f"\n\n{ARTICLE_SEPARATOR}\n\n")
+
+    url_match = _URL_LINE.search(data)
+    return SourceFile(filename, [Document(filename, _site_of(url_match.group(1) if url_match else "", filename), "",
+                                          [line for line in data.split("\n") if line.strip()])], "\n\n")
+
+
+def sources_from_store(store: CorpusStore) -> List[SourceFile]:
+    """Documents from the job's corpus store, grouped by the export file they belong to"""
+    sources: Dict[str, SourceFile] = {}
+    for stored, text in store.iter_texts():
+        header = f"--- {stored.title or stored.url} ({stored.url}) ---" if stored.url else stored.title
+        source = sources.setdefault(stored.filename, SourceFile(stored.filename, [], "\n\n"))
+        source.documents.append(Document(stored.filename, _site_of(stored.url, stored.filename), header,
+                                         [line for line in text.split("\n") if line.strip()]))
+    return list(sources.values())
+
+
+def render_source_file(source: SourceFile) -> str:
+    parts = []
+    for document in source.documents:
+        if document.dropped or not document.lines:
+            continue
+        parts.append(f"{document.header}\n{document.text}" if document.header else document.text)
+    return source.joiner.join(parts).strip()
+
+
+def strip_boilerplate(documents: List[Document]) -> int:
+    """Drop lines repeated across most documents of the same site. Returns the number of lines removed."""
+    by_site: Dict[str, List[Document]] = {}
+    for document in documents:
+        by_site.setdefault(document.site, []).append(document)
+
+    removed = 0
+    for site_documents in by_site.values():
+        if len(site_documents) < BOILERPLATE_MIN_DOCUMENTS:
+            continue
+        line_counts: Dict[str, int] = {}
+        for document in site_documents:
+            for line in {line.strip() for line in document.lines}:
+                line_counts[line] = line_counts.get(line, 0) + 1
+        threshold = BOILERPLATE_RATIO * len(site_documents)
+        boilerplate = {line for line, count in line_counts.items() if count > threshold}
+        if not boilerplate:
+            continue
+        # Each repeated line survives once, in the first document that has it, so content that only
+        # looks like boilerplate (e.g. several URLs serving the same page) is never lost entirely
+        seen = set()
+        for document in site_documents:
+            kept = []
+            for line in document.lines:
+                key = line.strip()
+                if key in boilerplate:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                kept.append(line)
+            removed += len(document.lines) - len(kept)
+            document.lines = kept
+    return removed
+
+
+def minhash_sketch(text: str, size: int = SKETCH_SIZE) -> List[int]:
+    """Bottom-k MinHash: the `size` smallest 64-bit hashes of the document's word shingles"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < MIN_WORDS_FOR_DEDUPE:
+        return []
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles)
+    return sorted(heapq.nsmallest(size, hashes))
+
+
+def estimate_similarity(a: List[int], b: List[int], size: int = SKETCH_SIZE) -> float:
+    """Jaccard estimate from two bottom-k sketches"""
+    if not a or not b:
+        return 0.0
+    union_bottom = heapq.nsmallest(size, set(a) | set(b))
+    a_set, b_set = set(a), set(b)
+    return sum(1 for h in union_bottom if h in a_set and h in b_set) / len(union_bottom)
+
+
+def drop_near_duplicates(documents: List[Document]) -> int:
+    """Mark documents that near-duplicate a longer kept one as dropped. Returns how many were dropped."""
+    candidates = [d for d in documents if not d.dropped]
+    for document in candidates:
+        document.sketch = minhash_sketch(document.text)
+
+    kept: List[Document] = []
+    dropped = 0
+    # Longest first so the fullest copy of a story survives
+    for document in sorted(candidates, key=lambda d: -len(d.text)):
+        if document.sketch and any(
+            estimate_similarity(document.sketch, other.sketch) >= DUPLICATE_THRESHOLD for other in kept
+        ):
+            document.dropped = True
+            dropped += 1
+        else:
+            kept.append(document)
+    return dropped
+
+
+def clean_sources(sources: List[SourceFile]) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    Clean parsed sources in place and render them as [{"filename", "data", "size"}] for the compiler.
+    Returns the cleaned list and a report of what was removed.
+    """
+    documents = [document for source in sources for document in source.documents]
+    chars_before = sum(len(render_source_file(source)) for source in sources)
+
+    boilerplate_lines = strip_boilerplate(documents)
+    duplicate_documents = drop_near_duplicates(documents)
+
+    cleaned = []
+    for source in sources:
+        data = render_source_file(source)
+        if data:
+            cleaned.append({"filename": source.filename, "data": data, "size": len(data)})
+
+    chars_after = sum(item["size"] for item in cleaned)
+    report = {
+        "documents": len(documents),
+        "boilerplate_lines": boilerplate_lines,
+        "duplicate_documents": duplicate_documents,
+        "tokens_before": chars_before // 4,
+        "tokens_after": chars_after // 4,
+        "tokens_saved": (chars_before - chars_after) // 4
+    }
+    return cleaned, report
+
+
+def clean_corpus(company_data: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """Clean [{"filename", "data", "size"}] as loaded from the .txt files"""
+    return clean_sources([parse_source_file(item["filename"], item["data"]) for item in company_data])
+
+
+def _fingerprint(company_data: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for item in sorted(company_data, key=lambda item: item["filename"]):
+        digest.update(item["filename"].encode("utf-8"))
+        digest.update(hashlib.sha256(item["data"].encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def _cached_clean(output_folder: str, fingerprint: str,
+                  clean: Callable[[], Tuple[List[Dict[str, str]], Dict[str, int]]]) -> Tuple[List[Dict[str, str]], Optional[Dict[str, int]]]:
+    cache_path = os.path.join(output_folder, CLEAN_CACHE_FILENAME)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["data"], None
+    except (OSError, ValueError):
+        pass
+
+    cleaned, report = clean()
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=output_folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "report": report, "data": cleaned}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not cache cleaned corpus: {e}")
+    return cleaned, report
+
+
+def load_clean_corpus(output_folder: str, company_data: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], Optional[Dict[str, int]]]:
+    """
+    Cleaned corpus for a job, computed once and cached in the job folder until the sources change.
+    Returns (cleaned data, report) where report is None on a cache hit.
+    """
+    return _cached_clean(output_folder, _fingerprint(company_data), lambda: clean_corpus(company_data))
+
+
+def load_clean_store(store: CorpusStore) -> Tuple[List[Dict[str, str]], Optional[Dict[str, int]]]:
+    """Same as load_clean_corpus, reading documents from the job's corpus store instead of the .txt files"""
+    return _cached_clean(store.output_folder, "store:" + store.fingerprint(), lambda: clean_sources(sources_from_store(store)))
@@ -0,0 +1,120 @@
+import os
+import json
+import mmap
+import time
+import hashlib
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.utils.keyed_locks import KeyedLocks
+
+INDEX_FILENAME = "corpus_index.jsonl"
+BLOB_FILENAME = "corpus.blob"
+
+# One lock per job folder so parallel tools in a job don't interleave blob appends and index rows
+_locks = KeyedLocks()
+
+
+@dataclass
+class CorpusDocument:
+    source: str
+    filename: str
+    url: str
+    title: str
+    fetched_at: float
+    sha256: str
+    offset: int
+    length: int
+    batch: int
+
+
+class CorpusStore:
+    """
+    Structured per-job corpus: one UTF-8 text blob plus a document table.
+
+    corpus.blob holds every document's text back to back; corpus_index.jsonl has one row per
+    document with its source, URL, title, fetch time, hash and byte offset/length into the blob.
+    Readers memory-map the blob and slice documents out without re-parsing the .txt exports,
+    which the scrapers keep writing for people and older tooling.
+
+    Both files are append-only. A tool that runs again for the same export file writes a new
+    batch, and only the latest batch per file is returned, mirroring how the .txt is overwritten.
+    """
+
+    def __init__(self, output_folder: str):
+        self.output_folder = output_folder
+        self.index_path = os.path.join(output_folder, INDEX_FILENAME)
+        self.blob_path = os.path.join(output_folder, BLOB_FILENAME)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.index_path) and os.path.exists(self.blob_path)
+
+    def add_documents(self, source: str, filename: str, documents: List[Dict]) -> List[CorpusDocument]:
+        """
+        Append one export file's documents: [{"text", "url", "title", "fetched_at"}].
+        Replaces any documents previously added for the same filename.
+        """
+        os.makedirs(self.output_folder, exist_ok=True)
+        batch = time.time_ns()
+        added = []
+        with _locks.hold(self.index_path):
+            with open(self.blob_path, "ab") as blob, open(self.index_path, "a", encoding="utf-8") as index:
+                offset = blob.tell()
+                for document in documents:
+                    data = (document.get("text") or "").strip().encode("utf-8")
+                    if not data:
+                        continue
+                    blob.write(data)
+                    added.append(CorpusDocument(
+                        source=source,
+                        filename=filename,
+                        url=document.get("url", ""),
+                        title=document.get("title", ""),
+                        fetched_at=document.get("fetched_at") or time.time(),
+                        sha256=hashlib.sha256(data).hexdigest(),
+                        offset=offset,
+                        length=len(data),
+                        batch=batch
+                    ))
+                    offset += len(data)
+                # Text is flushed before its index rows so a reader never sees a row past the blob's end
+                blob.flush()
+                index.write("".join(json.dumps(asdict(d), ensure_ascii=False) + "\n" for d in added))
+        return added
+
+    def documents(self) -> List[CorpusDocument]:
+        """Current documents in insertion order (latest batch per export file)"""
+        if not os.path.exists(self.index_path):
+            return []
+        rows = []
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(CorpusDocument(**json.loads(line)))
+                except (ValueError, TypeError):
+                    continue  # a partially written last line
+        latest: Dict[str, int] = {}
+        for row in rows:
+            latest[row.filename] = max(latest.get(row.filename, 0), row.batch)
+        return [row for row in rows if row.batch == latest[row.filename]]
+
+    def iter_texts(self, documents: Optional[List[CorpusDocument]] = None) -> Iterator[Tuple[CorpusDocument, str]]:
+        """Yield (document, text) pairs, slicing each document out of one mapping of the blob"""
+        documents = self.documents() if documents is None else documents
+        if not documents or not os.path.exists(self.blob_path) or os.path.getsize(self.blob_path) == 0:
+            return
+        with open(self.blob_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+            for document in documents:
+                yield document, blob[document.offset:document.offset + document.length].decode("utf-8")
+
+    def text(self, document: CorpusDocument) -> str:
+        for _, text in self.iter_texts([document]):
+            return text
+        return ""
+
+    def fingerprint(self) -> str:
+        """Hash of the current document table; changes whenever a document is added or replaced"""
+        digest = hashlib.sha256()
+        for document in self.documents():
+            digest.update(f"{document.filename}\0{document.sha256}\n".encode("utf-8"))
+        return digest.hexdigest()
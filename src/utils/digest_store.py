@@ -0,0 +1,140 @@
+"""
+Per-document digests shared by every question (map once, reduce many).
+
+Without digests each complex question runs its own map pass over every chunk, so the LLM reads
+the same source text once per question. Instead, every document in the cleaned corpus (a website
+page, a news article) is digested once into a compact structured extraction - facts, people,
+funding, customers, contracts, dates - and each question's answer is written from the digests.
+
+Digests are cached on disk by a hash of the document text (plus the digest prompt version and the
+model), so they are also reused when the same article shows up in another company's job. The
+first question of a job that needs a digest makes it; parallel questions of the same job skip
+documents another question is digesting and pick the result up afterwards.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+import deadline
+from metrics import DIGEST_CACHE
+from src.utils.keyed_locks import KeyedLocks
+
+DIGEST_CACHE_DIR = os.environ.get("TEARDOWN_DIGEST_CACHE_DIR", os.path.join("cache", "digests"))
+# Bump when DIGEST_PROMPT changes so digests made with the old prompt aren't reused
+DIGEST_VERSION = "1"
+DIGEST_FIELDS = ("facts", "people", "funding", "customers", "contracts", "dates")
+# Documents shorter than this are used as they are; digesting them would cost more than it saves
+MIN_DIGEST_TOKENS = 150
+# Longer documents are truncated before digesting, like oversized files when chunking
+MAX_DIGEST_TOKENS = 8000
+
+# Company-neutral, so the digest of an article can be reused for every company it mentions
+DIGEST_PROMPT = """You are a company research analyst. Extract the key information from this document.
+
+Document:
+{document}
+
+Write one line per category, with the items separated by "; ". Keep names, numbers and dates exactly as written. Write "none" for a category with nothing relevant.
+FACTS: products, technology, strategy, size, locations, partnerships
+PEOPLE: names and roles
+FUNDING: rounds, amounts, investors, revenue
+CUSTOMERS: customers and customer types
+CONTRACTS: contracts, awards, agencies, amounts
+DATES: dated events"""
+
+# One lock per digest key so two questions never pay for the same digest
+_locks = KeyedLocks()
+
+
+def digest_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{DIGEST_VERSION}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def parse_digest(response: str) -> Dict[str, List[str]]:
+    """Split a digest response into its categories; unlabelled lines count as facts"""
+    digest: Dict[str, List[str]] = {name: [] for name in DIGEST_FIELDS}
+    for line in response.split("\n"):
+        line = line.strip().lstrip("-* ").strip()
+        if not line:
+            continue
+        label, _, value = line.partition(":")
+        name = label.strip().lower()
+        if name in digest:
+            items = value.split(";")
+        else:
+            name, items = "facts", [line]
+        digest[name].extend(item.strip() for item in items if item.strip() and item.strip().lower() != "none")
+    return digest
+
+
+def render_digest(header: str, digest: Dict[str, List[str]]) -> str:
+    lines = [f"{name.upper()}: {'; '.join(digest[name])}" for name in DIGEST_FIELDS if digest.get(name)]
+    if not lines:
+        return ""
+    return f"{header}\n" + "\n".join(lines) if header else "\n".join(lines)
+
+
+class DigestStore:
+    """Content-addressed digest cache: one JSON file per digest key"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or DIGEST_CACHE_DIR
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, List[str]]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["digest"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, digest: Dict[str, List[str]]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": DIGEST_VERSION, "digest": digest}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _get_or_create(self, key: str, create: Callable[[], str]) -> Optional[Dict[str, List[str]]]:
+        # Called with the key's lock held
+        digest = self.get(key)
+        if digest is not None:
+            DIGEST_CACHE.inc(result="hit")
+            return digest
+        DIGEST_CACHE.inc(result="miss")
+        try:
+            digest = parse_digest(create())
+        except Exception as e:
+            print(f"⚠️ Digest failed: {e}")
+            return None
+        try:
+            self.put(key, digest)
+        except OSError as e:
+            print(f"Warning: could not cache digest: {e}")
+        return digest
+
+    def digests(self, keys: List[str], create: Callable[[int], str]) -> List[Optional[Dict[str, List[str]]]]:
+        """
+        Digest for each key, in order; create(i) returns the LLM response for keys[i] on a miss.
+        Keys another thread is digesting are picked up after the rest. Once the time budget says
+        to wrap up, only cached digests are returned, and None for the documents not digested.
+        """
+        results: List[Optional[Dict[str, List[str]]]] = [None] * len(keys)
+        deferred = []
+        for i, key in enumerate(keys):
+            if not _locks.acquire(key, blocking=False):
+                deferred.append(i)
+                continue
+            try:
+                results[i] = self.get(key) if deadline.should_wrap_up() else self._get_or_create(key, lambda: create(i))
+            finally:
+                _locks.release(key)
+        for i in deferred:
+            with _locks.hold(keys[i]):
+                results[i] = self.get(keys[i]) if deadline.should_wrap_up() else self._get_or_create(keys[i], lambda: create(i))
+        return results
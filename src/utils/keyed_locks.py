@@ -0,0 +1,49 @@
+"""
+One lock per key (a file path, a digest hash) without keeping a lock for every key ever seen.
+
+Each key's lock is counted by the threads holding or waiting on it and dropped when the last one
+releases, so a long-running server only keeps locks for the keys in use right now.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+class KeyedLocks:
+    def __init__(self):
+        # key -> [lock, threads holding or waiting on it]
+        self._locks: Dict[str, List] = {}
+        self._guard = threading.Lock()
+
+    def acquire(self, key: str, blocking: bool = True) -> bool:
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        if entry[0].acquire(blocking):
+            return True
+        self._drop(key, entry)
+        return False
+
+    def release(self, key: str):
+        with self._guard:
+            entry = self._locks[key]
+        entry[0].release()
+        self._drop(key, entry)
+
+    def _drop(self, key: str, entry: List):
+        with self._guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._locks)
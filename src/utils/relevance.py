@@ -0,0 +1,64 @@
+"""
+Lexical relevance of chunks to a question, so the map phase reads the most promising chunks first.
+
+Chunks are scored with BM25 against the words of the question's title and instruction, plus its
+"keywords" from question.json (counted twice), e.g. "keywords": ["series", "raised", "round"].
+Chunks without any question words keep their original order after the scored ones.
+"""
+import re
+import math
+from collections import Counter
+from typing import Dict, List
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "as", "at", "be", "by", "each", "e", "g", "for", "from", "how", "if",
+    "in", "into", "is", "it", "its", "of", "on", "one", "or", "say", "the", "their", "them", "they",
+    "this", "to", "up", "use", "what", "who", "with", "you", "your", "provide", "bullet", "point",
+    "bulletpoint", "list", "summarize", "sentences", "answer", "brief", "short", "company"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words without stopwords, with a plural "s" stripped"""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        words.append(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word)
+    return words
+
+
+def question_terms(question: Dict) -> Counter:
+    terms = Counter(tokenize(f"{question.get('title', '')} {question.get('instruction', '')}"))
+    for keyword in question.get("keywords") or []:
+        for word in tokenize(keyword):
+            terms[word] += 2
+    return terms
+
+
+def rank_chunks(question: Dict, chunks: List[str]) -> List[int]:
+    """Chunk indices, most relevant to the question first"""
+    terms = question_terms(question)
+    if len(chunks) < 2 or not terms:
+        return list(range(len(chunks)))
+
+    counts = [Counter(tokenize(chunk)) for chunk in chunks]
+    lengths = [sum(c.values()) for c in counts]
+    average = sum(lengths) / len(lengths) or 1
+    scores = []
+    for chunk_counts, length in zip(counts, lengths):
+        score = 0.0
+        for term, weight in terms.items():
+            tf = chunk_counts.get(term, 0)
+            if not tf:
+                continue
+            df = sum(1 for c in counts if term in c)
+            idf = math.log(1 + (len(chunks) - df + 0.5) / (df + 0.5))
+            score += weight * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average))
+        scores.append(score)
+    # Stable, so equally relevant chunks keep the compiler's source priority order
+    return sorted(range(len(chunks)), key=lambda i: -scores[i])
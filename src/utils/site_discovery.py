@@ -0,0 +1,195 @@
+"""
+robots.txt and sitemap discovery for the company website crawler.
+
+Following links from the homepage can take many fetches to reach /about or /press. Before it
+crawls, CompanyWebsiteScraper reads the site's robots.txt and its sitemaps (robots.txt "Sitemap:"
+lines, or /sitemap.xml when it lists none; sitemap indexes are followed). It then ranks the
+sitemap URLs by the crawler's priority keywords, then newest lastmod, then shortest path, and
+seeds the crawl frontier with the best ones. robots.txt also gives the crawl-delay to wait
+between fetches and the paths the crawler must not fetch.
+"""
+import io
+import gzip
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import deadline
+from tracing import traced_request
+from src.utils.urls import canonical_url
+
+# Sitemap files fetched per site, counting the children of sitemap indexes
+MAX_SITEMAPS = 10
+# URLs read from all sitemaps together
+MAX_SITEMAP_URLS = 5000
+# Uncompressed size limit for one sitemap (the sitemap protocol allows 50MB; company sites are far smaller)
+MAX_SITEMAP_BYTES = 10 * 1024 * 1024
+
+# Links to files the crawler can't extract text from
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".mp4", ".zip", ".xml", ".doc", ".docx", ".ppt", ".pptx")
+
+
+@dataclass
+class Robots:
+    parser: Optional[RobotFileParser] = None
+    crawl_delay: float = 0.0
+    sitemaps: List[str] = field(default_factory=list)
+
+    def allowed(self, url: str, user_agent: str = "*") -> bool:
+        return self.parser is None or self.parser.can_fetch(user_agent, url)
+
+
+def same_site(url: str, base_domain: str) -> bool:
+    """True if url is on base_domain, treating "www." and the bare domain as the same site"""
+    host = urlparse(url).netloc.lower()
+    base = base_domain.lower()
+    return (host[4:] if host.startswith("www.") else host) == (base[4:] if base.startswith("www.") else base)
+
+
+def _crawl_delay(lines: List[str]) -> float:
+    """Crawl-delay of the "User-agent: *" group. RobotFileParser only reads whole seconds, so parse it here."""
+    applies = False
+    in_agents = False
+    for line in lines:
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            # Consecutive User-agent lines open one group
+            applies = (applies and in_agents) or value == "*"
+            in_agents = True
+            continue
+        in_agents = False
+        if key == "crawl-delay" and applies:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return 0.0
+    return 0.0
+
+
+def fetch_robots(client, site_url: str, output_folder: str, headers: dict) -> Robots:
+    """robots.txt of the site; a missing or unreadable file allows everything"""
+    url = urljoin(site_url, "/robots.txt")
+    try:
+        response = traced_request(client, "GET", url, output_folder, headers=headers, timeout=5)
+    except Exception:
+        return Robots()
+    if response.status_code != 200 or "html" in response.headers.get("Content-Type", ""):
+        return Robots()
+    lines = response.text.splitlines()
+    parser = RobotFileParser(url)
+    parser.parse(lines)
+    return Robots(parser=parser, crawl_delay=_crawl_delay(lines), sitemaps=list(parser.site_maps() or []))
+
+
+def _sitemap_xml(content: bytes) -> Optional[ET.Element]:
+    if content[:2] == b"\x1f\x8b":
+        with gzip.GzipFile(fileobj=io.BytesIO(content)) as f:
+            content = f.read(MAX_SITEMAP_BYTES + 1)
+        if len(content) > MAX_SITEMAP_BYTES:
+            return None
+    try:
+        return ET.fromstring(content)
+    except ET.ParseError:
+        return None
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _lastmod_timestamp(value: Optional[str]) -> float:
+    """W3C datetime ("2024-05-01" or "2024-05-01T10:00:00+00:00") as a timestamp, 0 if missing or invalid"""
+    if not value:
+        return 0.0
+    value = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value[:10], "%Y-%m-%d")
+        except ValueError:
+            return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def fetch_sitemap_urls(client, site_url: str, robots: Robots, output_folder: str,
+                       headers: dict) -> Tuple[List[Tuple[str, float]], int]:
+    """
+    (url, lastmod timestamp) pairs from the site's sitemaps, following sitemap indexes.
+    Returns them with the number of sitemap files fetched.
+    """
+    queue = list(robots.sitemaps) or [urljoin(site_url, "/sitemap.xml")]
+    seen = set()
+    entries: List[Tuple[str, float]] = []
+    fetched = 0
+    while queue and fetched < MAX_SITEMAPS and len(entries) < MAX_SITEMAP_URLS:
+        sitemap_url = queue.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        if fetched and robots.crawl_delay and not deadline.sleep(robots.crawl_delay):
+            break
+        fetched += 1
+        try:
+            response = traced_request(client, "GET", sitemap_url, output_folder, headers=headers, timeout=5)
+        except Exception:
+            continue
+        root = _sitemap_xml(response.content) if response.status_code == 200 else None
+        if root is None:
+            continue
+
+        for node in root:
+            children = {_local(child.tag): (child.text or "").strip() for child in node}
+            loc = children.get("loc")
+            if not loc:
+                continue
+            if _local(root.tag) == "sitemapindex":
+                queue.append(loc)
+            elif len(entries) < MAX_SITEMAP_URLS:
+                entries.append((loc, _lastmod_timestamp(children.get("lastmod"))))
+    return entries, fetched
+
+
+def rank_urls(entries: List[Tuple[str, float]], priority_keywords: List[str], base_domain: str,
+              robots: Robots, limit: int) -> List[str]:
+    """
+    The `limit` best crawlable URLs: priority keyword in the path first, then newest lastmod,
+    then fewest path segments (section pages before deep articles).
+    """
+    keywords = [kw.lower().replace(" ", "-") for kw in priority_keywords]
+    best = {}
+    for url, lastmod in entries:
+        path = urlparse(url).path.lower()
+        if not same_site(url, base_domain) or path.endswith(SKIP_EXTENSIONS) or not robots.allowed(url):
+            continue
+        key = (
+            0 if any(kw in path for kw in keywords) else 1,
+            -lastmod,
+            len([segment for segment in path.split("/") if segment])
+        )
+        if url not in best or key < best[url]:
+            best[url] = key
+    return sorted(best, key=lambda url: best[url])[:limit]
+
+
+def discover(client, site_url: str, priority_keywords: List[str], limit: int, output_folder: str,
+             headers: dict) -> Tuple[Robots, List[str]]:
+    """robots.txt rules and up to `limit` ranked seed URLs for the crawl"""
+    start = time.perf_counter()
+    robots = fetch_robots(client, site_url, output_folder, headers)
+    entries, sitemaps = fetch_sitemap_urls(client, site_url, robots, output_folder, headers)
+    # The crawl starts at the homepage anyway
+    home = canonical_url(site_url)
+    ranked = rank_urls(entries, priority_keywords, urlparse(site_url).netloc, robots, limit + 1)
+    seeds = [url for url in ranked if canonical_url(url) != home][:limit]
+    print(f"🗺️ Site discovery: {len(entries)} URLs in {sitemaps} sitemaps, {len(seeds)} seeds"
+          f"{f', crawl-delay {robots.crawl_delay:g}s' if robots.crawl_delay else ''} "
+          f"({time.perf_counter() - start:.2f}s)")
+    return robots, seeds
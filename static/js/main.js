@@ -356,12 +356,14 @@ Planet Labs,https://planet.com`;
         async start() {
             this.running = true;
             
+            // Resolve everyone's government contracts up front in a few bulk requests
+            prefetchContracts(this.companies.map(c => c.name));
+            
             // Start initial batch
             await this.processNext();
             
-            // Monitor until all complete
+            // Monitor until all complete; each status check waits on the server until something changes
             while (this.running && this.completedCount < this.companies.length) {
-                await this.sleep(2000);
                 await this.updateJobStatuses();
                 await this.processNext();
             }
@@ -393,28 +395,59 @@ Planet Labs,https://planet.com`;
 
         async updateJobStatuses() {
             const activeCompanies = this.companies.filter(c => c.status === 'running');
+            if (activeCompanies.length === 0) {
+                await this.sleep(2000);
+                return;
+            }
             
-            for (const company of activeCompanies) {
-                try {
-                    const response = await fetch(`/api/job_status/${company.jobId}`);
-                    const jobData = await response.json();
+            // One request for every running job, held by the server until any of them changes status
+            const known = {};
+            activeCompanies.forEach(c => {
+                if (c.serverStatus) known[c.jobId] = c.serverStatus;
+            });
+            
+            try {
+                const response = await fetch('/api/job_status', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        ids: activeCompanies.map(c => c.jobId),
+                        known: known,
+                        wait: 5
+                    })
+                });
+                const data = await response.json();
+                
+                if (!response.ok) {
+                    throw new Error(data.error || 'Failed to check job status');
+                }
+                
+                // The server had no free slot to hold the request; poll again later instead of at once
+                if (data.retry_after) {
+                    await this.sleep(data.retry_after * 1000);
+                }
+                
+                for (const company of activeCompanies) {
+                    const jobData = data.jobs[company.jobId];
+                    if (!jobData) continue;
+                    company.serverStatus = jobData.status;
                     
-                    if (response.ok) {
-                        if (jobData.status === 'completed') {
-                            company.status = 'completed';
-                            this.activeJobs.delete(company.id);
-                            this.completedCount++;
-                        } else if (jobData.status === 'failed') {
-                            company.status = 'failed';
-                            company.error = jobData.error_message || 'Unknown error';
-                            this.activeJobs.delete(company.id);
-                            this.completedCount++;
-                        }
-                        // 'running' and 'pending' statuses remain unchanged
+                    if (jobData.status === 'completed') {
+                        company.status = 'completed';
+                        company.partialReason = jobData.partial_reason;
+                        this.activeJobs.delete(company.id);
+                        this.completedCount++;
+                    } else if (jobData.status === 'failed') {
+                        company.status = 'failed';
+                        company.error = jobData.error_message || 'Unknown error';
+                        this.activeJobs.delete(company.id);
+                        this.completedCount++;
                     }
-                } catch (error) {
-                    console.error(`Error checking job ${company.jobId}:`, error);
+                    // 'running' and 'pending' statuses remain unchanged
                 }
+            } catch (error) {
+                console.error('Error checking job statuses:', error);
+                await this.sleep(2000);
             }
             
             this.updateProgress();
@@ -430,6 +463,15 @@ Planet Labs,https://planet.com`;
     }
 
     // Utility Functions
+    function prefetchContracts(companyNames) {
+        // Best effort: jobs fetch their own contracts if this hasn't finished
+        fetch('/api/contracts/prefetch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ companies: companyNames })
+        }).catch(error => console.warn('Contract prefetch failed:', error));
+    }
+
     async function startSingleJob(companyName, companyUrl) {
         const response = await fetch('/api/start_teardown', {
             method: 'POST',
@@ -523,6 +565,7 @@ Planet Labs,https://planet.com`;
                         <strong>${escapeHtml(company.name)}</strong>
                         <br><small class="text-muted">${escapeHtml(company.url)}</small>
                         ${company.error ? `<br><small class="text-danger">${escapeHtml(company.error)}</small>` : ''}
+                        ${company.partialReason ? `<br><small class="text-warning">Partial: ${escapeHtml(company.partialReason)}</small>` : ''}
                     </div>
                     <span class="badge bg-${statusClass}">${statusText}</span>
                 </div>
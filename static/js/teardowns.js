@@ -14,6 +14,11 @@ document.addEventListener('DOMContentLoaded', function() {
 
     let currentTeardown = null;
 
+    // Delta-sync state: the server cursor/ETag we last saw and the cards already rendered
+    let teardownsCursor = '';
+    let teardownsEtag = null;
+    const renderedTeardownIds = new Set();
+
     // Load teardowns on page load
     loadTeardowns();
 
@@ -22,14 +27,30 @@ document.addEventListener('DOMContentLoaded', function() {
 
     async function loadTeardowns() {
         try {
-            const response = await fetch('/api/teardowns');
-            const teardowns = await response.json();
+            const headers = teardownsEtag ? { 'If-None-Match': teardownsEtag } : {};
+            const response = await fetch(`/api/teardowns?since=${encodeURIComponent(teardownsCursor)}`, {
+                headers: headers,
+                cache: 'no-store'
+            });
+            
+            // Nothing added since the last poll
+            if (response.status === 304) {
+                return;
+            }
+            
+            const delta = await response.json();
             
             if (!response.ok) {
                 throw new Error('Failed to load teardowns');
             }
             
-            displayTeardowns(teardowns);
+            teardownsEtag = response.headers.get('ETag');
+            teardownsCursor = delta.cursor;
+            if (delta.reset) {
+                teardownsList.innerHTML = '';
+                renderedTeardownIds.clear();
+            }
+            addTeardownCards(delta.teardowns);
             
         } catch (error) {
             console.error('Error loading teardowns:', error);
@@ -37,47 +58,44 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function displayTeardowns(teardowns) {
-        if (teardowns.length === 0) {
-            teardownsList.innerHTML = '';
+    function addTeardownCards(teardowns) {
+        const newTeardowns = teardowns.filter(teardown => !renderedTeardownIds.has(teardown.id));
+        
+        if (renderedTeardownIds.size === 0 && newTeardowns.length === 0) {
             emptyState.style.display = 'block';
             return;
         }
 
         emptyState.style.display = 'none';
         
-        // Sort by creation date (newest first)
-        teardowns.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+        // New teardowns are newer than everything rendered, so they go on top, newest first
+        newTeardowns.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
         
-        teardownsList.innerHTML = teardowns.map(teardown => createTeardownCard(teardown)).join('');
+        const template = document.createElement('template');
+        template.innerHTML = newTeardowns.map(teardown => createTeardownCard(teardown)).join('');
+        template.content.querySelectorAll('.teardown-card').forEach(bindCardHandlers);
+        teardownsList.insertBefore(template.content, teardownsList.firstChild);
         
-        // Add click handlers for viewing teardowns
-        document.querySelectorAll('.teardown-card').forEach(card => {
-            card.addEventListener('click', function(e) {
-                // Don't open modal if clicking on download buttons
-                if (e.target.closest('.download-buttons')) {
-                    return;
-                }
-                const teardownId = this.dataset.teardownId;
-                openTeardown(teardownId);
-            });
+        newTeardowns.forEach(teardown => renderedTeardownIds.add(teardown.id));
+    }
+
+    function bindCardHandlers(card) {
+        // Click on the card opens the teardown, unless a download button was clicked
+        card.addEventListener('click', function(e) {
+            if (e.target.closest('.download-buttons')) {
+                return;
+            }
+            openTeardown(this.dataset.teardownId);
         });
 
-        // Add click handlers for card download buttons
-        document.querySelectorAll('.card-download-md').forEach(btn => {
-            btn.addEventListener('click', function(e) {
-                e.stopPropagation();
-                const teardownId = this.dataset.teardownId;
-                downloadTeardown(teardownId, 'md');
-            });
+        card.querySelector('.card-download-md').addEventListener('click', function(e) {
+            e.stopPropagation();
+            downloadTeardown(this.dataset.teardownId, 'md');
         });
 
-        document.querySelectorAll('.card-download-pdf').forEach(btn => {
-            btn.addEventListener('click', function(e) {
-                e.stopPropagation();
-                const teardownId = this.dataset.teardownId;
-                downloadTeardown(teardownId, 'pdf');
-            });
+        card.querySelector('.card-download-pdf').addEventListener('click', function(e) {
+            e.stopPropagation();
+            downloadTeardown(this.dataset.teardownId, 'pdf');
         });
     }
 
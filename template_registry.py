@@ -0,0 +1,252 @@
+"""
+Process-wide registry for the static template files.
+
+question.json, klear_context.txt, research_template.txt and example_teardown.txt only change
+between deployments, but every compiler call used to re-read and re-parse them. The registry
+loads them once, validates question.json, and precompiles each question's prompts with its
+title, instruction and Klear context filled in, so a call only formats in the company and data.
+
+Each load has a version: a short hash of the four files' contents. It is recorded on every job
+(and with every stored answer), so caches and incremental refreshes can tell which templates an
+answer was produced with. When a file's mtime or size changes the registry reloads on next use;
+if the new files don't validate, it keeps serving the last good version.
+
+    templates = get_templates()
+    prompt = templates.prompts["last_funding"].map.format(company_name=..., data=..., part=1, total=3,
+                                                          confidence_instruction="")
+"""
+import os
+import json
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+QUESTIONS_PATH = "template/question.json"
+KLEAR_CONTEXT_PATH = "template/klear_context.txt"
+RESEARCH_TEMPLATE_PATH = "template/research_template.txt"
+EXAMPLE_TEARDOWN_PATH = "template/example_teardown.txt"
+
+SIMPLE_PROMPT = """You are a company research analyst for {company_name}.
+
+Your task: {instruction}
+
+Company Data:
+{data}
+{klear_section}
+
+Instructions:
+- Answer only the specific question asked
+- Be precise and professional  
+- If information is not available, state "Information not available"
+
+Question: {title}
+Answer:"""
+
+MAP_PROMPT = """You are a company research analyst for {company_name}.
+
+Your task: {instruction}
+
+Company Data (Part {part}/{total}):
+{data}
+{klear_section}
+
+Instructions:
+- Extract only information relevant to: {title}
+- Be precise and concise
+- If no relevant information is found, say "No relevant information"{confidence_instruction}
+
+Question: {title}
+Relevant Information:"""
+
+SYNTHESIS_PROMPT = """Based on the following information about {company_name}, provide a comprehensive answer to: {title}
+
+Task: {instruction}
+
+Information gathered:
+{insights}
+
+Provide a final, synthesized answer:"""
+
+# Filled in per call; everything else in a prompt is fixed per question and filled in at load time
+_CALL_FIELDS = ("company_name", "data", "part", "total", "confidence_instruction", "insights")
+
+
+class TemplateError(ValueError):
+    """Raised when the template files are missing or question.json is invalid"""
+
+
+@dataclass(frozen=True)
+class QuestionPrompts:
+    """str.format templates with the question's fixed parts already filled in"""
+    simple: str
+    map: str
+    synthesis: str
+    klear_context: bool  # whether the prompts include the Klear context
+
+
+@dataclass(frozen=True)
+class Templates:
+    version: str
+    questions: List[Dict]  # shared by every caller; treat as read-only
+    klear_context: str
+    research_template: str
+    example_teardown: str
+    prompts: Dict[str, QuestionPrompts]
+
+    def question(self, question_id: str) -> Optional[Dict]:
+        return next((q for q in self.questions if q.get("id") == question_id), None)
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _precompile(template: str, question: Dict, klear_section: str) -> str:
+    fixed = {
+        "title": _escape(question["title"]),
+        "instruction": _escape(question["instruction"]),
+        "klear_section": _escape(klear_section)
+    }
+    return template.format(**fixed, **{name: "{" + name + "}" for name in _CALL_FIELDS})
+
+
+def validate_questions(questions) -> List[Dict]:
+    """Check question.json's structure; raises TemplateError naming the first problem"""
+    if not isinstance(questions, list) or not questions:
+        raise TemplateError("question.json must be a non-empty list of questions")
+    seen = set()
+    for i, q in enumerate(questions):
+        if not isinstance(q, dict):
+            raise TemplateError(f"question {i + 1} is not an object")
+        for key in ("id", "title", "instruction"):
+            if not isinstance(q.get(key), str) or not q[key].strip():
+                raise TemplateError(f"question {q.get('id') or i + 1} is missing '{key}'")
+        if q["id"] in seen:
+            raise TemplateError(f"duplicate question id '{q['id']}'")
+        seen.add(q["id"])
+        for key in ("sources", "optional_sources", "keywords"):
+            if key in q and not (isinstance(q[key], list) and all(isinstance(v, str) for v in q[key])):
+                raise TemplateError(f"question {q['id']}: '{key}' must be a list of strings")
+        if "models" in q and not (isinstance(q["models"], dict) and all(isinstance(v, str) for v in q["models"].values())):
+            raise TemplateError(f"question {q['id']}: 'models' must map phases to model names")
+        if "early_exit" in q and not isinstance(q["early_exit"], bool):
+            raise TemplateError(f"question {q['id']}: 'early_exit' must be true or false")
+    return questions
+
+
+class TemplateRegistry:
+    """Loads one set of template files and reloads them when they change on disk. Thread-safe."""
+
+    def __init__(self, questions_path: str = QUESTIONS_PATH, klear_context_path: Optional[str] = KLEAR_CONTEXT_PATH,
+                 research_template_path: Optional[str] = RESEARCH_TEMPLATE_PATH,
+                 example_teardown_path: Optional[str] = EXAMPLE_TEARDOWN_PATH):
+        self.paths = {
+            "questions": questions_path,
+            "klear_context": klear_context_path,
+            "research_template": research_template_path,
+            "example_teardown": example_teardown_path
+        }
+        self._templates: Optional[Templates] = None
+        self._signature: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> Tuple:
+        signature = []
+        for path in self.paths.values():
+            try:
+                stat = os.stat(path) if path else None
+                signature.append((path, stat.st_mtime_ns, stat.st_size) if stat else (path, None, None))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def _read(self, name: str) -> str:
+        path = self.paths[name]
+        if not path:
+            return ""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError as e:
+            if name == "questions":
+                raise TemplateError(f"cannot read {path}: {e}")
+            # The text templates are optional; a compiler without them just leaves them out of its prompts
+            print(f"Error loading {path}: {e}")
+            return ""
+
+    def _load(self) -> Templates:
+        contents = {name: self._read(name) for name in self.paths}
+        try:
+            questions = validate_questions(json.loads(contents["questions"]))
+        except ValueError as e:
+            raise TemplateError(f"invalid {self.paths['questions']}: {e}")
+
+        digest = hashlib.sha256()
+        for name, content in contents.items():
+            digest.update(f"{name}\0{content}\0".encode("utf-8"))
+
+        klear_context = contents["klear_context"]
+        prompts = {}
+        for q in questions:
+            # Klear context goes into the prompts of the Klear strategy questions only
+            klear_section = f"\nKlear Context:\n{klear_context}" if "klear" in q["id"] and klear_context else ""
+            prompts[q["id"]] = QuestionPrompts(
+                simple=_precompile(SIMPLE_PROMPT, q, klear_section),
+                map=_precompile(MAP_PROMPT, q, klear_section),
+                synthesis=_precompile(SYNTHESIS_PROMPT, q, ""),
+                klear_context=bool(klear_section)
+            )
+        return Templates(
+            version=digest.hexdigest()[:12],
+            questions=questions,
+            klear_context=klear_context,
+            research_template=contents["research_template"],
+            example_teardown=contents["example_teardown"],
+            prompts=prompts
+        )
+
+    def get(self) -> Templates:
+        """Current templates, reloaded first if a file changed since the last load"""
+        signature = self._stat_signature()
+        if self._templates is not None and signature == self._signature:
+            return self._templates
+        with self._lock:
+            if self._templates is not None and signature == self._signature:
+                return self._templates
+            try:
+                templates = self._load()
+            except TemplateError as e:
+                if self._templates is None:
+                    raise
+                # A half-edited file shouldn't take down running jobs; keep the last good version
+                print(f"⚠️ Template reload failed, keeping version {self._templates.version}: {e}")
+                self._signature = signature
+                return self._templates
+            if self._templates is not None:
+                print(f"🔄 Templates reloaded: version {self._templates.version} -> {templates.version}")
+            else:
+                print(f"📋 Loaded templates version {templates.version}: {len(templates.questions)} questions")
+            self._templates = templates
+            self._signature = signature
+            return templates
+
+
+_registries: Dict[Tuple, TemplateRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(questions_path: str = QUESTIONS_PATH, klear_context_path: Optional[str] = KLEAR_CONTEXT_PATH,
+                 research_template_path: Optional[str] = RESEARCH_TEMPLATE_PATH,
+                 example_teardown_path: Optional[str] = EXAMPLE_TEARDOWN_PATH) -> TemplateRegistry:
+    """Shared registry for one set of template paths"""
+    key = (questions_path, klear_context_path, research_template_path, example_teardown_path)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = TemplateRegistry(*key)
+        return _registries[key]
+
+
+def get_templates(**paths) -> Templates:
+    """Templates for the given paths (the production template/ files by default)"""
+    return get_registry(**paths).get()
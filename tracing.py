@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import uuid
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+from metrics import HTTP_REQUESTS, HTTP_DURATION, SOURCE_RUNS, SOURCE_DURATION
+
+TRACE_FILENAME = "trace.jsonl"
+
+# Span currently active in this thread/context, used as the parent for new spans
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_tracers: Dict[str, "Tracer"] = {}
+_tracers_lock = threading.Lock()
+
+
+class Span:
+    """A single timed stage of a job. Attributes are free-form (bytes, tokens, url, status...)."""
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = dict(attrs)
+        self.status = "ok"
+        self.error = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float):
+        """Accumulate a numeric attribute, e.g. span.add("tokens", 120)"""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def fail(self, error):
+        self.status = "error"
+        self.error = str(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.tracer.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs
+        }
+
+
+class Tracer:
+    """
+    Records spans for one job as JSON lines in <output_folder>/trace.jsonl.
+
+    Spans nest through a context variable. Tool code that runs outside the job's context
+    (e.g. on a crewAI worker thread) is attached to the job's root span instead.
+    """
+
+    def __init__(self, output_folder: str, trace_id: Optional[str] = None):
+        self.output_folder = output_folder
+        self.trace_id = trace_id or os.path.basename(os.path.normpath(output_folder))
+        self.path = os.path.join(output_folder, TRACE_FILENAME)
+        self.root_span_id = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs):
+        parent = _current_span.get()
+        if parent is not None and parent.tracer is self:
+            parent_id = parent.span_id
+        else:
+            parent_id = self.root_span_id
+
+        span = Span(self, name, kind, parent_id, attrs)
+        is_root = self.root_span_id is None and kind == "job"
+        if is_root:
+            self.root_span_id = span.span_id
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.fail(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_ms = round((time.perf_counter() - span._start) * 1000, 2)
+            self._write(span)
+            if is_root:
+                self.root_span_id = None
+
+    def _write(self, span: Span):
+        try:
+            os.makedirs(self.output_folder, exist_ok=True)
+            line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except Exception as e:
+            print(f"Warning: could not write trace span {span.name}: {e}")
+
+    def load(self) -> List[Dict[str, Any]]:
+        return load_trace(self.output_folder)
+
+
+def get_tracer(output_folder: str, trace_id: Optional[str] = None) -> Tracer:
+    """Return the shared tracer for a job folder, creating it on first use"""
+    key = os.path.normpath(output_folder)
+    with _tracers_lock:
+        tracer = _tracers.get(key)
+        if tracer is None:
+            tracer = Tracer(output_folder, trace_id)
+            _tracers[key] = tracer
+        return tracer
+
+
+def release_tracer(output_folder: str):
+    """Drop a finished job's tracer from the registry"""
+    with _tracers_lock:
+        _tracers.pop(os.path.normpath(output_folder), None)
+
+
+def load_trace(output_folder: str) -> List[Dict[str, Any]]:
+    """Read all spans recorded for a job, ordered by start time"""
+    path = os.path.join(output_folder, TRACE_FILENAME)
+    spans = []
+    if not os.path.exists(path):
+        return spans
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    spans.sort(key=lambda s: s.get("start_time") or 0)
+    return spans
+
+
+def summarize_trace(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aggregate spans by name: count, errors, total/max duration, and summed numeric attributes"""
+    summary = {}
+    for span in spans:
+        entry = summary.setdefault(span["name"], {
+            "kind": span.get("kind"),
+            "count": 0,
+            "errors": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0
+        })
+        duration = span.get("duration_ms") or 0.0
+        entry["count"] += 1
+        entry["errors"] += 1 if span.get("status") == "error" else 0
+        entry["total_ms"] = round(entry["total_ms"] + duration, 2)
+        entry["max_ms"] = max(entry["max_ms"], duration)
+        for key in ("bytes", "prompt_tokens", "completion_tokens", "total_tokens"):
+            value = span.get("attrs", {}).get(key)
+            if isinstance(value, (int, float)):
+                entry[key] = entry.get(key, 0) + value
+    return summary
+
+
+def traced_request(session, method: str, url: str, output_folder: Optional[str], **kwargs):
+    """
+    Issue an HTTP request through a requests Session (or the requests module) inside an http span.
+    Without an output_folder (requests made outside any job) only the metrics are recorded.
+    """
+    host = urlparse(url).netloc or "unknown"
+    start = time.perf_counter()
+    name = f"http.{method.lower()}"
+    if output_folder:
+        span_context = get_tracer(output_folder).span(name, kind="http", url=url)
+    else:
+        span_context = nullcontext(Span(None, name, "http", None, {"url": url}))
+    with span_context as span:
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+        finally:
+            HTTP_DURATION.observe(time.perf_counter() - start, host=host)
+        HTTP_REQUESTS.inc(host=host, status=f"{response.status_code // 100}xx")
+        span.set(status_code=response.status_code, bytes=len(response.content))
+        if getattr(response, "attempts", 1) > 1:
+            span.set(attempts=response.attempts)
+        if getattr(response, "truncated", False):
+            span.set(truncated=True)
+        if response.status_code >= 400:
+            span.status = "error"
+        return response
+
+
+# Tools report failures as return strings rather than exceptions
+FAILURE_PREFIXES = ("error", "failed", "❌", "an error")
+
+
+def traced_source(source_name: str):
+    """Decorator for scraper tools: wraps the call in a source span keyed by its output_folder argument"""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            output_folder = bound.arguments.get("output_folder") or "output"
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                with get_tracer(output_folder).span(f"source.{source_name}", kind="source") as span:
+                    result = func(*args, **kwargs)
+                    span.set(result=str(result)[:200])
+                    if str(result).strip().lower().startswith(FAILURE_PREFIXES):
+                        span.status = "error"
+                    else:
+                        outcome = "success"
+                    return result
+            finally:
+                SOURCE_RUNS.inc(source=source_name, outcome=outcome)
+                SOURCE_DURATION.observe(time.perf_counter() - start, source=source_name)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,235 @@
+"""
+USAspending award search with pagination, a per-recipient cache and a bulk prefetch.
+
+A search first asks the count endpoint how many contracts match, then fetches every page up to
+the limit budget concurrently. Results are cached on disk per recipient, so re-running a company
+(or running it after a bulk prefetch) doesn't hit the API again until the cache entry expires.
+Bulk prefetch runs the same per-company search for many companies, a few at a time, so batch
+jobs find their contracts already cached:
+
+    python -m usaspending_client "Orbital Example" "Other Co"      # warm the cache
+    python -m usaspending_client --csv companies.csv
+"""
+import os
+import re
+import sys
+import csv
+import json
+import math
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import deadline
+from http_client import get_client
+from metrics import HTTP_CACHE
+from tracing import traced_request
+
+AWARDS_URL = "https://api.usaspending.gov/api/v2/search/spending_by_award/"
+COUNT_URL = "https://api.usaspending.gov/api/v2/search/spending_by_award_count/"
+CONTRACT_AWARD_TYPES = ["A", "B", "C", "D"]
+FIELDS = [
+    "Award ID",
+    "Recipient Name",
+    "Start Date",
+    "End Date",
+    "Award Amount",
+    "Awarding Agency",
+    "Award Description"
+]
+
+PAGE_SIZE = 100  # API maximum
+DEFAULT_LIMIT = int(os.environ.get("TEARDOWN_USASPENDING_LIMIT", "100"))
+PAGE_WORKERS = 4
+# Companies searched at once by a bulk prefetch (each search also pages with PAGE_WORKERS)
+PREFETCH_WORKERS = 3
+CACHE_DIR = os.path.join("cache", "usaspending")
+CACHE_TTL_SECONDS = float(os.environ.get("TEARDOWN_USASPENDING_CACHE_TTL", str(24 * 3600)))
+
+_LEGAL_SUFFIXES = {"inc", "incorporated", "llc", "corp", "corporation", "co", "company", "ltd", "limited", "lp", "plc"}
+
+
+def normalize_recipient(name: str) -> str:
+    """Lowercase, strip punctuation and legal suffixes: "ORBITAL EXAMPLE, INC." -> "orbital example" """
+    words = re.sub(r"[^a-z0-9 ]+", " ", (name or "").lower()).split()
+    while words and words[-1] in _LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class USAspendingClient:
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 page_size: int = PAGE_SIZE, page_workers: int = PAGE_WORKERS):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.page_size = page_size
+        self.page_workers = page_workers
+
+    # --- cache ---
+
+    def _cache_path(self, company_name: str) -> str:
+        key = hashlib.sha1(normalize_recipient(company_name).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _cache_get(self, company_name: str, limit: int) -> Optional[List[dict]]:
+        path = self._cache_path(company_name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            HTTP_CACHE.inc(cache="usaspending", result="miss")
+            return None
+        fresh = time.time() - entry.get("fetched_at", 0) < self.ttl_seconds
+        # An entry fetched with a smaller budget only answers if it already holds the full history
+        covers = entry.get("limit", 0) >= limit or entry.get("complete", False)
+        if not (fresh and covers):
+            HTTP_CACHE.inc(cache="usaspending", result="miss")
+            return None
+        HTTP_CACHE.inc(cache="usaspending", result="hit")
+        return entry["results"][:limit]
+
+    def _cache_put(self, company_name: str, limit: int, results: List[dict], complete: bool):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {
+            "company_name": company_name,
+            "fetched_at": time.time(),
+            "limit": limit,
+            "complete": complete,
+            "results": results
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._cache_path(company_name))
+
+    # --- API ---
+
+    def _payload(self, recipients: List[str], page: int, limit: int) -> dict:
+        return {
+            "filters": {
+                "recipient_search_text": recipients,
+                "award_type_codes": CONTRACT_AWARD_TYPES
+            },
+            "limit": limit,
+            "page": page,
+            "fields": FIELDS,
+            "sort": "Award Amount",
+            "order": "desc"
+        }
+
+    def _post(self, url: str, payload: dict, output_folder: Optional[str]) -> dict:
+        response = traced_request(get_client(), "POST", url, output_folder, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"API Error: {response.status_code} - {response.text[:200]}")
+        return response.json()
+
+    def _count(self, recipients: List[str], output_folder: Optional[str]) -> Optional[int]:
+        try:
+            data = self._post(COUNT_URL, {"filters": self._payload(recipients, 1, 1)["filters"]}, output_folder)
+            return int(data["results"]["contracts"])
+        except Exception as e:
+            print(f"⚠️ USAspending count unavailable, paging sequentially: {e}")
+            return None
+
+    def search(self, recipients: List[str], budget: int, output_folder: Optional[str] = None) -> Tuple[List[dict], bool]:
+        """
+        All contract awards matching any of the recipients, largest first, up to budget results.
+        Returns (results, complete) where complete means nothing was left out by the budget.
+        """
+        page_size = min(self.page_size, budget)
+        with ThreadPoolExecutor(max_workers=self.page_workers, thread_name_prefix="usaspending") as pool:
+            count_future = pool.submit(deadline.propagate(self._count), recipients, output_folder)
+            first = self._post(AWARDS_URL, self._payload(recipients, 1, page_size), output_folder)
+            results = list(first.get("results", []))
+            has_next = first.get("page_metadata", {}).get("hasNext", False)
+            total = count_future.result()
+
+            if total is not None:
+                pages = math.ceil(min(total, budget) / page_size)
+                rest = pool.map(
+                    deadline.propagate(lambda page: self._post(AWARDS_URL, self._payload(recipients, page, page_size), output_folder)),
+                    range(2, pages + 1)
+                )
+                for data in rest:
+                    results.extend(data.get("results", []))
+                complete = total <= budget
+            else:
+                page = 1
+                while has_next and len(results) < budget:
+                    page += 1
+                    data = self._post(AWARDS_URL, self._payload(recipients, page, page_size), output_folder)
+                    results.extend(data.get("results", []))
+                    has_next = data.get("page_metadata", {}).get("hasNext", False)
+                complete = not has_next
+
+        return results[:budget], complete and len(results) <= budget
+
+    def fetch_awards(self, company_name: str, limit: int = DEFAULT_LIMIT, output_folder: Optional[str] = None) -> List[dict]:
+        """Contract awards for one company, served from the cache when fresh"""
+        cached = self._cache_get(company_name, limit)
+        if cached is not None:
+            return cached
+        results, complete = self.search([company_name], limit, output_folder)
+        self._cache_put(company_name, limit, results, complete)
+        return results
+
+    def fetch_awards_bulk(self, company_names: List[str], limit: int = DEFAULT_LIMIT,
+                          output_folder: Optional[str] = None) -> Dict[str, List[dict]]:
+        """
+        Contract awards for many companies, PREFETCH_WORKERS at a time. Each company goes through
+        fetch_awards - the cache, then the API's own recipient search - so what's cached here is
+        exactly what its job would have fetched.
+        """
+        names = list(dict.fromkeys(company_names))
+        found: Dict[str, List[dict]] = {}
+        with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="usaspending-prefetch") as pool:
+            futures = {
+                name: pool.submit(deadline.propagate(self.fetch_awards), name, limit, output_folder) for name in names
+            }
+            for name, future in futures.items():
+                try:
+                    found[name] = future.result()
+                except Exception as e:
+                    print(f"❌ USAspending prefetch failed for {name}: {e}")
+        return found
+
+
+_client: Optional[USAspendingClient] = None
+_client_lock = threading.Lock()
+
+
+def get_usaspending_client() -> USAspendingClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = USAspendingClient()
+        return _client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch USAspending contracts into the cache")
+    parser.add_argument("companies", nargs="*", help="company names")
+    parser.add_argument("--csv", help="CSV file with a company_name column (same format as the bulk import)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="max awards per company")
+    args = parser.parse_args(argv)
+
+    names = list(args.companies)
+    if args.csv:
+        with open(args.csv, newline="", encoding="utf-8") as f:
+            names += [row["company_name"].strip() for row in csv.DictReader(f) if row.get("company_name", "").strip()]
+    if not names:
+        parser.error("give company names or --csv")
+
+    found = get_usaspending_client().fetch_awards_bulk(names, limit=args.limit)
+    for name in names:
+        awards = found.get(name)
+        print(f"{name}: {len(awards)} contracts" if awards is not None else f"{name}: failed (fetched per job)")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -42,11 +42,6 @@ def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file system usage"""
     return "".join(c for c in filename if c.isalnum() or c in ('-', '_', '.')).lower()
 
-def get_teardown_path(output_folder: str, company_name: str) -> str:
-    """Get the path for the compiled teardown file"""
-    safe_name = sanitize_filename(company_name)
-    return os.path.join(output_folder, f"{safe_name}_teardown.md")
-
 def ensure_directories_exist():
     """Ensure base directories exist"""
     os.makedirs("output", exist_ok=True)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3.11
+"""
+Standalone job worker: leases pending teardown jobs from the database and runs them.
+
+Each worker process runs its own pipeline, so BeautifulSoup parsing, markdown compilation and
+the crew's CPU work scale with cores instead of sharing the web process's GIL. Run as many as
+the machine (or several machines sharing teardown_app.db and output/) can take:
+
+    python -m worker                  # one process, one job at a time
+    python -m worker --processes 4    # four worker processes
+"""
+import os
+import sys
+import signal
+import argparse
+import multiprocessing
+
+from job_runner import JobRunner, default_worker_id, POLL_INTERVAL_SECONDS, LEASE_SECONDS
+
+
+def run_worker(jobs_per_process: int, poll_interval: float, lease_seconds: float):
+    runner = JobRunner(
+        poll_interval=poll_interval,
+        max_workers=jobs_per_process,
+        worker_id=default_worker_id(),
+        lease_seconds=lease_seconds
+    )
+    signal.signal(signal.SIGTERM, runner.stop)
+    signal.signal(signal.SIGINT, runner.stop)
+    runner.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run teardown jobs from the jobs table")
+    parser.add_argument("--processes", type=int, default=int(os.environ.get("TEARDOWN_WORKER_PROCESSES", "1")),
+                        help="worker processes to start")
+    parser.add_argument("--jobs-per-process", type=int, default=int(os.environ.get("TEARDOWN_JOBS_PER_PROCESS", "1")),
+                        help="jobs each process runs concurrently (threads)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS,
+                        help="seconds between checks for pending jobs")
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS,
+                        help="lease length; a job is re-queued if its worker stops heartbeating")
+    args = parser.parse_args(argv)
+
+    worker_args = (args.jobs_per_process, args.poll_interval, args.lease_seconds)
+    if args.processes <= 1:
+        run_worker(*worker_args)
+        return
+
+    children = [
+        multiprocessing.Process(target=run_worker, args=worker_args, name=f"teardown-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, _frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+    sys.exit(max((child.exitcode or 0) for child in children))
+
+
+if __name__ == "__main__":
+    main()
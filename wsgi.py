@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production serving:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import os
+
+# Web workers only enqueue jobs; the job runner started by gunicorn.conf.py executes them
+os.environ.setdefault("TEARDOWN_JOB_EXECUTION", "queue")
+
+from app import create_app
+
+app = create_app()